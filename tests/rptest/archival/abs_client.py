@@ -1,7 +1,11 @@
 from rptest.archival.s3_client import ObjectMetadata
-from rptest.archival.shared_client_utils import key_to_topic
+from rptest.archival.shared_client_utils import (HASH_PREFIXES,
+                                                 LISTING_WORKERS,
+                                                 is_hash_prefixed,
+                                                 key_to_topic,
+                                                 parallel_listing)
 
-from azure.storage.blob import BlobClient, BlobServiceClient, BlobType, ContainerClient
+from azure.storage.blob import BlobClient, BlobPrefix, BlobServiceClient, BlobType, ContainerClient
 from itertools import islice
 
 import time
@@ -131,6 +135,15 @@ class ABSClient:
                                                         blob_name=key)
         return blob_client.download_blob().content_as_bytes()
 
+    def get_object_range(self, bucket: str, key: str, offset: int,
+                         length: int) -> bytes:
+        """The `length` bytes of an object from `offset`"""
+        blob_client = BlobClient.from_connection_string(self.conn_str,
+                                                        container_name=bucket,
+                                                        blob_name=key)
+        return blob_client.download_blob(offset=offset,
+                                         length=length).content_as_bytes()
+
     def put_object(self, bucket: str, key: str, data: str):
         container_client = ContainerClient.from_connection_string(
             self.conn_str, container_name=bucket)
@@ -159,6 +172,17 @@ class ABSClient:
                               etag=props.content_settings.content_md5.hex(),
                               content_length=props.size)
 
+    @staticmethod
+    def _blob_metadata(blob_props) -> Optional[ObjectMetadata]:
+        if blob_props.content_settings.content_md5 is None:
+            return None
+
+        return ObjectMetadata(
+            bucket=blob_props.container,
+            key=blob_props.name,
+            etag=blob_props.content_settings.content_md5.hex(),
+            content_length=blob_props.size)
+
     def list_objects(self,
                      bucket: str,
                      topic: Optional[str] = None,
@@ -170,11 +194,73 @@ class ABSClient:
                 self.logger.debug(f"Skip {blob_props.name} for {topic}")
                 continue
 
-            if blob_props.content_settings.content_md5 is None:
-                continue
+            o = self._blob_metadata(blob_props)
+            if o is not None:
+                yield o
+
+    def _list_prefix(self, bucket: str,
+                     prefix: str) -> Iterator[list[ObjectMetadata]]:
+        container_client = ContainerClient.from_connection_string(
+            self.conn_str, container_name=bucket)
+        for page in container_client.list_blobs(
+                name_starts_with=prefix).by_page():
+            yield [o for o in map(self._blob_metadata, page) if o is not None]
+
+    def _list_unhashed(self, bucket: str) -> Iterator[list[ObjectMetadata]]:
+        """
+        Objects whose keys are not under a hash prefix, found from a listing
+        of the top level of the bucket: its "directories" and the blobs at
+        its root. Hash prefixed directories make most of that listing, but
+        there are far fewer of them than objects.
+        """
+        container_client = ContainerClient.from_connection_string(
+            self.conn_str, container_name=bucket)
+        prefixes = []
+        for page in container_client.walk_blobs(delimiter="/").by_page():
+            blobs = []
+            for item in page:
+                if is_hash_prefixed(item.name):
+                    continue
+                if isinstance(item, BlobPrefix):
+                    prefixes.append(item.name)
+                else:
+                    blobs.append(item)
+            yield [o for o in map(self._blob_metadata, blobs) if o is not None]
+        for prefix in prefixes:
+            yield from self._list_prefix(bucket, prefix)
+
+    def list_objects_parallel(
+            self,
+            bucket: str,
+            topic: Optional[str] = None,
+            workers: int = LISTING_WORKERS) -> Iterator[ObjectMetadata]:
+        """
+        Same objects as list_objects(bucket, topic), listed by hash prefix
+        on `workers` threads, in no particular order.
+
+        There is no "start after" in blob listings to cover the keys between
+        hash prefixes like S3Client.list_objects_parallel does: objects not
+        under a hash prefix are found by one more shard, see _list_unhashed.
+
+        Buckets that fit in one page are listed with a single request.
+        """
+        container_client = ContainerClient.from_connection_string(
+            self.conn_str, container_name=bucket)
+        pages = container_client.list_blobs().by_page()
+        first_page = list(next(pages, []))
+        if pages.continuation_token:
+
+            def list_shard(prefix: Optional[str]):
+                if prefix is None:
+                    return self._list_unhashed(bucket)
+                return self._list_prefix(bucket, prefix)
+
+            objects = parallel_listing(HASH_PREFIXES + [None], list_shard,
+                                       workers)
+        else:
+            objects = (o for o in map(self._blob_metadata, first_page)
+                       if o is not None)
 
-            yield ObjectMetadata(
-                bucket=blob_props.container,
-                key=blob_props.name,
-                etag=blob_props.content_settings.content_md5.hex(),
-                content_length=blob_props.size)
+        for o in objects:
+            if topic is None or key_to_topic(o.key) == topic:
+                yield o
@@ -1,8 +1,13 @@
 import threading
 
-from rptest.archival.shared_client_utils import key_to_topic
+from rptest.archival.shared_client_utils import (HASH_PREFIXES,
+                                                 LISTING_WORKERS,
+                                                 is_hash_prefixed,
+                                                 key_to_topic,
+                                                 parallel_listing)
 
 import boto3
+import botocore.session
 from botocore.config import Config
 from botocore.exceptions import ClientError
 
@@ -26,6 +31,38 @@ class ObjectMetadata(NamedTuple):
     content_length: int
 
 
+class ListingShard(NamedTuple):
+    """
+    A range of keys listed by list_objects_parallel: those after
+    `start_after` (if set) and before `end` (if set) that start with
+    `prefix`. Gap shards hold the keys between the hash prefixes, those
+    without a hash prefix.
+    """
+    prefix: str
+    start_after: Optional[str] = None
+    end: Optional[str] = None
+    is_gap: bool = False
+
+
+def listing_shards() -> list[ListingShard]:
+    """Shards covering the whole keyspace: each hash prefix and the gaps around them"""
+    shards = []
+    previous = None
+    for prefix in HASH_PREFIXES:
+        # Keys after the previous prefix's range and before this one. With
+        # "~" as the end of a prefix range, the rare hash prefixed keys
+        # past it are also seen in the gap, where they are skipped.
+        shards.append(
+            ListingShard("",
+                         start_after=previous and previous + "~",
+                         end=prefix,
+                         is_gap=True))
+        shards.append(ListingShard(prefix))
+        previous = prefix
+    shards.append(ListingShard("", start_after=previous + "~", is_gap=True))
+    return shards
+
+
 def retry_on_slowdown(tries=4, delay=1.0, backoff=2.0):
     """Retry with an exponential backoff if SlowDown exception was triggered."""
     def retry(fn):
@@ -69,19 +106,55 @@ class S3Client:
         self._cli = self.make_client()
         self.logger = logger
 
-    def make_client(self):
+        # Clients of the threads of list_objects_parallel
+        self._thread_clients = threading.local()
+        self._listing_session = None
+        self._listing_session_lock = threading.Lock()
+
+    def make_client(self, session: Optional[boto3.session.Session] = None):
+        """
+        :param session: session to create the client from, instead of the
+                        default one
+        """
+        # The pool is sized for callers that share the client across
+        # threads, e.g. BucketView fetching manifests concurrently.
         cfg = Config(region_name=self._region,
                      signature_version='s3v4',
                      retries={
                          'max_attempts': 10,
                          'mode': 'adaptive'
-                     })
-        return boto3.client('s3',
-                            config=cfg,
-                            aws_access_key_id=self._access_key,
-                            aws_secret_access_key=self._secret_key,
-                            endpoint_url=self._endpoint,
-                            use_ssl=not self._disable_ssl)
+                     },
+                     max_pool_connections=32)
+        factory = boto3 if session is None else session
+        return factory.client('s3',
+                              config=cfg,
+                              aws_access_key_id=self._access_key,
+                              aws_secret_access_key=self._secret_key,
+                              endpoint_url=self._endpoint,
+                              use_ssl=not self._disable_ssl)
+
+    def _thread_listing_client(self):
+        """
+        A client of the calling thread for listings, boto3 clients are not
+        thread safe. Clients share a session, that has the service model
+        loaded once, and that leaves the timestamps of responses (e.g. the
+        LastModified of objects) as strings: parsing them is most of the
+        CPU time spent on a listing otherwise.
+        """
+        client = getattr(self._thread_clients, "client", None)
+        if client is None:
+            # Sessions are not thread safe either
+            with self._listing_session_lock:
+                if self._listing_session is None:
+                    session = botocore.session.get_session()
+                    session.get_component(
+                        'response_parser_factory').set_parser_defaults(
+                            timestamp_parser=lambda ts: ts)
+                    self._listing_session = boto3.session.Session(
+                        botocore_session=session)
+                client = self.make_client(session=self._listing_session)
+            self._thread_clients.client = client
+        return client
 
     def create_bucket(self, name):
         """Create bucket in S3"""
@@ -146,8 +219,7 @@ class S3Client:
         # out the keyspace, then run using a fixed number of workers.  Worker
         # count has to be modest to avoid hitting a lot of AWS SlowDown responses.
         max_workers = 4 if parallel else 1
-        hash_prefixes = list(f"{i:02x}" for i in range(0, 256))
-        prefixes = hash_prefixes if parallel else [""]
+        prefixes = HASH_PREFIXES if parallel else [""]
 
         def empty_bucket_prefix(prefix):
             self.logger.debug(
@@ -277,10 +349,11 @@ class S3Client:
                 raise
 
     @retry_on_slowdown()
-    def _get_object(self, bucket, key):
+    def _get_object(self, bucket, key, byte_range: Optional[str] = None):
         """Get object from S3"""
+        kwargs = {} if byte_range is None else {'Range': byte_range}
         try:
-            return self._cli.get_object(Bucket=bucket, Key=key)
+            return self._cli.get_object(Bucket=bucket, Key=key, **kwargs)
         except ClientError as err:
             self.logger.debug(f"error response getting {bucket}/{key}: {err}")
             if err.response['Error']['Code'] == 'SlowDown':
@@ -333,6 +406,12 @@ class S3Client:
         resp = self._get_object(bucket, key)
         return resp['Body'].read()
 
+    def get_object_range(self, bucket, key, offset: int, length: int):
+        """The `length` bytes of an object from `offset`"""
+        resp = self._get_object(
+            bucket, key, byte_range=f"bytes={offset}-{offset + length - 1}")
+        return resp['Body'].read()
+
     def put_object(self, bucket, key, data):
         self._put_object(bucket, key, data)
 
@@ -385,17 +464,18 @@ class S3Client:
                       token=None,
                       limit=1000,
                       prefix: Optional[str] = None,
-                      client=None):
+                      client=None,
+                      start_after: Optional[str] = None):
+        kwargs = {}
+        if token is not None:
+            kwargs['ContinuationToken'] = token
+        elif start_after:
+            kwargs['StartAfter'] = start_after
         try:
-            if token is not None:
-                return client.list_objects_v2(Bucket=bucket,
-                                              MaxKeys=limit,
-                                              ContinuationToken=token,
-                                              Prefix=prefix if prefix else "")
-            else:
-                return client.list_objects_v2(Bucket=bucket,
-                                              MaxKeys=limit,
-                                              Prefix=prefix if prefix else "")
+            return client.list_objects_v2(Bucket=bucket,
+                                          MaxKeys=limit,
+                                          Prefix=prefix if prefix else "",
+                                          **kwargs)
         except ClientError as err:
             self.logger.debug(f"error response listing {bucket}: {err}")
             if err.response['Error']['Code'] == 'SlowDown':
@@ -450,6 +530,68 @@ class S3Client:
                                          etag=item['ETag'][1:-1],
                                          content_length=item['Size'])
 
+    def _list_shard(self, bucket: str,
+                    shard: ListingShard) -> Iterator[list[ObjectMetadata]]:
+        client = self._thread_listing_client()
+        token = None
+        # Gaps are usually empty: a single key tells whether that is so.
+        limit = 1 if shard.is_gap else 1000
+        while True:
+            res = self._list_objects(bucket,
+                                     token,
+                                     limit=limit,
+                                     prefix=shard.prefix,
+                                     client=client,
+                                     start_after=shard.start_after)
+            page = []
+            for item in res.get('Contents', []):
+                key = item['Key']
+                if shard.end is not None and key >= shard.end:
+                    yield page
+                    return
+                if shard.is_gap and is_hash_prefixed(key):
+                    continue
+                page.append(
+                    ObjectMetadata(bucket=bucket,
+                                   key=key,
+                                   etag=item['ETag'][1:-1],
+                                   content_length=item['Size']))
+            yield page
+            if not res['IsTruncated']:
+                return
+            token = res.get('NextContinuationToken')
+            limit = 1000
+
+    def list_objects_parallel(
+            self,
+            bucket,
+            topic: Optional[str] = None,
+            workers: int = LISTING_WORKERS) -> Iterator[ObjectMetadata]:
+        """
+        Same objects as list_objects(bucket, topic), listed by shards of the
+        keyspace (see listing_shards) on `workers` threads. Objects are not
+        in key order.
+
+        Buckets that fit in one page are listed with a single request.
+        """
+        res = self._list_objects(bucket,
+                                 limit=1000,
+                                 client=self._thread_listing_client())
+        if res['IsTruncated']:
+            objects = parallel_listing(
+                listing_shards(),
+                lambda shard: self._list_shard(bucket, shard), workers)
+        else:
+            objects = (ObjectMetadata(bucket=bucket,
+                                      key=item['Key'],
+                                      etag=item['ETag'][1:-1],
+                                      content_length=item['Size'])
+                       for item in res.get('Contents', []))
+
+        for o in objects:
+            if topic is None or key_to_topic(o.key) == topic:
+                yield o
+
     def list_buckets(self, client=None) -> dict[str, Union[list, dict]]:
         if client is None:
             client = self._cli
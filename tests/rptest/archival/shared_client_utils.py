@@ -1,5 +1,8 @@
+import queue
 import re
-from typing import Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, NamedTuple, Optional, TypeVar
 
 expr = re.compile(r'.+/(.+)/(.+)/(\d+_\d+/|topic_manifest.json)')
 
@@ -10,3 +13,81 @@ def key_to_topic(key: str) -> Optional[str]:
     # Topic manifest objects: <hash>/meta/<ns>/<topic>/topic_manifest.json
     if m := expr.search(key):
         return m[2]
+
+
+# Redpanda spreads objects over the keyspace with a hash prefix: 8 hex
+# digits for segments, a hex digit and 7 zeros for manifests. The first two
+# digits split a bucket into evenly sized shards for listing.
+HASH_PREFIXES = [f"{i:02x}" for i in range(256)]
+_HASH_PREFIX_SET = frozenset(HASH_PREFIXES)
+
+# Default number of shards listed at once by list_objects_parallel
+LISTING_WORKERS = 16
+
+# Pages of listing results held before the listing threads wait for the
+# consumer to catch up.
+MAX_BUFFERED_PAGES = 64
+
+
+def is_hash_prefixed(key: str) -> bool:
+    return key[:2] in _HASH_PREFIX_SET
+
+
+T = TypeVar('T')
+S = TypeVar('S')
+
+
+class _ShardDone(NamedTuple):
+    error: Optional[BaseException] = None
+
+
+def parallel_listing(shards: Iterable[S],
+                     list_shard: Callable[[S], Iterable[list[T]]],
+                     workers: int) -> Iterator[T]:
+    """
+    Run `list_shard` on each of `shards` from a pool of `workers` threads,
+    and yield the items of the pages it produces as a single stream. Items
+    of a shard keep their order, shards are interleaved.
+
+    An error listing a shard is raised to the consumer. Closing the
+    generator early stops the listing threads.
+    """
+    shards = list(shards)
+    pages = queue.Queue(maxsize=MAX_BUFFERED_PAGES)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                pages.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def run(shard):
+        try:
+            for page in list_shard(shard):
+                if page and not put(page):
+                    return
+        except BaseException as e:
+            put(_ShardDone(e))
+        else:
+            put(_ShardDone())
+
+    executor = ThreadPoolExecutor(max_workers=max(1, workers))
+    try:
+        for shard in shards:
+            executor.submit(run, shard)
+        remaining = len(shards)
+        while remaining:
+            page = pages.get()
+            if isinstance(page, _ShardDone):
+                if page.error is not None:
+                    raise page.error
+                remaining -= 1
+            else:
+                yield from page
+    finally:
+        stop.set()
+        executor.shutdown(wait=True, cancel_futures=True)
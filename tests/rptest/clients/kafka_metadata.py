@@ -0,0 +1,198 @@
+# Copyright 2023 Redpanda Data, Inc.
+#
+# Use of this software is governed by the Business Source License
+# included in the file licenses/BSL.md
+#
+# As of the Change Date specified in that file, in accordance with
+# the Business Source License, use of this software will be governed
+# by the Apache License, Version 2.0
+import collections
+import time
+from typing import NamedTuple, Optional
+
+from kafka import KafkaClient
+from kafka.errors import KafkaTimeoutError, NodeNotReadyError, for_code
+from kafka.protocol.metadata import MetadataRequest
+from kafka.protocol.offset import OffsetRequest, OffsetResetStrategy
+
+from rptest.services import tls
+
+# Error code of a partition or topic without errors
+NO_ERROR = 0
+
+# Offsets fetched for each partition, and the ListOffsets timestamp for each
+OFFSET_FIELDS = (("start_offset", OffsetResetStrategy.EARLIEST),
+                 ("high_watermark", OffsetResetStrategy.LATEST))
+
+
+class PartitionMetadata(NamedTuple):
+    topic: str
+    id: int
+    # -1 if the partition has no leader
+    leader: int
+    replicas: tuple[int, ...]
+    isr: tuple[int, ...]
+    # Kafka error code of the partition in the metadata response
+    error: int = NO_ERROR
+    # Only set when offsets were requested and the leader returned them
+    start_offset: Optional[int] = None
+    high_watermark: Optional[int] = None
+
+
+class KafkaMetadataClient:
+    """
+    In-process client for the metadata of many topics at once, with one
+    Metadata request per call and, if offsets are requested, one pair of
+    ListOffsets requests per partition leader, all in flight together.
+
+    Replaces describing topics one by one with rpk in checks polled over
+    clusters with very many partitions.
+    """
+    def __init__(self,
+                 redpanda,
+                 username: Optional[str] = None,
+                 password: Optional[str] = None,
+                 sasl_mechanism: Optional[str] = None,
+                 tls_cert: Optional[tls.Certificate] = None,
+                 timeout_sec: int = 30):
+        self._redpanda = redpanda
+        self._username = username
+        self._password = password
+        self._sasl_mechanism = sasl_mechanism
+        self._tls_cert = tls_cert
+        self._timeout_sec = timeout_sec
+        self._client = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+    def _config(self) -> dict:
+        config = dict(bootstrap_servers=self._redpanda.brokers(),
+                      client_id="rptest-metadata",
+                      request_timeout_ms=self._timeout_sec * 1000)
+        protocol = "PLAINTEXT"
+        if self._tls_cert:
+            protocol = "SSL"
+            config.update(ssl_cafile=self._tls_cert.ca.crt,
+                          ssl_certfile=self._tls_cert.crt,
+                          ssl_keyfile=self._tls_cert.key)
+        if self._username:
+            protocol = f"SASL_{protocol}"
+            config.update(sasl_mechanism=self._sasl_mechanism,
+                          sasl_plain_username=self._username,
+                          sasl_plain_password=self._password)
+        config["security_protocol"] = protocol
+        return config
+
+    def _connected_client(self) -> KafkaClient:
+        if self._client is None:
+            self._client = KafkaClient(**self._config())
+        return self._client
+
+    def _send_all(self, requests: list[tuple[int, object]]) -> list:
+        """
+        Send each request to its node, all at once, and wait for all the
+        responses. On error, the connection is dropped so that the next
+        call starts afresh.
+        """
+        client = self._connected_client()
+        deadline = time.time() + self._timeout_sec
+        try:
+            for node_id in {node_id for node_id, _ in requests}:
+                while not client.ready(node_id):
+                    if time.time() > deadline:
+                        raise KafkaTimeoutError(
+                            f"Timed out connecting to node {node_id}")
+                    client.poll(timeout_ms=100)
+
+            futures = [
+                client.send(node_id, request) for node_id, request in requests
+            ]
+            while not all(f.is_done for f in futures):
+                if time.time() > deadline:
+                    raise KafkaTimeoutError(
+                        f"Timed out waiting for {len(requests)} responses")
+                client.poll(timeout_ms=100)
+        except Exception:
+            self.close()
+            raise
+
+        for f in futures:
+            if f.failed():
+                self.close()
+                raise f.exception
+        return [f.value for f in futures]
+
+    def describe_topics(
+            self,
+            topics: Optional[list[str]] = None,
+            offsets: bool = False) -> dict[str, list[PartitionMetadata]]:
+        """
+        Partitions of each of topics (all topics by default), sorted by
+        id. Topics the cluster does not know about are left out.
+
+        :param offsets: also fetch start offsets and high watermarks, from
+                        the leader of each partition
+        """
+        client = self._connected_client()
+        node_id = client.least_loaded_node()
+        if node_id is None:
+            raise NodeNotReadyError("No broker to fetch metadata from")
+        metadata, = self._send_all([(node_id, MetadataRequest[1](topics))])
+
+        result = {}
+        for error, topic, _, partitions in metadata.topics:
+            if error != NO_ERROR:
+                self._redpanda.logger.debug(
+                    f"Metadata of {topic}: {for_code(error).__name__}")
+                continue
+            result[topic] = sorted(
+                (PartitionMetadata(topic, partition, leader, tuple(replicas),
+                                   tuple(isr), p_error)
+                 for p_error, partition, leader, replicas, isr in partitions),
+                key=lambda p: p.id)
+
+        if offsets:
+            result = self._add_offsets(metadata, result)
+        return result
+
+    def _add_offsets(self, metadata, result: dict) -> dict:
+        # Brokers of the metadata response become known to the client
+        self._client.cluster.update_metadata(metadata)
+
+        by_leader = collections.defaultdict(
+            lambda: collections.defaultdict(list))
+        for topic, partitions in result.items():
+            for p in partitions:
+                if p.leader >= 0:
+                    by_leader[p.leader][topic].append(p.id)
+
+        requests = []
+        fields = []
+        for leader, topics in by_leader.items():
+            for field, timestamp in OFFSET_FIELDS:
+                request_topics = [(topic, [(id, timestamp) for id in ids])
+                                  for topic, ids in topics.items()]
+                # -1: the replica id of a client
+                requests.append((leader, OffsetRequest[1](-1, request_topics)))
+                fields.append(field)
+
+        found = collections.defaultdict(dict)
+        for field, response in zip(fields, self._send_all(requests)):
+            for topic, partitions in response.topics:
+                for partition, error, _, offset in partitions:
+                    if error == NO_ERROR:
+                        found[(topic, partition)][field] = offset
+
+        return {
+            topic: [p._replace(**found[(topic, p.id)]) for p in partitions]
+            for topic, partitions in result.items()
+        }
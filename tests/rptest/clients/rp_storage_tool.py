@@ -11,6 +11,8 @@ import tempfile
 import subprocess
 import json
 
+from rptest.utils.manifest_serde import ManifestDecodeError, decode_partition_manifest
+
 
 class RpStorageTool:
     def __init__(self, logger):
@@ -40,7 +42,15 @@ class RpStorageTool:
                     raise
 
     def decode_partition_manifest(self, binary_data) -> dict:
-        return self._decode(binary_data, "decode-partition-manifest")
+        # Decode in process, only fall back to the tool for encodings that
+        # the native decoder doesn't understand.
+        try:
+            return decode_partition_manifest(binary_data)
+        except ManifestDecodeError as e:
+            self.logger.warn(
+                f"Native decoding of {len(binary_data)} byte manifest failed, using rp-storage-tool: {e}"
+            )
+            return self._decode(binary_data, "decode-partition-manifest")
 
     def decode_lifecycle_marker(self, binary_data) -> dict:
         return self._decode(binary_data, "decode-lifecycle-marker")
@@ -0,0 +1,136 @@
+"""
+A script that computes the MD5 hash and size of every file in the data directory of redpanda.
+
+Files are hashed in parallel by a pool of threads. With --cache, the hashes are kept in
+a file on the node and reused on the next run for files whose inode, size and mtime did
+not change.
+
+Prints a JSON object mapping the path of each file to [md5, size].
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import json
+import os
+import sys
+import time
+
+READ_SIZE = 1024 * 1024
+
+# Files modified within this many ns of being hashed are not cached: a
+# later modification may not change their mtime.
+RACY_MTIME_NS = 2 * 1000 * 1000 * 1000
+
+
+def stat_key(st: os.stat_result):
+    return [st.st_ino, st.st_size, st.st_mtime_ns]
+
+
+def list_files(data_dir: str):
+    """Yields (path, lstat) of the regular files under data_dir, like find -type f"""
+    pending = [data_dir]
+    while pending:
+        try:
+            it = os.scandir(pending.pop())
+        except (FileNotFoundError, NotADirectoryError):
+            continue
+        with it:
+            for e in it:
+                try:
+                    if e.is_dir(follow_symlinks=False):
+                        pending.append(e.path)
+                    elif e.is_file(follow_symlinks=False):
+                        yield e.path, e.stat(follow_symlinks=False)
+                except FileNotFoundError:
+                    # It's valid for files to be deleted at any time
+                    continue
+
+
+def hash_file(path: str):
+    """Returns (md5, size, stat key or None if the file changed while hashed)"""
+    md5 = hashlib.md5()
+    size = 0
+    with open(path, 'rb') as f:
+        before = os.fstat(f.fileno())
+        buf = bytearray(READ_SIZE)
+        view = memoryview(buf)
+        while True:
+            n = f.readinto(buf)
+            if n == 0:
+                break
+            md5.update(view[:n])
+            size += n
+        after = os.fstat(f.fileno())
+    key = stat_key(after)
+    if key != stat_key(before) or after.st_size != size:
+        key = None
+    return md5.hexdigest(), size, key
+
+
+def load_cache(path: str) -> dict:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_cache(path: str, cache: dict):
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(cache, f, separators=(',', ':'))
+    os.replace(tmp, path)
+
+
+def compute_checksums(data_dir: str, workers: int, cache: dict):
+    """
+    Returns ({path: [md5, size]}, new cache). cache maps paths to
+    [inode, size, mtime_ns, md5] of a previous run.
+    """
+    output = {}
+    new_cache = {}
+    pending = []
+    now = time.time_ns()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for path, st in list_files(data_dir):
+            key = stat_key(st)
+            cached = cache.get(path)
+            if cached is not None and cached[:3] == key:
+                output[path] = [cached[3], st.st_size]
+                new_cache[path] = cached
+            else:
+                pending.append((path, executor.submit(hash_file, path)))
+
+        for path, future in pending:
+            try:
+                md5, size, key = future.result()
+            except FileNotFoundError:
+                # Deleted between listing and hashing
+                continue
+            output[path] = [md5, size]
+            if key is not None and now - key[2] > RACY_MTIME_NS:
+                new_cache[path] = key + [md5]
+    return output, new_cache
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description='Compute checksums')
+    parser.add_argument('--data-dir',
+                        type=str,
+                        help='The redpanda data dir',
+                        required=True)
+    parser.add_argument('--cache',
+                        type=str,
+                        help='File to keep the checksums in between runs')
+    parser.add_argument('--workers',
+                        type=int,
+                        default=min(32, (os.cpu_count() or 1) * 2),
+                        help='Number of files hashed in parallel')
+    args = parser.parse_args()
+    assert os.path.isdir(args.data_dir), f"{args.data_dir} must exist"
+    cache = load_cache(args.cache) if args.cache else {}
+    output, cache = compute_checksums(args.data_dir, args.workers, cache)
+    if args.cache:
+        save_cache(args.cache, cache)
+    json.dump(output, sys.stdout, separators=(',', ':'))
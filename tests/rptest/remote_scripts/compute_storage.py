@@ -2,11 +2,29 @@
 A script that computes all the files (and optionally their sizes) in the data directory of redpanda.
 
 Useful in tests if you want to know what files exist on a node or if they are a specific size.
+
+With --serve, it keeps running and answers inventory requests, one JSON
+object per line on stdin, with one JSON object per line on stdout. Each
+request is {"sizes": bool, "cache_dir": path or null, "since": generation
+or null}, and the response holds the inventory of the data directory as
+{"generation": int, "full": bool, "entries": {path: size}} where paths are
+relative to the data directory ("ns", "ns/topic", "ns/topic/partition" and
+"ns/topic/partition/segment") and sizes are null for directories or when
+not requested. If `since` is the generation of the previous response,
+"entries" only holds the new or changed paths, "removed" the others, and
+"full" is false. With a cache_dir, "cache" is [du -s, files, index files].
 """
 
+import os
 from pathlib import Path
 import sys
 import json
+import time
+import traceback
+
+# Listings of directories modified within this many ns of being listed are
+# not reused: their mtime may not change on a later modification.
+RACY_MTIME_NS = 2 * 1000 * 1000 * 1000
 
 
 def safe_isdir(p: Path) -> bool:
@@ -61,6 +79,164 @@ def compute_size(data_dir: Path, sizes: bool):
     return output
 
 
+class Inventory:
+    """
+    Inventory of a data directory, scanned with os.scandir. The listing of
+    each directory is kept along with its inode and mtime, and reused while
+    these do not change.
+    """
+    def __init__(self, data_dir: str):
+        self.data_dir = data_dir
+        self.generation = 0
+        # path -> ((inode, mtime_ns), [(name, is_dir)])
+        self._listings = {}
+        # (sizes) -> (generation, entries)
+        self._last = {}
+
+    def _listdir(self, path: str):
+        try:
+            st = os.stat(path)
+        except (FileNotFoundError, NotADirectoryError):
+            return []
+        stamp = (st.st_ino, st.st_mtime_ns)
+        cached = self._listings.get(path)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+
+        try:
+            with os.scandir(path) as it:
+                listing = [(e.name, e.is_dir()) for e in it]
+        except (FileNotFoundError, NotADirectoryError):
+            self._listings.pop(path, None)
+            return []
+        if time.time_ns() - st.st_mtime_ns > RACY_MTIME_NS:
+            self._listings[path] = (stamp, listing)
+        else:
+            self._listings.pop(path, None)
+        return listing
+
+    def scan(self, sizes: bool) -> dict:
+        """Same contents as compute_size, as {relative path: size}"""
+        entries = {}
+        seen = set()
+
+        def listdir(path):
+            seen.add(path)
+            return self._listdir(path)
+
+        for ns, ns_is_dir in listdir(self.data_dir):
+            if not ns_is_dir or ns == "cloud_storage_cache":
+                continue
+            entries[ns] = None
+            ns_path = os.path.join(self.data_dir, ns)
+            for topic, is_dir in listdir(ns_path):
+                if not is_dir:
+                    continue
+                entries[f"{ns}/{topic}"] = None
+                topic_path = os.path.join(ns_path, topic)
+                for partition, is_dir in listdir(topic_path):
+                    if not is_dir:
+                        continue
+                    entries[f"{ns}/{topic}/{partition}"] = None
+                    partition_path = os.path.join(topic_path, partition)
+                    for segment, _ in listdir(partition_path):
+                        size = None
+                        if sizes:
+                            try:
+                                size = os.stat(
+                                    os.path.join(partition_path,
+                                                 segment)).st_size
+                            except FileNotFoundError:
+                                continue
+                        entries[f"{ns}/{topic}/{partition}/{segment}"] = size
+
+        # Forget directories that are gone
+        for path in self._listings.keys() - seen:
+            del self._listings[path]
+        return entries
+
+    def request(self, sizes: bool, since) -> dict:
+        entries = self.scan(sizes)
+        self.generation += 1
+        last = self._last.get(sizes)
+        self._last[sizes] = (self.generation, entries)
+
+        if last is None or last[0] != since:
+            return {
+                "generation": self.generation,
+                "full": True,
+                "entries": entries
+            }
+        previous = last[1]
+        return {
+            "generation": self.generation,
+            "full": False,
+            "entries": {
+                k: v
+                for k, v in entries.items()
+                if k not in previous or previous[k] != v
+            },
+            "removed": [k for k in previous if k not in entries]
+        }
+
+
+def cache_stats(cache_dir: str):
+    """[du -s, number of files, number of .index files] of cache_dir"""
+    blocks = 0
+    files = 0
+    indices = 0
+    seen_inodes = set()
+
+    def account(st):
+        nonlocal blocks
+        if (st.st_dev, st.st_ino) not in seen_inodes:
+            seen_inodes.add((st.st_dev, st.st_ino))
+            blocks += st.st_blocks
+
+    try:
+        account(os.lstat(cache_dir))
+    except FileNotFoundError:
+        return None
+
+    pending = [cache_dir]
+    while pending:
+        try:
+            it = os.scandir(pending.pop())
+        except (FileNotFoundError, NotADirectoryError):
+            continue
+        with it:
+            for e in it:
+                try:
+                    account(e.stat(follow_symlinks=False))
+                    if e.is_dir(follow_symlinks=False):
+                        pending.append(e.path)
+                    elif e.is_file(follow_symlinks=False):
+                        files += 1
+                        if e.name.endswith(".index"):
+                            indices += 1
+                except FileNotFoundError:
+                    continue
+
+    # du reports 1KiB blocks, rounded up
+    return [(blocks * 512 + 1023) // 1024, files, indices]
+
+
+def serve(data_dir: str):
+    inventory = Inventory(data_dir)
+    for line in sys.stdin:
+        try:
+            req = json.loads(line)
+            if not os.path.isdir(data_dir):
+                raise RuntimeError(f"{data_dir} must exist")
+            response = inventory.request(req["sizes"], req.get("since"))
+            if req.get("cache_dir"):
+                response["cache"] = cache_stats(req["cache_dir"])
+        except Exception:
+            response = {"error": traceback.format_exc()}
+        sys.stdout.write(json.dumps(response) + "\n")
+        sys.stdout.flush()
+
+
 if __name__ == "__main__":
     import argparse
     parser = argparse.ArgumentParser(description='Compute')
@@ -71,7 +247,13 @@ if __name__ == "__main__":
     parser.add_argument('--sizes',
                         action="store_true",
                         help='Also compute sizes of files')
+    parser.add_argument('--serve',
+                        action="store_true",
+                        help='Answer inventory requests read from stdin')
     args = parser.parse_args()
+    if args.serve:
+        serve(args.data_dir)
+        sys.exit(0)
     data_dir = Path(args.data_dir)
     assert data_dir.exists(), f"{data_dir} must exist"
     output = compute_size(data_dir, args.sizes)
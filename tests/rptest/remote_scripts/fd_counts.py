@@ -0,0 +1,126 @@
+"""
+A script that counts the open file descriptors of a process by kind, from
+/proc, along with a few resource figures from /proc/<pid>/status.
+
+Cheaper than counting the lines of `lsof` for processes with very many
+open files: nothing but the counts leaves the node, and no file is
+stat'ed.
+
+Prints one JSON object: {"pid": int or null, "fds": {kind: count},
+"status": {field: int}, "fd_limit": int or null}. The process is given by
+--pid, or found by the name of its executable with --name; "pid" is null
+if it is not running.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+# Fields of /proc/<pid>/status reported, and their names in the output.
+# Memory figures are in kB.
+STATUS_FIELDS = {
+    "Threads": "threads",
+    "FDSize": "fd_table_size",
+    "VmRSS": "rss_kb",
+    "VmSize": "vsize_kb",
+}
+
+
+def find_pid(name: str):
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/cmdline", "rb") as f:
+                argv = f.read().split(b"\0")
+        except (FileNotFoundError, ProcessLookupError, PermissionError):
+            continue
+        # Skip e.g. `redpanda --version` run to look up the version
+        executable = os.path.basename(argv[0]).decode(errors="replace")
+        if executable == name and b"--version" not in argv:
+            return int(entry)
+    return None
+
+
+def classify(target: str, data_dir: str) -> str:
+    if target.startswith("socket:"):
+        return "sockets"
+    if target.startswith("pipe:"):
+        return "pipes"
+    if target.startswith("anon_inode:"):
+        return "anon_inodes"
+    if data_dir and target.startswith(data_dir):
+        if target.endswith(".log"):
+            return "segments"
+        if target.endswith("_index"):
+            # base_index, compaction_index
+            return "indices"
+        return "data_files"
+    return "other_files"
+
+
+def count_fds(pid: int, data_dir: str) -> dict:
+    counts = {}
+    fd_dir = f"/proc/{pid}/fd"
+    for fd in os.listdir(fd_dir):
+        try:
+            target = os.readlink(os.path.join(fd_dir, fd))
+        except FileNotFoundError:
+            # Closed since listed
+            continue
+        kind = classify(target, data_dir)
+        counts[kind] = counts.get(kind, 0) + 1
+    return counts
+
+
+def read_status(pid: int) -> dict:
+    status = {}
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            if key in STATUS_FIELDS:
+                status[STATUS_FIELDS[key]] = int(value.split()[0])
+    return status
+
+
+def read_fd_limit(pid: int):
+    with open(f"/proc/{pid}/limits") as f:
+        for line in f:
+            if line.startswith("Max open files"):
+                soft = line.split()[3]
+                return None if soft == "unlimited" else int(soft)
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pid", type=int)
+    parser.add_argument("--name", default="redpanda")
+    parser.add_argument("--data-dir", default="")
+    options = parser.parse_args()
+
+    data_dir = options.data_dir
+    if data_dir:
+        # Links in /proc/<pid>/fd are to resolved paths
+        data_dir = os.path.join(os.path.realpath(data_dir), "")
+
+    pid = options.pid if options.pid is not None else find_pid(options.name)
+    result = {"pid": None, "fds": {}, "status": {}, "fd_limit": None}
+    if pid is not None:
+        try:
+            result = {
+                "pid": pid,
+                "fds": count_fds(pid, data_dir),
+                "status": read_status(pid),
+                "fd_limit": read_fd_limit(pid),
+            }
+        except (FileNotFoundError, ProcessLookupError):
+            # Exited while we looked
+            pass
+    json.dump(result, sys.stdout)
+    sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -13,10 +13,13 @@ from collections import Counter
 
 from ducktape.mark import matrix, ok_to_fail
 from ducktape.utils.util import wait_until, TimeoutError
+from kafka.errors import KafkaError
 import numpy
 
 from rptest.services.cluster import cluster
-from rptest.clients.rpk import RpkTool, RpkException
+from rptest.clients.kafka_metadata import KafkaMetadataClient
+from rptest.clients.rpk import RpkTool
+from rptest.services.fd_sampler import FdSampler
 from rptest.tests.prealloc_nodes import PreallocNodesTest
 from rptest.utils.si_utils import nodes_report_cloud_segments
 from rptest.services.rpk_consumer import RpkConsumer
@@ -320,19 +323,27 @@ class ManyPartitionsTest(PreallocNodesTest):
                                      }),
             **kwargs)
         self.rpk = RpkTool(self.redpanda)
+        self.fd_sampler = FdSampler(self.redpanda)
+
+    def _all_elections_done(self, client: KafkaMetadataClient,
+                            topic_names: list[str], p_per_topic: int):
+        """
+        Whether all partitions of topic_names have a leader, from a single
+        metadata request. Like the leadership checks below, it is polled
+        with one client kept open for the whole wait.
+        """
+        try:
+            described = client.describe_topics(topic_names)
+        except KafkaError as e:
+            # One retry.  This is a case where a request after a full
+            # cluster restart can time out, but succeed promptly as soon
+            # as you retry.
+            self.logger.error(f"Retrying describe_topics for {e}")
+            described = client.describe_topics(topic_names)
 
-    def _all_elections_done(self, topic_names: list[str], p_per_topic: int):
         any_incomplete = False
         for tn in topic_names:
-            try:
-                partitions = list(self.rpk.describe_topic(tn, tolerant=True))
-            except RpkException as e:
-                # One retry.  This is a case where running rpk after a full
-                # cluster restart can time out after 30 seconds, but succeed
-                # promptly as soon as you retry.
-                self.logger.error(f"Retrying describe_topic for {e}")
-                partitions = list(self.rpk.describe_topic(tn, tolerant=True))
-
+            partitions = described.get(tn, [])
             if len(partitions) < p_per_topic:
                 self.logger.info(f"describe omits partitions for topic {tn}")
                 any_incomplete = True
@@ -347,17 +358,19 @@ class ManyPartitionsTest(PreallocNodesTest):
 
         return not any_incomplete
 
-    def _node_leadership_evacuated(self, topic_names: list[str],
-                                   p_per_topic: int, node_id: int):
+    def _node_leadership_evacuated(self, client: KafkaMetadataClient,
+                                   topic_names: list[str], p_per_topic: int,
+                                   node_id: int):
+        try:
+            described = client.describe_topics(topic_names)
+        except KafkaError as e:
+            # same as in _node_leadership_balanced
+            self.logger.warn(f"Kafka error, assuming retryable: {e}")
+            return False
+
         any_incomplete = False
         for tn in topic_names:
-            try:
-                partitions = list(self.rpk.describe_topic(tn, tolerant=True))
-            except RpkException as e:
-                # same as in _node_leadership_balanced
-                self.logger.warn(f"RPK error, assuming retryable: {e}")
-                return False
-
+            partitions = described.get(tn, [])
             if len(partitions) < p_per_topic:
                 self.logger.info(f"describe omits partitions for topic {tn}")
                 any_incomplete = True
@@ -372,20 +385,21 @@ class ManyPartitionsTest(PreallocNodesTest):
 
         return not any_incomplete
 
-    def _node_leadership_balanced(self, topic_names: list[str],
-                                  p_per_topic: int):
+    def _node_leadership_balanced(self, client: KafkaMetadataClient,
+                                  topic_names: list[str], p_per_topic: int):
+        try:
+            described = client.describe_topics(topic_names)
+        except KafkaError as e:
+            # We can get e.g. timeouts if describing many big topics on a
+            # heavily loaded cluster: treat these as retryable and let our
+            # caller call us again.
+            self.logger.warn(f"Kafka error, assuming retryable: {e}")
+            return False
+
         node_leader_counts = Counter()
         any_incomplete = False
         for tn in topic_names:
-            try:
-                partitions = list(self.rpk.describe_topic(tn, tolerant=True))
-            except RpkException as e:
-                # We can get e.g. timeouts from rpk if it is trying to describe
-                # a big topic on a heavily loaded cluster: treat these as retryable
-                # and let our caller call us again.
-                self.logger.warn(f"RPK error, assuming retryable: {e}")
-                return False
-
+            partitions = described.get(tn, [])
             if len(partitions) < p_per_topic:
                 self.logger.info(f"describe omits partitions for topic {tn}")
                 any_incomplete = True
@@ -464,16 +478,6 @@ class ManyPartitionsTest(PreallocNodesTest):
         # ResourceSettings based on its parameters.
         pass
 
-    def _get_fd_counts(self):
-        with concurrent.futures.ThreadPoolExecutor(
-                max_workers=len(self.redpanda.nodes)) as executor:
-
-            return list(
-                executor.map(
-                    lambda n: tuple(
-                        [n, sum(1 for _ in self.redpanda.lsof_node(n))]),
-                    self.redpanda.nodes))
-
     def _concurrent_restart(self):
         """
         Restart the whole cluster, all nodes in parallel.
@@ -511,9 +515,10 @@ class ManyPartitionsTest(PreallocNodesTest):
         self.redpanda.stop_node(node, timeout=STOP_TIMEOUT)
 
         # Wait for leaderships to stabilize on the surviving nodes
-        wait_until(
-            lambda: self._node_leadership_evacuated(topic_names, n_partitions,
-                                                    node_id), 30, 1)
+        with KafkaMetadataClient(self.redpanda) as client:
+            wait_until(
+                lambda: self._node_leadership_evacuated(
+                    client, topic_names, n_partitions, node_id), 30, 1)
 
         self.redpanda.start_node(node, timeout=self.EXPECT_START_TIME)
 
@@ -530,11 +535,12 @@ class ManyPartitionsTest(PreallocNodesTest):
         #  - Time for raft to achieve recovery, a prerequisite for
         #    leadership.
         t1 = time.time()
-        wait_until(
-            lambda: self._node_leadership_balanced(topic_names, n_partitions),
-            expect_leader_transfer_time,
-            10,
-            err_msg="Waiting for leadership balance after restart")
+        with KafkaMetadataClient(self.redpanda) as client:
+            wait_until(lambda: self._node_leadership_balanced(
+                client, topic_names, n_partitions),
+                       expect_leader_transfer_time,
+                       10,
+                       err_msg="Waiting for leadership balance after restart")
         self.logger.info(
             f"Leaderships balanced in {time.time() - t1:.2f} seconds")
 
@@ -549,31 +555,36 @@ class ManyPartitionsTest(PreallocNodesTest):
         # on each restart (https://github.com/redpanda-data/redpanda/issues/4057)
         restart_count = 2
 
-        for node_name, file_count in self._get_fd_counts():
-            self.logger.info(
-                f"Open files before restarts on {node_name}: {file_count}")
+        self.fd_sampler.log_counts("before restarts")
 
         self.logger.info("Entering restart stress test")
-        for i in range(1, restart_count + 1):
-            self.logger.info(f"Cluster restart {i}/{restart_count}...")
-            self._concurrent_restart()
+        with self.fd_sampler:
+            for i in range(1, restart_count + 1):
+                self.logger.info(f"Cluster restart {i}/{restart_count}...")
+                self._concurrent_restart()
 
-            self.logger.info(
-                f"Restart {i}/{restart_count} complete.  Waiting for elections..."
-            )
+                self.logger.info(
+                    f"Restart {i}/{restart_count} complete.  Waiting for elections..."
+                )
 
-            wait_until(
-                lambda: self._all_elections_done(topic_names, n_partitions),
-                timeout_sec=60,
-                backoff_sec=5,
-                err_msg="Waiting for elections to complete after restart")
-            self.logger.info(f"Post-restart elections done.")
+                with KafkaMetadataClient(self.redpanda) as client:
+                    wait_until(
+                        lambda: self._all_elections_done(
+                            client, topic_names, n_partitions),
+                        timeout_sec=60,
+                        backoff_sec=5,
+                        err_msg=
+                        "Waiting for elections to complete after restart")
+                self.logger.info(f"Post-restart elections done.")
 
-            inter_restart_check()
+                inter_restart_check()
 
-            for node_name, file_count in self._get_fd_counts():
+                self.fd_sampler.log_counts(f"after {i} restarts")
+
+        for kind in ("total", "segments", "indices"):
+            for node_name, peak in self.fd_sampler.peak(kind).items():
                 self.logger.info(
-                    f"Open files after {i} restarts on {node_name}: {file_count}"
+                    f"Peak open files ({kind}) during restarts on {node_name}: {peak}"
                 )
 
     def _tiered_storage_warmup(self, scale, topic_name):
@@ -995,16 +1006,15 @@ class ManyPartitionsTest(PreallocNodesTest):
                                   config=config)
 
         self.logger.info(f"Awaiting elections...")
-        wait_until(lambda: self._all_elections_done(topic_names, n_partitions),
-                   timeout_sec=60,
-                   backoff_sec=5,
-                   err_msg="Waiting for initial elections")
+        with KafkaMetadataClient(self.redpanda) as client:
+            wait_until(lambda: self._all_elections_done(
+                client, topic_names, n_partitions),
+                       timeout_sec=60,
+                       backoff_sec=5,
+                       err_msg="Waiting for initial elections")
         self.logger.info(f"Initial elections done.")
 
-        for node_name, file_count in self._get_fd_counts():
-            self.logger.info(
-                f"Open files after initial elections on {node_name}: {file_count}"
-            )
+        self.fd_sampler.log_counts("after initial elections")
 
         if scale.tiered_storage_enabled:
             self.logger.info("Entering tiered storage warmup")
@@ -6,21 +6,34 @@
 # As of the Change Date specified in that file, in accordance with
 # the Business Source License, use of this software will be governed
 # by the Apache License, Version 2.0
+import logging
 import random
 import json
 import requests
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from time import sleep
 from requests.adapters import HTTPAdapter
 from requests.exceptions import RequestException
 from requests.packages.urllib3.util.retry import Retry
 from ducktape.cluster.cluster import ClusterNode
-from typing import Optional, Callable, NamedTuple
+from typing import Optional, Callable, Hashable, Iterable, NamedTuple, TypeVar
+from ducktape.utils.util import wait_until
 from rptest.util import wait_until_result
 from requests.exceptions import HTTPError
 
 DEFAULT_TIMEOUT = 30
 
+# Most requests issued at once by the fan-out helpers of Admin
+FANOUT_MAX_WORKERS = 32
+
+# Longest part of a response body written to the debug log
+MAX_LOGGED_BODY_BYTES = 4096
+
+K = TypeVar('K', bound=Hashable)
+R = TypeVar('R')
+
 
 class AuthPreservingSession(requests.Session):
     """
@@ -81,10 +94,7 @@ class Admin:
                  auth=None,
                  retries_amount=5):
         self.redpanda = redpanda
-
-        self._session = AuthPreservingSession()
-        if auth is not None:
-            self._session.auth = auth
+        self._auth = auth
 
         self._default_node: ClusterNode = default_node
 
@@ -98,15 +108,32 @@ class Admin:
         if retry_codes is None:
             retry_codes = [503]
 
-        retries = Retry(status=retries_amount,
-                        connect=0,
-                        read=0,
-                        backoff_factor=1,
-                        status_forcelist=retry_codes,
-                        method_whitelist=None,
-                        remove_headers_on_redirect=[])
-
-        self._session.mount("http://", HTTPAdapter(max_retries=retries))
+        self._retries = Retry(status=retries_amount,
+                              connect=0,
+                              read=0,
+                              backoff_factor=1,
+                              status_forcelist=retry_codes,
+                              method_whitelist=None,
+                              remove_headers_on_redirect=[])
+
+        # One session, and so one connection pool, per node: sized so that
+        # concurrent requests from the fan-out helpers reuse connections.
+        self._sessions: dict[str, AuthPreservingSession] = {}
+        self._sessions_lock = threading.Lock()
+
+    def _session(self, host: str) -> AuthPreservingSession:
+        with self._sessions_lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = AuthPreservingSession()
+                if self._auth is not None:
+                    session.auth = self._auth
+                session.mount(
+                    "http://",
+                    HTTPAdapter(max_retries=self._retries,
+                                pool_maxsize=FANOUT_MAX_WORKERS))
+                self._sessions[host] = session
+            return session
 
     @staticmethod
     def ready(node):
@@ -129,19 +156,43 @@ class Admin:
     def _get_configuration(self, host, namespace, topic, partition):
         url = f"http://{host}:9644/v1/partitions/{namespace}/{topic}/{partition}"
         self.redpanda.logger.debug(f"Dispatching GET {url}")
-        r = self._session.request("GET", url)
+        r = self._session(host).request("GET", url)
+        self._log_response(r)
         if r.status_code != 200:
-            self.redpanda.logger.warn(f"Response {r.status_code}: {r.text}")
             return None
-        else:
-            try:
-                json = r.json()
-                self.redpanda.logger.debug(f"Response OK, JSON: {json}")
-                return json
-            except json.decoder.JSONDecodeError as e:
-                self.redpanda.logger.debug(
-                    f"Response OK, Malformed JSON: '{r.text}' ({e})")
-                return None
+        try:
+            return r.json()
+        except json.decoder.JSONDecodeError as e:
+            self.redpanda.logger.debug(
+                f"Response OK, Malformed JSON: '{r.text}' ({e})")
+            return None
+
+    def _get_topic_configuration(self, host, namespace,
+                                 topic) -> dict[int, dict]:
+        """
+        Configuration of all partitions of a topic as seen by host, keyed by
+        partition id. Empty if the host could not tell.
+        """
+        url = f"http://{host}:9644/v1/partitions/{namespace}/{topic}"
+        self.redpanda.logger.debug(f"Dispatching GET {url}")
+        r = self._session(host).request("GET", url)
+        if r.status_code != 200:
+            self.redpanda.logger.warn(f"Response {r.status_code}: {r.text}")
+            return {}
+        try:
+            partitions = r.json()
+        except json.decoder.JSONDecodeError as e:
+            self.redpanda.logger.debug(
+                f"Response OK, Malformed JSON: '{r.text}' ({e})")
+            return {}
+        if isinstance(partitions, dict):
+            # The controller topic is reported as a single partition
+            partitions = [partitions]
+        # Partitions without a leader may come without a leader_id
+        return {
+            p["partition_id"]: dict(p, leader_id=p.get("leader_id", -1))
+            for p in partitions
+        }
 
     def _get_stable_configuration(
             self,
@@ -160,57 +211,69 @@ class Admin:
 
         When the configuration isn't stable the method returns None
         """
-        last_leader = -1
-        replicas = None
-        status = None
-        for host in hosts:
+        def get_configuration(host):
             self.redpanda.logger.debug(
                 f"requesting \"{namespace}/{topic}/{partition}\" details from {host})"
             )
-            meta = self._get_configuration(host, namespace, topic, partition)
+            return self._get_configuration(host, namespace, topic, partition)
+
+        by_host = self.fan_out(get_configuration, hosts)
+        metas = [(host, by_host[host]) for host in hosts]
+        return self._stable_configuration(metas, replication,
+                                          self.redpanda.logger.debug)
+
+    def _stable_configuration(
+            self, metas: list[tuple[str, Optional[dict]]],
+            replication: Optional[int],
+            debug: Callable[[str], None]) -> Optional[PartitionDetails]:
+        """
+        Checks the configuration of a partition as seen by each host in
+        metas, returns None unless it is stable.
+        """
+        last_leader = -1
+        replicas = None
+        status = None
+        for host, meta in metas:
             if meta == None:
                 return None
             if "replicas" not in meta:
-                self.redpanda.logger.debug(f"replicas are missing")
+                debug(f"replicas are missing")
                 return None
             if "status" not in meta:
-                self.redpanda.logger.debug(f"status is missing")
+                debug(f"status is missing")
                 return None
             if status == None:
                 status = meta["status"]
-                self.redpanda.logger.debug(f"get status:{status}")
+                debug(f"get status:{status}")
             if status != meta["status"]:
-                self.redpanda.logger.debug(
+                debug(
                     f"get status:{meta['status']} while already observed:{status} before"
                 )
                 return None
             read_replicas = meta["replicas"]
             if replicas is None:
                 replicas = read_replicas
-                self.redpanda.logger.debug(
-                    f"get replicas:{read_replicas} from {host}")
+                debug(f"get replicas:{read_replicas} from {host}")
             elif not self._equal_assignments(replicas, read_replicas):
-                self.redpanda.logger.debug(
-                    f"get conflicting replicas:{read_replicas} from {host}")
+                debug(f"get conflicting replicas:{read_replicas} from {host}")
                 return None
             if replication != None:
                 if len(meta["replicas"]) != replication:
-                    self.redpanda.logger.debug(
+                    debug(
                         f"expected replication:{replication} got:{len(meta['replicas'])}"
                     )
                     return None
             if meta["leader_id"] < 0:
-                self.redpanda.logger.debug(f"doesn't have leader")
+                debug(f"doesn't have leader")
                 return None
             if last_leader < 0:
                 last_leader = int(meta["leader_id"])
-                self.redpanda.logger.debug(f"get leader:{last_leader}")
+                debug(f"get leader:{last_leader}")
             if last_leader not in [n["node_id"] for n in replicas]:
-                self.redpanda.logger.debug(
-                    f"leader:{last_leader} isn't in the replica set")
+                debug(f"leader:{last_leader} isn't in the replica set")
                 return None
             if last_leader != meta["leader_id"]:
-                self.redpanda.logger.debug(
+                debug(
                     f"got leader:{meta['leader_id']} but observed {last_leader} before"
                 )
                 return None
@@ -303,6 +366,81 @@ class Admin:
             f"can't get stable leader of {namespace}/{topic}/{partition} within {timeout_s} sec"
         )
 
+    def wait_stable_configurations(
+        self,
+        ntps: Iterable[tuple[str, str, int]],
+        *,
+        replication=None,
+        timeout_s=10,
+        backoff_s=1,
+        hosts: Optional[list[str]] = None
+    ) -> dict[tuple[str, str, int], PartitionDetails]:
+        """
+        Bulk version of wait_stable_configuration: waits until each of ntps,
+        (namespace, topic, partition) tuples, had a stable configuration and
+        returns them keyed by ntp.
+
+        Each round fetches the configuration of all partitions of a topic
+        from each host at once, and only the topics of partitions that were
+        not stable yet are polled again.
+
+        When the timeout is exhaust it throws TimeoutException
+        """
+        if hosts == None:
+            hosts = [n.account.hostname for n in self.redpanda.nodes]
+        hosts = list(hosts)
+
+        pending = set(ntps)
+        stable = {}
+
+        def no_log(msg):
+            pass
+
+        def poll():
+            topics = sorted({(ns, topic) for ns, topic, _ in pending})
+            try:
+                views = self.fan_out(
+                    lambda key: self._get_topic_configuration(*key),
+                    [(host, ns, topic) for host in hosts
+                     for ns, topic in topics])
+            except RequestException:
+                self.redpanda.logger.exception(
+                    "an error on getting stable configurations, retrying")
+                return False
+
+            for ntp in list(pending):
+                ns, topic, partition = ntp
+                info = self._stable_configuration(
+                    [(host, views[(host, ns, topic)].get(partition))
+                     for host in hosts], replication, no_log)
+                if info is not None:
+                    stable[ntp] = info
+                    pending.remove(ntp)
+
+            self.redpanda.logger.debug(
+                f"{len(stable)} partitions have a stable configuration, "
+                f"{len(pending)} do not: {sorted(pending)[:10]}")
+            return not pending
+
+        wait_until(
+            poll,
+            timeout_sec=timeout_s,
+            backoff_sec=backoff_s,
+            err_msg=lambda:
+            f"can't fetch stable replicas for {len(pending)} partitions "
+            f"within {timeout_s} sec, including {sorted(pending)[:10]}")
+        return stable
+
+    def await_stable_leaders(self, ntps: Iterable[tuple[str, str, int]],
+                             **kwargs) -> dict[tuple[str, str, int], int]:
+        """
+        Bulk version of await_stable_leader: waits until each of ntps has a
+        stable leader, returns the leader ids keyed by ntp. Takes the same
+        keyword arguments as wait_stable_configurations.
+        """
+        configurations = self.wait_stable_configurations(ntps, **kwargs)
+        return {ntp: info.leader for ntp, info in configurations.items()}
+
     def _request(self, verb, path, node=None, **kwargs):
         if node is None and self._default_node is not None:
             # We were constructed with an explicit default node: use that one
@@ -331,7 +469,8 @@ class Admin:
             url = self._url(node, path)
             self.redpanda.logger.debug(f"Dispatching {verb} {url}")
             try:
-                r = self._session.request(verb, url, **kwargs)
+                r = self._session(node.account.hostname).request(
+                    verb, url, **kwargs)
             except requests.ConnectionError:
                 if retry_connection and fallback_nodes:
                     node = random.choice(fallback_nodes)
@@ -345,23 +484,73 @@ class Admin:
             else:
                 break
 
-        # Log the response
+        self._log_response(r)
+        r.raise_for_status()
+        return r
+
+    def _log_response(self, r: requests.Response):
+        """
+        Log the response without decoding it: callers decode the body once,
+        and only its head is logged. Nothing is formatted for a successful
+        response unless debug logging is enabled.
+        """
+        logger = self.redpanda.logger
         if r.status_code != 200:
-            self.redpanda.logger.warn(f"Response {r.status_code}: {r.text}")
+            logger.warn(f"Response {r.status_code}: {r.text}")
+        elif not logger.isEnabledFor(logging.DEBUG):
+            return
+        elif 'application/json' in r.headers.get('Content-Type', '') and len(
+                r.content):
+            body = r.content
+            text = body[:MAX_LOGGED_BODY_BYTES].decode('utf-8',
+                                                       errors='replace')
+            if len(body) > MAX_LOGGED_BODY_BYTES:
+                text += f"... ({len(body)} bytes)"
+            logger.debug(f"Response OK, JSON: {text}")
         else:
-            if 'application/json' in r.headers.get('Content-Type') and len(
-                    r.text):
-                try:
-                    self.redpanda.logger.debug(
-                        f"Response OK, JSON: {r.json()}")
-                except json.decoder.JSONDecodeError as e:
-                    self.redpanda.logger.debug(
-                        f"Response OK, Malformed JSON: '{r.text}' ({e})")
-            else:
-                self.redpanda.logger.debug("Response OK")
+            logger.debug("Response OK")
 
-        r.raise_for_status()
-        return r
+    def fan_out(self,
+                fn: Callable[[K], R],
+                keys: Iterable[K],
+                max_workers: int = FANOUT_MAX_WORKERS) -> dict[K, R]:
+        """
+        Call fn on each of keys concurrently, e.g. one request per node or
+        per partition, and return the results keyed the same way.
+
+        Raises the error of the first failed call, in the order of keys,
+        once all calls completed.
+        """
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        with ThreadPoolExecutor(
+                max_workers=min(len(keys), max_workers)) as executor:
+            return dict(zip(keys, executor.map(fn, keys)))
+
+    def request_nodes(self,
+                      verb,
+                      path,
+                      nodes: Optional[list[ClusterNode]] = None,
+                      **kwargs) -> dict[ClusterNode, requests.Response]:
+        """
+        Issue the same request to all nodes at once (by default the started
+        ones), the responses are keyed by node.
+        """
+        if nodes is None:
+            nodes = self.redpanda.started_nodes()
+        return self.fan_out(
+            lambda node: self._request(verb, path, node=node, **kwargs), nodes)
+
+    def get_partitions_by_ntp(self,
+                              ntps: Iterable[tuple[str, str, int]],
+                              node=None) -> dict[tuple[str, str, int], dict]:
+        """
+        Details of many partitions at once, keyed by their (namespace,
+        topic, partition) tuple.
+        """
+        return self.fan_out(lambda ntp: self.get_partition(*ntp, node=node),
+                            ntps)
 
     def get_status_ready(self, node=None):
         return self._request("GET", "status/ready", node=node).json()
@@ -464,10 +653,7 @@ class Admin:
                 (f["name"], f) for f in features_resp["features"])
             return features_dict[feature_name]["state"] == "active"
 
-        for node in nodes:
-            if not node_supports_feature(node):
-                return False
-        return True
+        return all(self.fan_out(node_supports_feature, nodes).values())
 
     def unsafe_reset_cloud_metadata(self, topic, partition, manifest):
         return self._request(
@@ -507,11 +693,10 @@ class Admin:
         Set broker log level
         """
         name = name.replace("/", "%2F")
-        for node in self.redpanda.nodes:
-            path = f"config/log_level/{name}?level={level}"
-            if expires:
-                path = f"{path}&expires={expires}"
-            self._request('put', path, node=node)
+        path = f"config/log_level/{name}?level={level}"
+        if expires:
+            path = f"{path}&expires={expires}"
+        self.request_nodes('put', path, nodes=self.redpanda.nodes)
 
     def get_brokers(self, node=None):
         """
@@ -635,13 +820,17 @@ class Admin:
         cluster_config = self.get_cluster_config(include_defaults=True)
         tm_partition_amount = cluster_config[
             "transaction_coordinator_partitions"]
-        result = []
-        for partition in range(tm_partition_amount):
+
+        def get_partition_transactions(partition):
             self.await_stable_leader(topic="tx",
                                      namespace="kafka_internal",
                                      partition=partition)
             path = f"transactions?coordinator_partition_id={partition}"
-            partition_res = self._request('get', path, node=node).json()
+            return self._request('get', path, node=node).json()
+
+        result = []
+        for partition_res in self.fan_out(get_partition_transactions,
+                                          range(tm_partition_amount)).values():
             result.extend(partition_res)
         return result
 
@@ -0,0 +1,217 @@
+# Copyright 2023 Redpanda Data, Inc.
+#
+# Use of this software is governed by the Business Source License
+# included in the file licenses/BSL.md
+#
+# As of the Change Date specified in that file, in accordance with
+# the Business Source License, use of this software will be governed
+# by the Apache License, Version 2.0
+
+import concurrent.futures
+import json
+import shlex
+import threading
+import time
+from typing import NamedTuple, Optional
+
+from ducktape.cluster.cluster import ClusterNode
+from ducktape.cluster.remoteaccount import RemoteCommandError
+
+from rptest.util import inject_remote_script
+
+# Kinds of file descriptors counted by fd_counts.py
+FD_KINDS = ("segments", "indices", "data_files", "sockets", "pipes",
+            "anon_inodes", "other_files")
+
+
+class FdCounts(NamedTuple):
+    node: str
+    pid: int
+    timestamp: float
+    # Open file descriptors by kind, see FD_KINDS
+    fds: dict[str, int]
+    threads: int
+    rss_bytes: int
+    # Soft limit on open files, None if unlimited
+    fd_limit: Optional[int]
+
+    @property
+    def total(self) -> int:
+        return sum(self.fds.values())
+
+    def count(self, kind: str) -> int:
+        """Open files of kind, one of FD_KINDS or total"""
+        if kind == "total":
+            return self.total
+        assert kind in FD_KINDS, f"Unknown kind of file: {kind}"
+        return self.fds.get(kind, 0)
+
+    def summary(self) -> str:
+        kinds = ", ".join(f"{kind}={self.fds[kind]}" for kind in FD_KINDS
+                          if self.fds.get(kind))
+        return (f"{self.total} open files ({kinds}), {self.threads} threads, "
+                f"rss {self.rss_bytes / 2**20:.1f} MiB")
+
+
+class FdSampler:
+    """
+    Counts the open files of redpanda on nodes, by kind, reading /proc on
+    each node with one fd_counts.py run per sample, all nodes at once.
+
+    Replaces counting the lines of `lsof`, which streams every open file
+    back over ssh and takes minutes on nodes with very many partitions.
+
+    Samples can also be taken every interval_s seconds from a background
+    thread, and kept as a time series per node:
+
+        with FdSampler(redpanda, interval_s=10) as sampler:
+            ... restart nodes ...
+        sampler.peak("segments")
+    """
+    def __init__(self,
+                 redpanda,
+                 nodes=None,
+                 interval_s: float = 10,
+                 timeout_sec: int = 60):
+        self.redpanda = redpanda
+        self.logger = redpanda.logger
+        self.nodes = nodes
+        self.interval_s = interval_s
+        self.timeout_sec = timeout_sec
+
+        self._lock = threading.Lock()
+        # Path of the script on each node, by hostname
+        self._scripts: dict[str, str] = {}
+        self._history: dict[str, list[FdCounts]] = {}
+        self._stopping = threading.Event()
+        self._thread = None
+        self._executor = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def _script(self, node: ClusterNode, refresh: bool = False) -> str:
+        hostname = node.account.hostname
+        with self._lock:
+            path = self._scripts.get(hostname)
+        if path is None or refresh:
+            path = inject_remote_script(node, "fd_counts.py")
+            with self._lock:
+                self._scripts[hostname] = path
+        return path
+
+    def _run(self, node: ClusterNode, script: str) -> dict:
+        cmd = shlex.join([
+            "python3", script, "--name", "redpanda", "--data-dir",
+            self.redpanda.DATA_DIR
+        ])
+        return json.loads(
+            node.account.ssh_output(cmd, timeout_sec=self.timeout_sec))
+
+    def sample_node(self, node: ClusterNode) -> Optional[FdCounts]:
+        """Open files of redpanda on node, None if it is not running"""
+        try:
+            result = self._run(node, self._script(node))
+        except RemoteCommandError:
+            # The script may be gone from the node (e.g. its /tmp was
+            # cleaned): copy it again and retry once.
+            result = self._run(node, self._script(node, refresh=True))
+        if result["pid"] is None:
+            return None
+        status = result["status"]
+        return FdCounts(node=node.name,
+                        pid=result["pid"],
+                        timestamp=time.time(),
+                        fds=result["fds"],
+                        threads=status.get("threads", 0),
+                        rss_bytes=status.get("rss_kb", 0) * 1024,
+                        fd_limit=result["fd_limit"])
+
+    def _try_sample_node(self, node: ClusterNode) -> Optional[FdCounts]:
+        try:
+            return self.sample_node(node)
+        except Exception as e:
+            self.logger.debug(f"Open files sample of {node.name} failed: {e}")
+            return None
+
+    def sample(self, nodes=None) -> list[FdCounts]:
+        """
+        Open files of redpanda on all nodes, sampled concurrently. Nodes
+        where redpanda is not running are left out.
+        """
+        nodes = nodes if nodes is not None else (self.nodes
+                                                 or self.redpanda.nodes)
+        with concurrent.futures.ThreadPoolExecutor(
+                max_workers=max(1, len(nodes))) as executor:
+            samples = list(executor.map(self.sample_node, nodes))
+        return [s for s in samples if s is not None]
+
+    def log_counts(self, context: str, nodes=None) -> list[FdCounts]:
+        """Sample all nodes and log their open files"""
+        samples = self.sample(nodes)
+        for counts in samples:
+            self.logger.info(
+                f"Open files {context} on {counts.node}: {counts.summary()}")
+        return samples
+
+    def start(self):
+        assert self._thread is None, "Sampler already started"
+        nodes = self.nodes or self.redpanda.nodes
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max(1, len(nodes)))
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._thread_loop,
+                                        name="fd-sampler",
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop sampling in the background"""
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._thread.join()
+        self._thread = None
+        self._executor.shutdown()
+        self._executor = None
+
+    def _thread_loop(self):
+        next_sample = time.monotonic()
+        while not self._stopping.is_set():
+            # Nodes that cannot be sampled (e.g. being restarted) are
+            # missing from this round
+            nodes = self.nodes or self.redpanda.nodes
+            samples = [
+                s for s in self._executor.map(self._try_sample_node, nodes)
+                if s is not None
+            ]
+            with self._lock:
+                for counts in samples:
+                    self._history.setdefault(counts.node, []).append(counts)
+            next_sample += self.interval_s
+            self._stopping.wait(max(0, next_sample - time.monotonic()))
+
+    def history(self, node: Optional[str] = None) -> list[FdCounts]:
+        """Samples taken in the background, of node or of all nodes"""
+        with self._lock:
+            if node is not None:
+                return list(self._history.get(node, []))
+            return [c for series in self._history.values() for c in series]
+
+    def series(self, node: str, kind: str = "total") -> tuple[list, list]:
+        """Timestamps and counts of kind (see FdCounts.count) on node"""
+        samples = self.history(node)
+        timestamps = [c.timestamp for c in samples]
+        return timestamps, [c.count(kind) for c in samples]
+
+    def peak(self, kind: str = "total") -> dict[str, int]:
+        """Highest value of kind sampled in the background, by node"""
+        peaks = {}
+        for counts in self.history():
+            peaks[counts.node] = max(peaks.get(counts.node, 0),
+                                     counts.count(kind))
+        return peaks
@@ -23,6 +23,7 @@ from ducktape.utils.util import wait_until
 
 from rptest.services.redpanda import RedpandaService
 from rptest.clients.rpk import RpkTool
+from rptest.services.status_poller import StatusPoller
 
 
 class KgoRepeaterService(Service):
@@ -316,10 +317,11 @@ class KgoRepeaterService(Service):
         """
         produced = 0
         consumed = 0
-        for node in self.nodes:
-            r = requests.get(self._remote_url(node, "status"), timeout=10)
-            r.raise_for_status()
-            node_status = r.json()
+        # Called in tight loops: query all nodes at once, on kept alive
+        # connections.
+        node_statuses = StatusPoller.shared().get_json(
+            [self._remote_url(node, "status") for node in self.nodes])
+        for node_status in node_statuses:
             for worker_status in node_status:
                 produced += worker_status['produced']
                 consumed += worker_status['consumed']
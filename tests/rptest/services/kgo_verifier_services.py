@@ -8,9 +8,9 @@
 # by the Apache License, Version 2.0
 
 import os
+import json
 import time
 import signal
-import threading
 import requests
 from typing import Optional
 
@@ -18,6 +18,8 @@ from ducktape.services.service import Service
 from ducktape.utils.util import wait_until
 from ducktape.cluster.remoteaccount import RemoteCommandError
 
+from rptest.services.status_poller import Poll
+
 # Install location, specified by Dockerfile or AMI
 TESTS_DIR = os.path.join("/opt", "kgo-verifier")
 
@@ -80,7 +82,7 @@ class KgoVerifierService(Service):
             if not hasattr(node, "kgo_verifier_ports"):
                 node.kgo_verifier_ports = {}
 
-        self._status_thread = None
+        self._status_poll = None
 
     def __del__(self):
         self._release_port()
@@ -190,9 +192,9 @@ class KgoVerifierService(Service):
         node.account.ssh_output(f"ps -p {self._pid}", allow_fail=False)
 
     def stop_node(self, node, **kwargs):
-        if self._status_thread:
-            self._status_thread.stop()
-            self._status_thread = None
+        if self._status_poll:
+            self._status_poll.stop()
+            self._status_poll = None
 
         if self._pid is None:
             return
@@ -262,7 +264,7 @@ class KgoVerifierService(Service):
         _status member is populated with the final status before the remote process
         process ended.
         """
-        if not self._status_thread:
+        if not self._status_poll:
             return True
 
         self.logger.debug(
@@ -272,23 +274,23 @@ class KgoVerifierService(Service):
         # If this is a looping worker, tell it to end after the current loop
         self.logger.debug(f"wait_node {self.who_am_i()}: requesting last_pass")
         self._remote(node, "last_pass")
+        self._status_poll.poke()
 
         # Let the worker fall through to the end of its current iteration
         self.logger.debug(
             f"wait_node {self.who_am_i()}: waiting for worker to complete")
         self._redpanda.wait_until(
-            lambda: self._status.active is False or self._status_thread.
-            errored,
+            lambda: self._status.active is False or self._status_poll.errored,
             timeout_sec=timeout_sec,
             backoff_sec=5,
             err_msg=
             f"{self.who_am_i()} didn't complete in {timeout_sec} seconds")
-        self._status_thread.raise_on_error()
+        self._status_poll.raise_on_error()
 
         # Read final status
         self.logger.debug(f"wait_node {self.who_am_i()}: reading final status")
-        self._status_thread.shutdown()
-        self._status_thread = None
+        self._status_poll.shutdown()
+        self._status_poll = None
 
         # Permit the subprocess to exit, and wait for it to do so
         self.logger.debug(f"wait_node {self.who_am_i()}: requesting shutdown")
@@ -333,49 +335,20 @@ class KgoVerifierService(Service):
             return super(KgoVerifierService, self).free()
 
 
-class StatusThread(threading.Thread):
-    INTERVAL = 5
-
-    def __init__(self, parent: Service, node, status_cls, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.daemon = True
-
+class StatusPoll(Poll):
+    """
+    Polls the status of the workers of a KgoVerifierService, and keeps
+    their merged status in the _status of the service.
+    """
+    def __init__(self, parent: Service, node, status_cls):
+        super().__init__(parent._remote_url(node, "status"), parent.logger,
+                         f"{parent.who_am_i()} on {node.name}")
         self._parent = parent
-        self._node = node
         self._status_cls = status_cls
-        self._ex = None
-        self._ready = False
-
-        self._shutdown_requested = threading.Event()
-        self._stop_requested = threading.Event()
-
-    @property
-    def errored(self):
-        return self._ex is not None
-
-    @property
-    def who_am_i(self):
-        return self._parent.who_am_i()
-
-    @property
-    def logger(self):
-        return self._parent.logger
-
-    def raise_on_error(self):
-        if self._ex is not None:
-            raise self._ex
-
-    def run(self):
-        try:
-            self.poll_status()
-        except Exception as ex:
-            self._ex = ex
-            self.logger.exception(
-                f"Error reading status from {self.who_am_i} on {self._node.name}"
-            )
 
-    def _ingest_status(self, worker_statuses):
-        self.logger.debug(f"{self.who_am_i} status: {worker_statuses}")
+    def ingest(self, body: bytes):
+        worker_statuses = json.loads(body)
+        self.logger.debug(f"{self.name} status: {worker_statuses}")
         reduced = self._status_cls(**worker_statuses[0])
         for s in worker_statuses[1:]:
             reduced.merge(self._status_cls(**s))
@@ -384,60 +357,13 @@ class StatusThread(threading.Thread):
             progress = (worker_statuses[0]['sent'] /
                         float(self._parent._msg_count))
             self.logger.info(
-                f"Producer {self.who_am_i} progress: {progress*100:.2f}% {reduced}"
+                f"Producer {self.name} progress: {progress*100:.2f}% {reduced}"
             )
         else:
-            self.logger.info(f"Worker {self.who_am_i} status: {reduced}")
+            self.logger.info(f"Worker {self.name} status: {reduced}")
 
         self._parent._status = reduced
 
-    def poll_status(self):
-        while not self._stop_requested.is_set():
-            drop_out = self._shutdown_requested.is_set()
-
-            r = requests.get(self._parent._remote_url(self._node, "status"),
-                             timeout=5)
-            r.raise_for_status()
-            worker_statuses = r.json()
-            self._ingest_status(worker_statuses)
-
-            if drop_out:
-                # We were asked to clean shutdown and we have done our final
-                # status read
-                return
-            else:
-                self._stop_requested.wait(self.INTERVAL)
-
-    def join_with_timeout(self):
-        """
-        Join thread with a modest timeout, and raise an exception if
-        we do not succeed.  We expect to join promptly because all our
-        run() is doing is calling to the remote process status endpoint, and
-        that requests.get() has a timeout on it, so should not block.
-
-        This is important because otherwise a stuck join() would hang
-        the entire ducktape test run.
-        """
-        self.join(timeout=10)
-        if self.is_alive():
-            msg = f"Failed to join thread for {self.who_am_i}"
-            self.logger.error(msg)
-            raise RuntimeError(msg)
-
-    def stop(self):
-        """
-        Drop out of poll loop as soon as possible, and join.
-        """
-        self._stop_requested.set()
-        self.join_with_timeout()
-
-    def shutdown(self):
-        """
-        Read status one more time, then drop out of poll loop and join.
-        """
-        self._shutdown_requested.set()
-        self.join_with_timeout()
-
 
 class ValidatorStatus:
     """
@@ -546,20 +472,20 @@ class KgoVerifierProducer(KgoVerifierService):
         return self._status
 
     def wait_node(self, node, timeout_sec=None):
-        if not self._status_thread:
+        if not self._status_poll:
             return True
 
         self.logger.debug(f"{self.who_am_i()} wait: awaiting message count")
         try:
-            self._redpanda.wait_until(lambda: self._status_thread.errored or
-                                      self._status.acked >= self._msg_count,
+            self._redpanda.wait_until(lambda: self._status_poll.errored or self
+                                      ._status.acked >= self._msg_count,
                                       timeout_sec=timeout_sec,
-                                      backoff_sec=self._status_thread.INTERVAL)
+                                      backoff_sec=StatusPoll.INTERVAL)
         except:
             self.stop_node(node)
             raise
 
-        self._status_thread.raise_on_error()
+        self._status_poll.raise_on_error()
 
         if self._status.bad_offsets != 0:
             # This either means that the test sent multiple producers' traffic to
@@ -573,19 +499,19 @@ class KgoVerifierProducer(KgoVerifierService):
 
     def wait_for_acks(self, count, timeout_sec, backoff_sec):
         self._redpanda.wait_until(
-            lambda: self._status_thread.errored or self._status.acked >= count,
+            lambda: self._status_poll.errored or self._status.acked >= count,
             timeout_sec=timeout_sec,
             backoff_sec=backoff_sec)
-        self._status_thread.raise_on_error()
+        self._status_poll.raise_on_error()
 
     def wait_for_offset_map(self):
         # Producer worker aims to checkpoint every 5 seconds, so we should see this promptly.
-        self._redpanda.wait_until(lambda: self._status_thread.errored or all(
+        self._redpanda.wait_until(lambda: self._status_poll.errored or all(
             node.account.exists(f"valid_offsets_{self._topic}.json")
             for node in self.nodes),
                                   timeout_sec=15,
                                   backoff_sec=1)
-        self._status_thread.raise_on_error()
+        self._status_poll.raise_on_error()
 
     def is_complete(self):
         return self._status.acked >= self._msg_count
@@ -632,8 +558,8 @@ class KgoVerifierProducer(KgoVerifierService):
             cmd += f" --msgs-per-producer-id {self._msgs_per_producer_id}"
         self.spawn(cmd, node)
 
-        self._status_thread = StatusThread(self, node, ProduceStatus)
-        self._status_thread.start()
+        self._status_poll = StatusPoll(self, node, ProduceStatus)
+        self._status_poll.start()
 
 
 class KgoVerifierSeqConsumer(KgoVerifierService):
@@ -685,8 +611,8 @@ class KgoVerifierSeqConsumer(KgoVerifierService):
             cmd += f" --consume-throughput-mb {self._max_throughput_mb}"
         self.spawn(cmd, node)
 
-        self._status_thread = StatusThread(self, node, ConsumerStatus)
-        self._status_thread.start()
+        self._status_poll = StatusPoll(self, node, ConsumerStatus)
+        self._status_poll.start()
 
     def wait_node(self, node, timeout_sec=None):
         if self._producer:
@@ -757,8 +683,8 @@ class KgoVerifierRandomConsumer(KgoVerifierService):
 
         self.spawn(cmd, node)
 
-        self._status_thread = StatusThread(self, node, ConsumerStatus)
-        self._status_thread.start()
+        self._status_poll = StatusPoll(self, node, ConsumerStatus)
+        self._status_poll.start()
 
 
 class KgoVerifierConsumerGroupConsumer(KgoVerifierService):
@@ -809,8 +735,8 @@ class KgoVerifierConsumerGroupConsumer(KgoVerifierService):
             cmd += f" --consume-throughput-mb {self._max_throughput_mb}"
         self.spawn(cmd, node)
 
-        self._status_thread = StatusThread(self, node, ConsumerStatus)
-        self._status_thread.start()
+        self._status_poll = StatusPoll(self, node, ConsumerStatus)
+        self._status_poll.start()
 
 
 class ProduceStatus:
@@ -0,0 +1,203 @@
+import collections
+import concurrent.futures
+import shlex
+import threading
+from typing import Iterable, Optional, Union
+
+from ducktape.cluster.cluster import ClusterNode
+
+# A query is a grep pattern, or a tuple of patterns matched as alternatives
+# (like passing several `-e` to grep).
+Query = Union[str, tuple[str, ...]]
+
+# A trailing partial line (one still being written) is held back until it
+# is complete. Its start is looked for in this many bytes at the end of the
+# log; a longer one takes reading the whole log.
+MAX_PARTIAL_LINE = 64 * 1024
+
+# Prints the inode of the log and the size of its complete lines
+STAT_SCRIPT = (
+    "f={path}; "
+    "if [ -f $f ]; then "
+    "set -- $(stat -c '%i %s' $f); end=$2; "
+    "if [ $end -gt 0 ] && [ \"$(tail -c +$end $f | head -c 1 | od -An -tx1 | tr -d ' ')\" != 0a ]; then "
+    "lo=$(( end > {max_partial} ? end - {max_partial} : 0 )); "
+    "if [ $lo -eq 0 ] || [ $(tail -c +$((lo + 1)) $f | head -c $((end - lo)) | wc -l) -gt 0 ]; then "
+    "end=$(( end - $(tail -c +$((lo + 1)) $f | head -c $((end - lo)) | tail -n 1 | wc -c) )); "
+    "else "
+    "end=$(head -c $end $f | head -n $(head -c $end $f | wc -l) | wc -c); "
+    "fi; "
+    "fi; "
+    "echo $1 $end; "
+    "else echo 0 0; fi")
+
+
+def _query_key(query: Query) -> tuple[str, ...]:
+    return (query, ) if isinstance(query, str) else tuple(query)
+
+
+def _grep_args(patterns: Iterable[str]) -> str:
+    return " ".join(f"-e {shlex.quote(p)}" for p in patterns)
+
+
+class _QueryState:
+    def __init__(self, keep_lines: bool):
+        # Scanned up to this byte of the log
+        self.offset = 0
+        self.count = 0
+        # Matched lines, only kept for queries whose lines were asked for
+        self.lines = [] if keep_lines else None
+
+
+class _NodeLogState:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.inode = None
+        self.queries: dict[tuple[str, ...], _QueryState] = {}
+
+    def reset(self, inode):
+        self.inode = inode
+        self.queries = {}
+
+
+class LogScanner:
+    """
+    Incremental grep of a log file across nodes. All queries of a scan are
+    evaluated with a single read of the log per node, nodes are scanned in
+    parallel, and the byte offset reached by each query is remembered so
+    that later scans only read what was appended since.
+
+    A log that is replaced (e.g. by trim_logs' sed -i) or truncated is
+    scanned again from the start.
+    """
+    def __init__(self, logger, path: str, timeout_sec: int = 60):
+        self.logger = logger
+        self.path = path
+        self.timeout_sec = timeout_sec
+        self._lock = threading.Lock()
+        self._nodes: dict[str, _NodeLogState] = {}
+
+    def _state(self, node: ClusterNode) -> _NodeLogState:
+        with self._lock:
+            return self._nodes.setdefault(node.account.hostname,
+                                          _NodeLogState())
+
+    def forget(self, node: Optional[ClusterNode] = None):
+        """Drop the scan state of node, or of all nodes"""
+        with self._lock:
+            if node is None:
+                self._nodes.clear()
+            else:
+                self._nodes.pop(node.account.hostname, None)
+
+    def _stat(self, node: ClusterNode) -> tuple[int, int]:
+        out = node.account.ssh_output(STAT_SCRIPT.format(
+            path=self.path, max_partial=MAX_PARTIAL_LINE),
+                                      combine_stderr=False,
+                                      timeout_sec=self.timeout_sec).decode()
+        inode, size = out.split()
+        return int(inode), int(size)
+
+    def _scan_range(self, node: ClusterNode, queries: list[tuple[str, ...]],
+                    start: int, end: int) -> list[list[str]]:
+        """
+        Lines in [start, end) of the log matching each of queries. The log
+        range is read once, each query is then matched against the (small)
+        set of lines that matched any of them.
+        """
+        if start >= end:
+            return [[] for _ in queries]
+
+        all_patterns = list(dict.fromkeys(p for q in queries for p in q))
+        script = [
+            "tmp=$(mktemp)",
+            f"tail -c +{start + 1} {self.path} | head -c {end - start}"
+            f" | grep -a {_grep_args(all_patterns)} > $tmp",
+        ]
+        for i, q in enumerate(queries):
+            script.append(f"grep -a {_grep_args(q)} $tmp | sed 's/^/{i}:/'")
+        script.append("rm -f $tmp")
+
+        matches = [[] for _ in queries]
+        for line in node.account.ssh_capture("; ".join(script),
+                                             combine_stderr=False,
+                                             timeout_sec=self.timeout_sec):
+            i, _, line = line.partition(":")
+            matches[int(i)].append(line.rstrip("\n"))
+        return matches
+
+    def _scan_node(self, node: ClusterNode, queries: list[tuple[str, ...]],
+                   keep_lines: bool) -> dict[tuple[str, ...], _QueryState]:
+        state = self._state(node)
+        with state.lock:
+            inode, size = self._stat(node)
+            scanned = [s.offset for s in state.queries.values()]
+            if inode != state.inode or any(size < s for s in scanned):
+                state.reset(inode)
+
+            # Queries not seen before start from the beginning of the log,
+            # the others from where they stopped: usually a single group.
+            # So do queries only counted so far whose lines are now needed.
+            groups = collections.defaultdict(list)
+            for q in queries:
+                q_state = state.queries.get(q)
+                if q_state is None or (keep_lines and q_state.lines is None):
+                    q_state = _QueryState(keep_lines)
+                    state.queries[q] = q_state
+                groups[q_state.offset].append(q)
+
+            for offset, group in groups.items():
+                for q, lines in zip(
+                        group, self._scan_range(node, group, offset, size)):
+                    for line in lines:
+                        self.logger.debug(
+                            f"Found {q} on node {node.name}: {line}")
+                    q_state = state.queries[q]
+                    q_state.offset = size
+                    q_state.count += len(lines)
+                    if q_state.lines is not None:
+                        q_state.lines += lines
+
+            return {q: state.queries[q] for q in queries}
+
+    def _scan_nodes(self, nodes: list[ClusterNode], queries: list[Query],
+                    keep_lines: bool) -> dict[ClusterNode, dict]:
+        keys = list(dict.fromkeys(_query_key(q) for q in queries))
+
+        def scan_node(node):
+            return self._scan_node(node, keys, keep_lines)
+
+        results = {}
+        if nodes:
+            with concurrent.futures.ThreadPoolExecutor(
+                    max_workers=len(nodes)) as executor:
+                for node, by_key in zip(nodes, executor.map(scan_node, nodes)):
+                    results[node] = {q: by_key[_query_key(q)] for q in queries}
+        return results
+
+    def scan(self, nodes: list[ClusterNode],
+             queries: Iterable[Query]) -> dict[ClusterNode, dict]:
+        """
+        Scan the log of each of nodes for all of queries.
+
+        :return: for each node, a dict from query (as given) to the list of
+                 lines of the whole log that match it
+        """
+        queries = list(queries)
+        return {
+            node: {q: list(s.lines)
+                   for q, s in by_query.items()}
+            for node, by_query in self._scan_nodes(nodes, queries,
+                                                   True).items()
+        }
+
+    def count(self, nodes: list[ClusterNode], query: Query) -> dict:
+        """
+        Number of lines matching query, per node. Only the count is kept
+        between scans, not the lines.
+        """
+        return {
+            node: by_query[query].count
+            for node, by_query in self._scan_nodes(nodes, [query],
+                                                   False).items()
+        }
@@ -8,8 +8,10 @@
 # by the Apache License, Version 2.0
 
 import re
+from typing import Optional
 
-from rptest.services.redpanda import MetricsEndpoint
+from rptest.services.metrics_parser import SampleFilter
+from rptest.services.redpanda import MetricsEndpoint, MetricsSnapshot
 
 
 class MetricCheckFailed(Exception):
@@ -22,6 +24,16 @@ class MetricCheckFailed(Exception):
         return f"MetricCheckFailed<{self.metric} old={self.old_value} new={self.new_value}>"
 
 
+def _metric_names(check_metrics) -> SampleFilter:
+    """Filter of the sample names selected by MetricCheck `metrics`"""
+    if isinstance(check_metrics, re.Pattern):
+        return lambda name: bool(check_metrics.match(name))
+    elif isinstance(check_metrics, str):
+        return lambda name: name == check_metrics
+    else:
+        return set(check_metrics).__contains__
+
+
 class MetricCheck(object):
     """
     A MetricCheck spans a region of code: instantiate at the start, then
@@ -35,16 +47,19 @@ class MetricCheck(object):
                  metrics,
                  labels=None,
                  reduce=None,
-                 metrics_endpoint: MetricsEndpoint = MetricsEndpoint.METRICS):
+                 metrics_endpoint: MetricsEndpoint = MetricsEndpoint.METRICS,
+                 snapshot: Optional[MetricsSnapshot] = None):
         """
         :param redpanda: a RedpandaService
         :param logger: a Logger
         :param node: a ducktape Node
-        :param metrics: a list of metric names, or a single compiled regex (use re.compile())
+        :param metrics: a metric name, a list of metric names, or a single compiled regex (use re.compile())
         :param labels: dict, to filter metrics as we capture and check.
         :param reduce: reduction function (e.g. sum) if multiple samples match metrics+labels
         :param metrics_endpoint: MetricsEndpoint enumeration instance specifies which
         Prometheus endpoint to query
+        :param snapshot: a snapshot of the metrics of node (from the same
+        endpoint) to capture the initial values from, instead of scraping it
         """
         self.redpanda = redpanda
         self.node = node
@@ -53,45 +68,38 @@ class MetricCheck(object):
 
         self._reduce = reduce
         self._metrics_endpoint = metrics_endpoint
-        self._initial_samples = self._capture(metrics)
+        self._initial_samples = self._capture(metrics, snapshot)
+
+    def _capture(self, check_metrics, snapshot=None):
+        if snapshot is None:
+            snapshot = self.redpanda.metrics_snapshot(
+                [self.node], self._metrics_endpoint,
+                _metric_names(check_metrics))
 
-    def _capture(self, check_metrics):
-        metrics = self.redpanda.metrics(self.node, self._metrics_endpoint)
+        if isinstance(check_metrics, re.Pattern):
+            names = [n for n in snapshot.names() if check_metrics.match(n)]
+        elif isinstance(check_metrics, str):
+            names = [check_metrics]
+        else:
+            names = check_metrics
 
         samples = {}
-        for family in metrics:
-            for sample in family.samples:
-                if isinstance(check_metrics, re.Pattern):
-                    include = bool(check_metrics.match(sample.name))
-                else:
-                    include = sample.name in check_metrics
-
-                if not include:
-                    continue
-
-                if self.labels:
-                    label_mismatch = False
-                    for k, v in self.labels.items():
-                        if sample.labels.get(k, None) != v:
-                            label_mismatch = True
-                            continue
-
-                    if label_mismatch:
-                        continue
-
-                self.logger.info(
-                    f"  Read {sample.name}={sample.value} {sample.labels}")
-                if sample.name in samples:
-                    if self._reduce is None:
-                        raise RuntimeError(
-                            f"Labels {self.labels} on {sample.name} not specific enough"
-                        )
-                    else:
-                        samples[sample.name] = self._reduce(
-                            [samples[sample.name], sample.value])
-
-                else:
-                    samples[sample.name] = sample.value
+        for name in dict.fromkeys(names):
+            matched = snapshot.samples(name, self.labels, nodes=[self.node])
+            if not matched:
+                continue
+
+            for sample in matched:
+                self.logger.debug(
+                    f"  Read {sample.sample}={sample.value} {sample.labels}")
+            if len(matched) > 1 and self._reduce is None:
+                raise RuntimeError(
+                    f"Labels {self.labels} on {name} not specific enough")
+
+            value = matched[0].value
+            for sample in matched[1:]:
+                value = self._reduce([value, sample.value])
+            samples[name] = value
 
         for k, v in samples.items():
             self.logger.info(f"  Captured {k}={v}")
@@ -108,11 +116,11 @@ class MetricCheck(object):
 
         return samples
 
-    def expect(self, expectations):
+    def expect(self, expectations, snapshot=None):
         # Gather current values for all the metrics we are going to
         # apply expectations to (this may be a subset of the metrics
         # we originally gathered at construction time).
-        samples = self._capture([e[0] for e in expectations])
+        samples = self._capture([e[0] for e in expectations], snapshot)
 
         error = None
         for (metric, comparator) in expectations:
@@ -134,12 +142,12 @@ class MetricCheck(object):
         if error:
             raise error
 
-    def evaluate(self, expectations):
+    def evaluate(self, expectations, snapshot=None):
         """
         Similar to `expect`, but instead of asserting the expections are
         true, just evaluate whether they are and return a boolean.
         """
-        samples = self._capture([e[0] for e in expectations])
+        samples = self._capture([e[0] for e in expectations], snapshot)
         for (metric, comparator) in expectations:
             old_value = self._initial_samples.get(metric, None)
             if old_value is None:
@@ -151,14 +159,14 @@ class MetricCheck(object):
 
         return True
 
-    def evaluate_groups(self, expectations):
+    def evaluate_groups(self, expectations, snapshot=None):
         """
         Similar to `evaluate`, but allowing for mutliple metrics per comparator. Where
         each comparator will recieve two dicts. The first for a dict of old samples. And
         the second for a dict of new samples.
         """
         metrics = [metric for e in expectations for metric in e[0]]
-        samples = self._capture(metrics)
+        samples = self._capture(metrics, snapshot)
 
         for (metrics, comparator) in expectations:
             old_samples_dict = dict((k, self._initial_samples[k])
@@ -171,3 +179,74 @@ class MetricCheck(object):
                 return False
 
         return True
+
+
+class MultiNodeMetricCheck(object):
+    """
+    A MetricCheck on each of several nodes, capturing the metrics of all of
+    them with a single concurrent scrape of each node.
+
+    `expect` fails if the expectations do not hold on any of the nodes,
+    `evaluate` and `evaluate_groups` are true if they hold on all of them
+    (or on any of them, with all_nodes=False).
+    """
+    def __init__(self,
+                 logger,
+                 redpanda,
+                 nodes,
+                 metrics,
+                 labels=None,
+                 reduce=None,
+                 metrics_endpoint: MetricsEndpoint = MetricsEndpoint.METRICS):
+        """
+        See MetricCheck, with a list of ducktape Nodes for `nodes`.
+        """
+        self.redpanda = redpanda
+        self.nodes = nodes
+        self.logger = logger
+
+        self._metrics_endpoint = metrics_endpoint
+        snapshot = self._snapshot(metrics)
+        self.checks = [
+            MetricCheck(logger,
+                        redpanda,
+                        node,
+                        metrics,
+                        labels=labels,
+                        reduce=reduce,
+                        metrics_endpoint=metrics_endpoint,
+                        snapshot=snapshot) for node in nodes
+        ]
+
+    def _snapshot(self, check_metrics) -> MetricsSnapshot:
+        return self.redpanda.metrics_snapshot(self.nodes,
+                                              self._metrics_endpoint,
+                                              _metric_names(check_metrics))
+
+    def expect(self, expectations):
+        snapshot = self._snapshot([e[0] for e in expectations])
+        error = None
+        for check in self.checks:
+            try:
+                check.expect(expectations, snapshot)
+            except MetricCheckFailed as e:
+                # Already logged, raise the last one below
+                error = e
+        if error:
+            raise error
+
+    def evaluate(self, expectations, all_nodes=True):
+        snapshot = self._snapshot([e[0] for e in expectations])
+        results = [
+            check.evaluate(expectations, snapshot) for check in self.checks
+        ]
+        return all(results) if all_nodes else any(results)
+
+    def evaluate_groups(self, expectations, all_nodes=True):
+        snapshot = self._snapshot(
+            [metric for e in expectations for metric in e[0]])
+        results = [
+            check.evaluate_groups(expectations, snapshot)
+            for check in self.checks
+        ]
+        return all(results) if all_nodes else any(results)
@@ -0,0 +1,194 @@
+# Copyright 2023 Redpanda Data, Inc.
+#
+# Use of this software is governed by the Business Source License
+# included in the file licenses/BSL.md
+#
+# As of the Change Date specified in that file, in accordance with
+# the Business Source License, use of this software will be governed
+# by the Apache License, Version 2.0
+"""
+Streaming parser of the prometheus text format, for pages with very many
+series of which only a few are usually of interest.
+
+Samples are named and grouped into families like prometheus_client's
+text_string_to_metric_families does (e.g. the samples of a counter are
+named <counter>_total), but:
+
+- lines are filtered on their sample name before anything else is parsed,
+- the labels of lines with the same label text share one dict, of
+  interned keys and values, which must not be modified,
+- no object is built per family or per sample unless asked for.
+"""
+
+import codecs
+import re
+import sys
+from array import array
+from typing import Callable, Iterable, Iterator, NamedTuple, Optional
+
+# Selects metric samples by name
+SampleFilter = Callable[[str], bool]
+
+# Sample name suffixes of each type of family
+TYPE_SUFFIXES = {
+    'summary': ('_count', '_sum', ''),
+    'histogram': ('_count', '_sum', '_bucket'),
+}
+
+LABEL_RE = re.compile(r'\s*([^\s=,]+)\s*=\s*"((?:[^"\\]|\\.)*)"\s*,?')
+
+ESCAPE_SEQUENCES = {
+    '\\\\': '\\',
+    '\\n': '\n',
+    '\\"': '"',
+}
+ESCAPING_RE = re.compile(r'\\[\\n"]')
+
+CHUNK_SIZE = 256 * 1024
+
+
+def iter_lines(chunks: Iterable[bytes]) -> Iterator[str]:
+    """Lines of the utf-8 text made of chunks, e.g. of a streamed response"""
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    pending = ''
+    for chunk in chunks:
+        text = pending + decoder.decode(chunk)
+        lines = text.split('\n')
+        pending = lines.pop()
+        yield from lines
+    pending += decoder.decode(b'', final=True)
+    if pending:
+        yield pending
+
+
+def _unescape(value: str) -> str:
+    return ESCAPING_RE.sub(lambda m: ESCAPE_SEQUENCES[m.group(0)], value)
+
+
+def _parse_labels(text: str) -> dict:
+    intern = sys.intern
+    labels = {}
+    for m in LABEL_RE.finditer(text):
+        value = m.group(2)
+        if '\\' in value:
+            value = _unescape(value)
+        labels[intern(m.group(1))] = intern(value)
+    return labels
+
+
+def _family_names(name: str, typ: str) -> tuple[str, dict]:
+    """
+    Name of the family declared as name of type typ, and the names of its
+    samples, by name in the text.
+    """
+    if typ == 'counter':
+        if name.endswith('_total'):
+            return name[:-6], {name: name}
+        return name, {name: name + '_total'}
+    return name, {
+        name + suffix: name + suffix
+        for suffix in TYPE_SUFFIXES.get(typ, ('', ))
+    }
+
+
+def parse_samples(
+    lines: Iterable[str],
+    prefixes: Optional[tuple[str, ...]] = None,
+    sample_filter: Optional[SampleFilter] = None
+) -> Iterator[tuple[str, str, dict, float]]:
+    """
+    Yields (family, sample name, labels, value) for each sample of the
+    lines whose name starts with one of prefixes and that sample_filter
+    is true for, if given.
+    """
+    intern = sys.intern
+    label_sets = {}
+    no_labels = {}
+    # Name of the current family as declared, as named, and the names of
+    # its samples by name in the text
+    declared = ''
+    family = ''
+    names = {}
+    for line in lines:
+        if not line or line[0] == '#':
+            parts = line.split(None, 3)
+            if len(parts) < 3 or parts[1] not in ('HELP', 'TYPE'):
+                continue
+            if parts[1] == 'HELP':
+                if parts[2] != declared:
+                    declared = family = parts[2]
+                    names = {declared: declared}
+            elif len(parts) == 4:
+                declared = parts[2]
+                family, names = _family_names(declared, parts[3].strip())
+            continue
+
+        brace = line.find('{')
+        if brace >= 0:
+            raw_name = line[:brace].strip()
+        else:
+            line = line.strip()
+            if not line:
+                continue
+            raw_name = line.split(None, 1)[0]
+
+        name = names.get(raw_name)
+        if name is None:
+            # Not part of the current family: a family of its own, and
+            # the end of the current one.
+            declared, family, names = '', '', {}
+            sample_family = name = raw_name
+        else:
+            sample_family = family
+
+        if prefixes is not None and not name.startswith(prefixes):
+            continue
+        if sample_filter is not None and not sample_filter(name):
+            continue
+
+        if brace >= 0:
+            close = line.rfind('}')
+            label_text = line[brace + 1:close]
+            labels = label_sets.get(label_text)
+            if labels is None:
+                labels = _parse_labels(label_text)
+                label_sets[label_text] = labels
+            value = line[close + 1:].split(None, 1)[0]
+        else:
+            labels = no_labels
+            value = line.split(None, 2)[1]
+
+        yield intern(sample_family), intern(name), labels, float(value)
+
+
+class MetricColumns(NamedTuple):
+    """
+    Samples as columns: the family, name, labels and value of sample i are
+    families[i], names[i], label_sets[label_ids[i]] and values[i].
+    """
+    families: list[str]
+    names: list[str]
+    label_ids: array
+    values: array
+    label_sets: list[dict]
+
+
+def parse_columns(
+        lines: Iterable[str],
+        prefixes: Optional[tuple[str, ...]] = None,
+        sample_filter: Optional[SampleFilter] = None) -> MetricColumns:
+    """The samples parse_samples() yields, as columns"""
+    columns = MetricColumns([], [], array('I'), array('d'), [])
+    label_ids = {}
+    for family, name, labels, value in parse_samples(lines, prefixes,
+                                                     sample_filter):
+        label_id = label_ids.get(id(labels))
+        if label_id is None:
+            label_id = len(columns.label_sets)
+            label_ids[id(labels)] = label_id
+            columns.label_sets.append(labels)
+        columns.families.append(family)
+        columns.names.append(name)
+        columns.label_ids.append(label_id)
+        columns.values.append(value)
+    return columns
@@ -54,11 +54,14 @@ from rptest.clients.installpack import InstallPackClient
 from rptest.clients.rp_storage_tool import RpStorageTool
 from rptest.services import tls
 from rptest.services.admin import Admin
+from rptest.services.log_scanner import LogScanner
+from rptest.services.metrics_parser import CHUNK_SIZE, SampleFilter, iter_lines, parse_samples
 from rptest.services.redpanda_installer import RedpandaInstaller, VERSION_RE as RI_VERSION_RE, int_tuple as ri_int_tuple
 from rptest.services.redpanda_cloud import CloudCluster, CloudTierName, get_config_profile_name
 from rptest.services.rolling_restarter import RollingRestarter
-from rptest.services.storage import ClusterStorage, NodeStorage, NodeCacheStorage
+from rptest.services.storage import ClusterStorage, NodeStorage
 from rptest.services.storage_failure_injection import FailureInjectionConfig
+from rptest.services.storage_inventory import StorageInventory
 from rptest.services.utils import BadLogLines, NodeCrash
 from rptest.util import inject_remote_script, ssh_output_stderr, wait_until_result
 
@@ -195,6 +198,94 @@ class MetricSamples:
         return MetricSamples([s for s in filter(f, self.samples)])
 
 
+class MetricsSnapshot:
+    """
+    Samples of a set of nodes scraped and parsed once, indexed by sample
+    name and, on first lookup of a name by labels, by each of their
+    (label, value) pairs and by (node, labels).
+    """
+    def __init__(self, samples: list[MetricSample]):
+        self._by_name: dict[str,
+                            list[MetricSample]] = collections.defaultdict(list)
+        for s in samples:
+            self._by_name[s.sample].append(s)
+        self._by_labels: dict[str, dict] = {}
+        self._by_label_value: dict[str, dict] = {}
+
+    def _with_label_values(self, name: str,
+                           labels: Mapping[str, str]) -> list[MetricSample]:
+        """Samples named name having all of the given label values"""
+        index = self._by_label_value.get(name)
+        if index is None:
+            index = collections.defaultdict(list)
+            for s in self._by_name.get(name, []):
+                for item in s.labels.items():
+                    index[item].append(s)
+            self._by_label_value[name] = index
+        # Filter the shortest list of samples having one of the values
+        candidates = min((index.get(item, []) for item in labels.items()),
+                         key=len)
+        return [
+            s for s in candidates if all(
+                s.labels.get(k) == v for k, v in labels.items())
+        ]
+
+    def names(self) -> list[str]:
+        return list(self._by_name.keys())
+
+    def samples(self,
+                name: str,
+                labels: Optional[Mapping[str, str]] = None,
+                nodes=None) -> list[MetricSample]:
+        """
+        Samples named name, optionally restricted to the given nodes and to
+        those having all of the given label values.
+        """
+        if labels:
+            samples = self._with_label_values(name, labels)
+        else:
+            samples = self._by_name.get(name, [])
+        if nodes is not None:
+            samples = [s for s in samples if s.node in nodes]
+        return samples
+
+    def value(self, name: str, labels: Mapping[str, str],
+              node) -> Optional[float]:
+        """Value of the series with exactly these labels on node"""
+        index = self._by_labels.get(name)
+        if index is None:
+            index = {(s.node, frozenset(s.labels.items())): s.value
+                     for s in self._by_name.get(name, [])}
+            self._by_labels[name] = index
+        return index.get((node, frozenset(labels.items())))
+
+    def sum(self,
+            name: str,
+            labels: Optional[Mapping[str, str]] = None,
+            nodes=None) -> float:
+        return sum(s.value for s in self.samples(name, labels, nodes))
+
+    def match(self, sample_pattern: str) -> list[MetricSample]:
+        """
+        Samples whose name contains sample_pattern. Exactly one (family,
+        sample) may match, see RedpandaService.metrics_sample.
+        """
+        found_sample = None
+        sample_values = []
+        for name, samples in self._by_name.items():
+            if sample_pattern not in name:
+                continue
+            for s in samples:
+                if not found_sample:
+                    found_sample = (s.family, s.sample)
+                if found_sample != (s.family, s.sample):
+                    raise Exception(
+                        f"More than one metric matched '{sample_pattern}'. Found {found_sample} and {(s.family, s.sample)}"
+                    )
+                sample_values.append(s)
+        return sample_values
+
+
 class MetricsEndpoint(Enum):
     METRICS = 1
     PUBLIC_METRICS = 2
@@ -812,6 +903,9 @@ class RedpandaServiceBase(Service):
     # Where we put a compressed binary if saving it after failure
     EXECUTABLE_SAVE_PATH = "/tmp/redpanda.gz"
 
+    # Hashes of data directory files kept between calls to data_checksum
+    DATA_CHECKSUMS_CACHE = "/tmp/redpanda_data_checksums.json"
+
     FAILURE_INJECTION_CONFIG_PATH = "/etc/redpanda/failure_injection_config.json"
 
     # When configuring multiple listeners for testing, a secondary port to use
@@ -910,6 +1004,11 @@ class RedpandaServiceBase(Service):
 
         self._skip_if_no_redpanda_log = skip_if_no_redpanda_log
 
+        # Remembers how far each node's log has been searched, so repeated
+        # searches only read what was appended since.
+        self._log_scanner = LogScanner(
+            self.logger, RedpandaServiceBase.STDOUT_STDERR_CAPTURE)
+
         self._dedicated_nodes = self._context.globals.get(
             self.DEDICATED_NODE_KEY, False)
 
@@ -990,12 +1089,58 @@ class RedpandaServiceBase(Service):
         assert resp.status_code == 200
         return resp.text
 
+    def metrics_lines(
+            self,
+            node,
+            metrics_endpoint: MetricsEndpoint = MetricsEndpoint.METRICS):
+        """Lines of the 'metrics_endpoint' page of node, as they are received"""
+        assert node in self._started, f"Node {node.account.hostname} is not started"
+
+        metrics_endpoint = ("/metrics" if metrics_endpoint
+                            == MetricsEndpoint.METRICS else "/public_metrics")
+        url = f"http://{node.account.hostname}:9644{metrics_endpoint}"
+        with requests.get(url, timeout=10, stream=True) as resp:
+            assert resp.status_code == 200
+            yield from iter_lines(resp.iter_content(CHUNK_SIZE))
+
     def metrics(self,
                 node,
                 metrics_endpoint: MetricsEndpoint = MetricsEndpoint.METRICS):
         text = self.raw_metrics(node, metrics_endpoint)
         return text_string_to_metric_families(text)
 
+    def metrics_snapshot(
+            self,
+            nodes=None,
+            metrics_endpoint: MetricsEndpoint = MetricsEndpoint.METRICS,
+            sample_filter: Optional[SampleFilter] = None) -> MetricsSnapshot:
+        """
+        Scrape the 'metrics_endpoint' of all nodes concurrently and parse
+        each page once into a MetricsSnapshot.
+
+        :param sample_filter: if set, only the samples whose name it is true
+        for are parsed and kept, which is much cheaper than parsing all of
+        them when only a few are of interest.
+        """
+        if nodes is None:
+            nodes = self.nodes
+
+        def scrape(node):
+            return [
+                MetricSample(family, name, node, value, labels)
+                for family, name, labels, value in parse_samples(
+                    self.metrics_lines(node, metrics_endpoint),
+                    sample_filter=sample_filter)
+            ]
+
+        samples = []
+        if nodes:
+            with concurrent.futures.ThreadPoolExecutor(
+                    max_workers=len(nodes)) as executor:
+                for node_samples in executor.map(scrape, nodes):
+                    samples += node_samples
+        return MetricsSnapshot(samples)
+
     def metric_sum(self,
                    metric_name,
                    metrics_endpoint: MetricsEndpoint = MetricsEndpoint.METRICS,
@@ -1006,22 +1151,14 @@ class RedpandaServiceBase(Service):
         Pings the 'metrics_endpoint' of each node and returns the summed values
         of the given metric, optionally filtering by namespace and topic.
         """
-
-        if nodes is None:
-            nodes = self.nodes
-
-        count = 0
-        for n in nodes:
-            metrics = self.metrics(n, metrics_endpoint=metrics_endpoint)
-            for family in metrics:
-                for sample in family.samples:
-                    if ns and sample.labels["namespace"] != ns:
-                        continue
-                    if topic and sample.labels["topic"] != topic:
-                        continue
-                    if sample.name == metric_name:
-                        count += int(sample.value)
-        return count
+        snapshot = self.metrics_snapshot(
+            nodes, metrics_endpoint, sample_filter=lambda n: n == metric_name)
+        labels = {}
+        if ns:
+            labels["namespace"] = ns
+        if topic:
+            labels["topic"] = topic
+        return sum(int(s.value) for s in snapshot.samples(metric_name, labels))
 
     def healthy(self):
         """
@@ -1227,35 +1364,38 @@ class RedpandaServiceBase(Service):
 
         test_name = self._context.function_name
 
-        bad_lines = collections.defaultdict(list)
+        nodes = []
         for node in self.nodes:
-
             if self._skip_if_no_redpanda_log and not node.account.exists(
                     RedpandaServiceBase.STDOUT_STDERR_CAPTURE):
                 self.logger.info(
                     f"{RedpandaServiceBase.STDOUT_STDERR_CAPTURE} not found on {node.account.hostname}. Skipping log scan."
                 )
                 continue
+            nodes.append(node)
+
+        # List of regexes that will fail the test on if they appear in the log
+        match_terms = [
+            "Segmentation fault",
+            "[Aa]ssert",
+            "Exceptional future ignored",
+            "UndefinedBehaviorSanitizer",
+            "Aborting on shard",
+            "libc++abi: terminating due to uncaught exception",
+        ]
+        if self._raise_on_errors:
+            match_terms.append("^ERROR")
+        match_terms = tuple(match_terms)
+        leak_summary = "SUMMARY: AddressSanitizer:"
 
-            self.logger.info(
-                f"Scanning node {node.account.hostname} log for errors...")
-
-            # List of regexes that will fail the test on if they appear in the log
-            match_terms = [
-                "Segmentation fault",
-                "[Aa]ssert",
-                "Exceptional future ignored",
-                "UndefinedBehaviorSanitizer",
-                "Aborting on shard",
-                "libc++abi: terminating due to uncaught exception",
-            ]
-            if self._raise_on_errors:
-                match_terms.append("^ERROR")
-            match_expr = " ".join(f"-e \"{t}\"" for t in match_terms)
+        self.logger.info(
+            f"Scanning {', '.join(n.account.hostname for n in nodes)} logs for errors..."
+        )
+        scan = self._log_scanner.scan(nodes, [match_terms, leak_summary])
 
-            for line in node.account.ssh_capture(
-                    f"grep {match_expr} {RedpandaService.STDOUT_STDERR_CAPTURE} || true",
-                    timeout_sec=60):
+        bad_lines = collections.defaultdict(list)
+        for node in nodes:
+            for line in scan[node][match_terms]:
                 line = line.strip()
 
                 allowed = False
@@ -1270,9 +1410,7 @@ class RedpandaServiceBase(Service):
                     # Special case for LeakSanitizer errors, where tiny leaks
                     # are permitted, as they can occur during Seastar shutdown.
                     # See https://github.com/redpanda-data/redpanda/issues/3626
-                    for summary_line in node.account.ssh_capture(
-                            f"grep -e \"SUMMARY: AddressSanitizer:\" {RedpandaService.STDOUT_STDERR_CAPTURE} || true",
-                            timeout_sec=60):
+                    for summary_line in scan[node][leak_summary]:
                         m = re.match(
                             "SUMMARY: AddressSanitizer: (\d+) byte\(s\) leaked in (\d+) allocation\(s\).",
                             summary_line.strip())
@@ -1589,12 +1727,26 @@ class RedpandaServiceCloud(RedpandaServiceK8s):
     def all_up(self):
         return self._cloud_cluster.isAlive
 
+    def raw_metrics(
+            self,
+            node,
+            metrics_endpoint: MetricsEndpoint = MetricsEndpoint.PUBLIC_METRICS
+    ):
+        return self._cloud_cluster.get_public_metrics()
+
+    def metrics_lines(
+            self,
+            node,
+            metrics_endpoint: MetricsEndpoint = MetricsEndpoint.PUBLIC_METRICS
+    ):
+        return iter(self.raw_metrics(node, metrics_endpoint).splitlines())
+
     def metrics(
             self,
             node,
             metrics_endpoint: MetricsEndpoint = MetricsEndpoint.PUBLIC_METRICS
     ):
-        text = self._cloud_cluster.get_public_metrics()
+        text = self.raw_metrics(node, metrics_endpoint)
         return text_string_to_metric_families(text)
 
     def metric_sum(
@@ -1750,6 +1902,11 @@ class RedpandaService(RedpandaServiceBase):
 
         self._expect_max_controller_records = 1000
 
+        # Agents on each node that keep the inventory of the data directory,
+        # so repeated storage polls only ship what changed.
+        self._storage_inventory = StorageInventory(self.logger,
+                                                   RedpandaService.DATA_DIR)
+
     def set_seed_servers(self, node_list):
         assert len(node_list) > 0
         self._seed_servers = node_list
@@ -2983,6 +3140,10 @@ class RedpandaService(RedpandaServiceBase):
                    node,
                    preserve_logs=False,
                    preserve_current_install=False):
+        self._storage_inventory.forget(node)
+        # A new log may reuse the inode of the one removed below
+        self._log_scanner.forget(node)
+
         # These are allow_fail=True to allow for a race where kill_process finds
         # the PID, but then the process has died before it sends the SIGKILL.  This
         # should be safe against actual failures to of the process to stop, because
@@ -3008,6 +3169,7 @@ class RedpandaService(RedpandaServiceBase):
         if not preserve_logs and node.account.exists(
                 self.EXECUTABLE_SAVE_PATH):
             node.account.remove(self.EXECUTABLE_SAVE_PATH)
+        node.account.remove(self.DATA_CHECKSUMS_CACHE, allow_fail=True)
 
         if not preserve_current_install or not self._installer._started:
             # Reset the binaries to use the original binaries.
@@ -3338,46 +3500,10 @@ class RedpandaService(RedpandaServiceBase):
             f"Starting storage checks for {node.name} sizes={sizes}")
         store = NodeStorage(node.name, RedpandaService.DATA_DIR,
                             self.cache_dir)
-        script_path = inject_remote_script(node, "compute_storage.py")
-        cmd = [
-            "python3", script_path, f"--data-dir={RedpandaService.DATA_DIR}"
-        ]
-        if sizes:
-            cmd.append("--sizes")
-        output = node.account.ssh_output(shlex.join(cmd),
-                                         combine_stderr=False,
-                                         timeout_sec=10)
-        namespaces = json.loads(output)
-        for ns, topics in namespaces.items():
-            ns_path = os.path.join(store.data_dir, ns)
-            ns = store.add_namespace(ns, ns_path)
-            for topic, partitions in topics.items():
-                topic_path = os.path.join(ns_path, topic)
-                topic = ns.add_topic(topic, topic_path)
-                for part, segments in partitions.items():
-                    partition_path = os.path.join(topic_path, part)
-                    partition = topic.add_partition(part, node, partition_path)
-                    partition.add_files(list(segments.keys()))
-                    if not sizes:
-                        continue
-                    for segment, data in segments.items():
-                        partition.set_segment_size(segment, data["size"])
-
-        if scan_cache and self.si_settings is not None and node.account.exists(
-                store.cache_dir):
-            bytes = int(
-                node.account.ssh_output(
-                    f"du -s \"{store.cache_dir}\"",
-                    combine_stderr=False).strip().split()[0])
-            objects = int(
-                node.account.ssh_output(
-                    f"find \"{store.cache_dir}\" -type f | wc -l",
-                    combine_stderr=False).strip())
-            indices = int(
-                node.account.ssh_output(
-                    f"find \"{store.cache_dir}\" -type f -name \"*.index\" | wc -l",
-                    combine_stderr=False).strip())
-            store.set_cache_stats(NodeCacheStorage(bytes, objects, indices))
+        cache_dir = None
+        if scan_cache and self.si_settings is not None:
+            cache_dir = store.cache_dir
+        self._storage_inventory.node_storage(node, store, sizes, cache_dir)
 
         self.logger.debug(
             f"Finished storage checks for {node.name} sizes={sizes}")
@@ -3425,30 +3551,21 @@ class RedpandaService(RedpandaServiceBase):
     def data_checksum(self, node: ClusterNode) -> FileToChecksumSize:
         """Run command that computes MD5 hash of every file in redpanda data
         directory. The results of the command are turned into a map from path
-        to hash-size tuples."""
-        cmd = f"find {RedpandaService.DATA_DIR} -type f -exec md5sum -z '{{}}' \; -exec stat -c ' %s' '{{}}' \;"
-        lines = node.account.ssh_output(cmd, timeout_sec=120)
-        lines = lines.decode().split("\n")
-
-        # there is a race between `find` iterating over file names and passing
-        # those to an invocation of `md5sum` in which the file may be deleted.
-        # here we log these instances for debugging, but otherwise ignore them.
-        found = []
-        for line in lines:
-            if "No such file or directory" in line:
-                self.logger.debug(f"Skipping file that disappeared: {line}")
-                continue
-            found.append(line)
-        lines = found
-
-        # the `find` command will stick a newline at the end of the results
-        # which gets parsed as an empty line by `split` above
-        if lines[-1] == "":
-            lines.pop()
+        to hash-size tuples.
 
+        Hashes are kept on the node between calls and only files whose inode,
+        size or mtime changed since the previous call are hashed again."""
+        script_path = inject_remote_script(node, "compute_checksums.py")
+        cmd = [
+            "python3", script_path, f"--data-dir={RedpandaService.DATA_DIR}",
+            f"--cache={RedpandaService.DATA_CHECKSUMS_CACHE}"
+        ]
+        output = node.account.ssh_output(shlex.join(cmd),
+                                         combine_stderr=False,
+                                         timeout_sec=120)
         return {
-            tokens[1].rstrip("\x00"): (tokens[0], int(tokens[2]))
-            for tokens in map(lambda l: l.split(), lines)
+            path: (md5, size)
+            for path, (md5, size) in json.loads(output).items()
         }
 
     def data_stat(self, node: ClusterNode):
@@ -3531,32 +3648,12 @@ class RedpandaService(RedpandaServiceBase):
         ]
         return ",".join(schema_reg)
 
-    def _extract_samples(self, metrics, sample_pattern: str,
-                         node: ClusterNode) -> list[MetricSamples]:
-        found_sample = None
-        sample_values = []
-
-        for family in metrics:
-            for sample in family.samples:
-                if sample_pattern not in sample.name:
-                    continue
-                if not found_sample:
-                    found_sample = (family.name, sample.name)
-                if found_sample != (family.name, sample.name):
-                    raise Exception(
-                        f"More than one metric matched '{sample_pattern}'. Found {found_sample} and {(family.name, sample.name)}"
-                    )
-                sample_values.append(
-                    MetricSample(family.name, sample.name, node, sample.value,
-                                 sample.labels))
-
-        return sample_values
-
     def metrics_sample(
         self,
         sample_pattern,
         nodes=None,
         metrics_endpoint: MetricsEndpoint = MetricsEndpoint.METRICS,
+        snapshot: Optional[MetricsSnapshot] = None,
     ) -> Optional[MetricSamples]:
         """
         Query metrics for a single sample using fuzzy name matching. This
@@ -3578,16 +3675,17 @@ class RedpandaService(RedpandaServiceBase):
 
               family = vectorized_cluster_partition_under_replicated_replicas
               sample = vectorized_cluster_partition_under_replicated_replicas
-        """
-        if nodes is None:
-            nodes = self.nodes
 
-        sample_values = []
-        for node in nodes:
-            metrics = self.metrics(node, metrics_endpoint)
-            sample_values += self._extract_samples(metrics, sample_pattern,
-                                                   node)
+        A snapshot from metrics_snapshot() may be passed to query it instead
+        of scraping the nodes.
+        """
+        if snapshot is None:
+            snapshot = self.metrics_snapshot(
+                nodes,
+                metrics_endpoint,
+                sample_filter=lambda n: sample_pattern in n)
 
+        sample_values = snapshot.match(sample_pattern)
         if not sample_values:
             return None
         else:
@@ -3598,41 +3696,44 @@ class RedpandaService(RedpandaServiceBase):
         sample_patterns: list[str],
         nodes=None,
         metrics_endpoint: MetricsEndpoint = MetricsEndpoint.METRICS,
+        snapshot: Optional[MetricsSnapshot] = None,
     ) -> dict[str, MetricSamples]:
         """
         Query metrics for multiple sample names using fuzzy matching.
-        The same as metrics_sample, but works with multiple patterns.
+        The same as metrics_sample, but works with multiple patterns and
+        scrapes each node once for all of them.
         """
-        nodes = nodes or self.nodes
+        if snapshot is None:
+            snapshot = self.metrics_snapshot(
+                nodes,
+                metrics_endpoint,
+                sample_filter=lambda n: any(p in n for p in sample_patterns))
+
         sample_values_per_pattern = {
-            pattern: []
+            pattern: snapshot.match(pattern)
             for pattern in sample_patterns
         }
 
-        for node in nodes:
-            for pattern in sample_patterns:
-                metrics = self.metrics(node, metrics_endpoint)
-                sample_values_per_pattern[pattern] += self._extract_samples(
-                    metrics, pattern, node)
-
         return {
             pattern: MetricSamples(values)
             for pattern, values in sample_values_per_pattern.items() if values
         }
 
-    def shards(self):
+    def shards(self, snapshot: Optional[MetricsSnapshot] = None):
         """
         Fetch the max shard id for each node.
         """
+        if snapshot is None:
+            snapshot = self.metrics_snapshot(
+                self._started,
+                sample_filter=lambda n: n == "vectorized_reactor_utilization")
+
         shards_per_node = {}
         for node in self._started:
             num_shards = 0
-            metrics = self.metrics(node)
-            for family in metrics:
-                for sample in family.samples:
-                    if sample.name == "vectorized_reactor_utilization":
-                        num_shards = max(num_shards,
-                                         int(sample.labels["shard"]))
+            for sample in snapshot.samples("vectorized_reactor_utilization",
+                                           nodes=[node]):
+                num_shards = max(num_shards, int(sample.labels["shard"]))
             assert num_shards > 0
             shards_per_node[self.idx(node)] = num_shards
         return shards_per_node
@@ -3649,25 +3750,10 @@ class RedpandaService(RedpandaServiceBase):
         return False
 
     def count_log_node(self, node: ClusterNode, pattern: str):
-        accum = 0
-        for line in node.account.ssh_capture(
-                f"grep \"{pattern}\" {RedpandaService.STDOUT_STDERR_CAPTURE} || true",
-                timeout_sec=60):
-            # We got a match
-            self.logger.debug(f"Found {pattern} on node {node.name}: {line}")
-            accum += 1
-
-        return accum
+        return self._log_scanner.count([node], pattern)[node]
 
     def search_log_node(self, node: ClusterNode, pattern: str):
-        for line in node.account.ssh_capture(
-                f"grep \"{pattern}\" {RedpandaService.STDOUT_STDERR_CAPTURE} || true",
-                timeout_sec=60):
-            # We got a match
-            self.logger.debug(f"Found {pattern} on node {node.name}: {line}")
-            return True
-
-        return False
+        return self.count_log_node(node, pattern) > 0
 
     def search_log_any(self,
                        pattern: str,
@@ -3684,12 +3770,8 @@ class RedpandaService(RedpandaServiceBase):
         if nodes is None:
             nodes = self.nodes
 
-        for node in nodes:
-            if self.search_log_node(node, pattern):
-                return True
-
-        # Fall through, no matches
-        return False
+        counts = self._log_scanner.count(nodes, pattern)
+        return any(c > 0 for c in counts.values())
 
     def search_log_all(self,
                        pattern: str,
@@ -3704,13 +3786,10 @@ class RedpandaService(RedpandaServiceBase):
         if nodes is None:
             nodes = self.nodes
 
-        for node in nodes:
-            exit_status = node.account.ssh(
-                f"grep \"{pattern}\" {RedpandaService.STDOUT_STDERR_CAPTURE}",
-                allow_fail=True)
-
+        counts = self._log_scanner.count(nodes, pattern)
+        for node, c in counts.items():
             # Match not found
-            if exit_status != 0:
+            if c == 0:
                 self.logger.debug(
                     f"Did not find {pattern} on node {node.name}")
                 return False
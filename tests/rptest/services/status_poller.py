@@ -0,0 +1,244 @@
+# Copyright 2023 Redpanda Data, Inc.
+#
+# Use of this software is governed by the Business Source License
+# included in the file licenses/BSL.md
+#
+# As of the Change Date specified in that file, in accordance with
+# the Business Source License, use of this software will be governed
+# by the Apache License, Version 2.0
+
+import concurrent.futures
+import heapq
+import itertools
+import os
+import threading
+import time
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Number of status requests in flight at once, over all the polls
+POLL_WORKERS = 16
+
+# Hosts whose connections are kept alive in the pool
+POOLED_HOSTS = 64
+
+
+class Poll:
+    """
+    A remote status endpoint polled by a StatusPoller.
+
+    The endpoint is polled every INTERVAL seconds while its status changes.
+    While it does not, the interval doubles, up to MAX_INTERVAL. ingest()
+    is only called with bodies that differ from the previous one.
+
+    A failed poll ends polling: the error is kept for raise_on_error().
+    """
+    INTERVAL = 5
+    MAX_INTERVAL = 15
+
+    # Timeout of each status request
+    TIMEOUT = 5
+
+    def __init__(self, url: str, logger, name: str):
+        self.url = url
+        self.logger = logger
+        self.name = name
+        self.interval = self.INTERVAL
+        self.error = None
+
+        self._poller = None
+        self._body = None
+        # Set by shutdown(): poll once more, then drop out
+        self._final_requested = False
+        # The entry of this poll in the schedule of the poller
+        self._due_token = None
+        self._in_flight = False
+        # Poked while in flight: poll again right after
+        self._poked = False
+        self._finished = threading.Event()
+
+    def ingest(self, body: bytes):
+        raise NotImplementedError()
+
+    @property
+    def errored(self):
+        return self.error is not None
+
+    def raise_on_error(self):
+        if self.error is not None:
+            raise self.error
+
+    def start(self, poller: Optional['StatusPoller'] = None):
+        self._poller = poller or StatusPoller.shared()
+        self._poller.add(self)
+
+    def poke(self):
+        """Poll as soon as possible, and at the base interval from then on"""
+        self._poller.poke(self)
+
+    def stop(self):
+        """Drop out of polling as soon as possible"""
+        self._poller.remove(self)
+
+    def shutdown(self):
+        """Read status one more time, then drop out of polling"""
+        self._poller.finish(self)
+
+
+class StatusPoller:
+    """
+    Polls the status endpoints of many remote workers from a single
+    scheduler thread and a small pool of request threads sharing one
+    session, so that connections to each worker are kept alive and reused
+    between polls.
+
+    Use StatusPoller.shared() for the poller of the current process.
+    """
+    _shared = None
+    _shared_pid = None
+    _shared_lock = threading.Lock()
+
+    @classmethod
+    def shared(cls) -> 'StatusPoller':
+        with cls._shared_lock:
+            # Threads do not survive a fork: a child process gets its own
+            if cls._shared is None or cls._shared_pid != os.getpid():
+                cls._shared = cls()
+                cls._shared_pid = os.getpid()
+            return cls._shared
+
+    def __init__(self, workers: int = POLL_WORKERS):
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=POOLED_HOSTS,
+                              pool_maxsize=workers)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="status-poll")
+
+        self._cond = threading.Condition()
+        # (due time, token, poll)
+        self._schedule = []
+        self._tokens = itertools.count()
+        self._polls = set()
+        self._thread = None
+
+    def get(self, url: str, timeout: int = 10) -> requests.Response:
+        """One-off request on a pooled connection"""
+        r = self._session.get(url, timeout=timeout)
+        r.raise_for_status()
+        return r
+
+    def get_json(self, urls: list[str], timeout: int = 10) -> list:
+        """Decoded JSON bodies of all urls, requested concurrently"""
+        return list(
+            self._executor.map(lambda url: self.get(url, timeout).json(),
+                               urls))
+
+    def _schedule_poll(self, poll: Poll, delay: float):
+        # Replaces any previous entry of poll, which is then skipped
+        poll._due_token = next(self._tokens)
+        heapq.heappush(self._schedule,
+                       (time.monotonic() + delay, poll._due_token, poll))
+        self._cond.notify()
+
+    def add(self, poll: Poll):
+        with self._cond:
+            assert poll not in self._polls
+            poll._finished.clear()
+            self._polls.add(poll)
+            self._schedule_poll(poll, 0)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run,
+                                                name="status-poller",
+                                                daemon=True)
+                self._thread.start()
+
+    def poke(self, poll: Poll):
+        with self._cond:
+            poll.interval = poll.INTERVAL
+            if poll._in_flight:
+                poll._poked = True
+            elif poll in self._polls:
+                self._schedule_poll(poll, 0)
+
+    def _wait_finished(self, poll: Poll, timeout: float):
+        """
+        We expect to finish promptly because status requests have a
+        timeout. A stuck wait would hang the entire ducktape test run.
+        """
+        if not poll._finished.wait(timeout):
+            msg = f"Failed to stop polling the status of {poll.name}"
+            poll.logger.error(msg)
+            raise RuntimeError(msg)
+
+    def remove(self, poll: Poll, timeout: float = 10):
+        with self._cond:
+            if poll in self._polls:
+                self._polls.discard(poll)
+                poll._due_token = None
+                if not poll._in_flight:
+                    poll._finished.set()
+            else:
+                poll._finished.set()
+        self._wait_finished(poll, timeout)
+
+    def finish(self, poll: Poll, timeout: float = 10):
+        with self._cond:
+            poll._final_requested = True
+            if poll in self._polls and not poll._in_flight:
+                self._schedule_poll(poll, 0)
+        self._wait_finished(poll, timeout + poll.TIMEOUT)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    if not self._schedule:
+                        self._cond.wait()
+                        continue
+                    due, token, poll = self._schedule[0]
+                    now = time.monotonic()
+                    if token != poll._due_token:
+                        # Rescheduled or removed since
+                        heapq.heappop(self._schedule)
+                    elif due > now:
+                        self._cond.wait(due - now)
+                    else:
+                        heapq.heappop(self._schedule)
+                        break
+                poll._due_token = None
+                poll._in_flight = True
+                final = poll._final_requested
+            self._executor.submit(self._poll, poll, final)
+
+    def _poll(self, poll: Poll, final: bool):
+        try:
+            r = self._session.get(poll.url, timeout=poll.TIMEOUT)
+            r.raise_for_status()
+            body = r.content
+            if body != poll._body:
+                poll.ingest(body)
+                poll._body = body
+                poll.interval = poll.INTERVAL
+            else:
+                poll.interval = min(poll.interval * 2, poll.MAX_INTERVAL)
+        except Exception as e:
+            poll.error = e
+            poll.logger.exception(f"Error reading status from {poll.name}")
+
+        with self._cond:
+            poll._in_flight = False
+            if poll.error is not None or final or poll not in self._polls:
+                self._polls.discard(poll)
+                poll._finished.set()
+            elif poll._final_requested or poll._poked:
+                # Shutdown requested or poked while polling: the status
+                # just read may predate it.
+                poll._poked = False
+                poll.interval = poll.INTERVAL
+                self._schedule_poll(poll, 0)
+            else:
+                self._schedule_poll(poll, poll.interval)
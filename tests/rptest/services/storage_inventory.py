@@ -0,0 +1,187 @@
+import json
+import os
+import shlex
+import threading
+from typing import Optional
+
+from ducktape.cluster.cluster import ClusterNode
+from ducktape.cluster.remoteaccount import RemoteCommandError
+
+from rptest.services.storage import NodeCacheStorage, NodeStorage
+from rptest.util import inject_remote_script
+
+
+class _NodeAgent:
+    """
+    A compute_storage.py --serve process on a node and the mirror of the
+    inventory it last reported.
+    """
+    def __init__(self, logger, node: ClusterNode, data_dir: str,
+                 timeout_sec: int):
+        self.logger = logger
+        self.node = node
+        self.data_dir = data_dir
+        self.timeout_sec = timeout_sec
+        self.lock = threading.Lock()
+        self.cmd = None
+        self.chan = None
+        self.stdin = None
+        self.stdout = None
+        # sizes -> (generation, {path: size})
+        self.mirrors: dict[bool, tuple[int, dict]] = {}
+
+    def _start(self):
+        script_path = inject_remote_script(self.node, "compute_storage.py")
+        self.cmd = shlex.join(
+            ["python3", script_path, "--serve", f"--data-dir={self.data_dir}"])
+        self.logger.debug(f"Starting storage agent on {self.node.name}")
+        client = self.node.account.ssh_client
+        chan = client.get_transport().open_session(timeout=self.timeout_sec)
+        chan.settimeout(self.timeout_sec)
+        chan.exec_command(self.cmd)
+        chan.set_combine_stderr(False)
+        self.chan = chan
+        self.stdin = chan.makefile('wb', -1)
+        self.stdout = chan.makefile('r', -1)
+        self.mirrors = {}
+
+    def close(self):
+        if self.chan is not None:
+            try:
+                self.chan.close()
+            except Exception as e:
+                self.logger.debug(
+                    f"Error closing storage agent on {self.node.name}: {e}")
+        self.chan = None
+        self.stdin = None
+        self.stdout = None
+        self.mirrors = {}
+
+    def _exchange(self, request: dict) -> dict:
+        self.stdin.write(json.dumps(request) + "\n")
+        self.stdin.flush()
+        line = self.stdout.readline()
+        if not line:
+            stderr = self.chan.makefile_stderr('r', -1).read()
+            raise EOFError(f"storage agent exited: {stderr}")
+        return json.loads(line)
+
+    def request(self, sizes: bool, cache_dir: Optional[str]) -> tuple:
+        """
+        Inventory of the data directory as {path: size}, and the cache stats
+        if cache_dir is set. Only what changed since the previous request
+        crosses the wire.
+        """
+        for attempt in range(2):
+            if self.chan is None:
+                self._start()
+            generation, entries = self.mirrors.get(sizes, (None, None))
+            try:
+                response = self._exchange({
+                    "since": generation,
+                    "sizes": sizes,
+                    "cache_dir": cache_dir
+                })
+                break
+            except Exception as e:
+                # The agent or its connection died (e.g. node restarted):
+                # start over with a full inventory from a new agent.
+                self.close()
+                if attempt > 0:
+                    raise
+                self.logger.info(
+                    f"Restarting storage agent on {self.node.name}: {e}")
+
+        if "error" in response:
+            raise RemoteCommandError(self.node.account, self.cmd, 1,
+                                     response["error"])
+
+        if response["full"]:
+            entries = response["entries"]
+        else:
+            entries.update(response["entries"])
+            for path in response["removed"]:
+                del entries[path]
+        self.mirrors[sizes] = (response["generation"], entries)
+        return entries, response.get("cache")
+
+
+class StorageInventory:
+    """
+    Storage inventory of nodes, kept by a long lived agent process on each
+    node. The agent reuses the listings of unchanged directories between
+    requests and only sends back the changes since the previous one, so
+    that polling the storage of a node with many partitions is cheap on
+    both ends.
+    """
+    def __init__(self, logger, data_dir: str, timeout_sec: int = 10):
+        self.logger = logger
+        self.data_dir = data_dir
+        self.timeout_sec = timeout_sec
+        self._lock = threading.Lock()
+        self._agents: dict[str, _NodeAgent] = {}
+
+    def _agent(self, node: ClusterNode) -> _NodeAgent:
+        with self._lock:
+            agent = self._agents.get(node.account.hostname)
+            if agent is None:
+                agent = _NodeAgent(self.logger, node, self.data_dir,
+                                   self.timeout_sec)
+                self._agents[node.account.hostname] = agent
+            return agent
+
+    def forget(self, node: Optional[ClusterNode] = None):
+        """Stop the agent of node, or of all nodes"""
+        with self._lock:
+            if node is None:
+                agents = list(self._agents.values())
+                self._agents.clear()
+            else:
+                agent = self._agents.pop(node.account.hostname, None)
+                agents = [agent] if agent is not None else []
+        for agent in agents:
+            with agent.lock:
+                agent.close()
+
+    def node_storage(self, node: ClusterNode, store: NodeStorage, sizes: bool,
+                     cache_dir: Optional[str]):
+        """
+        Fill store with the contents of the data directory of node, and
+        with the cache stats if cache_dir is set and exists.
+        """
+        agent = self._agent(node)
+        with agent.lock:
+            entries, cache = agent.request(sizes, cache_dir)
+            entries = dict(entries)
+
+        # Sorted, parents come before their children
+        paths = sorted(entries)
+
+        namespaces = {}
+        topics = {}
+        # partition path -> (Partition, {segment: size})
+        partitions = {}
+        for path in paths:
+            parts = path.split("/")
+            full_path = os.path.join(store.data_dir, path)
+            if len(parts) == 1:
+                namespaces[path] = store.add_namespace(parts[0], full_path)
+            elif len(parts) == 2:
+                topics[path] = namespaces[parts[0]].add_topic(
+                    parts[1], full_path)
+            elif len(parts) == 3:
+                partition = topics[os.path.dirname(path)].add_partition(
+                    parts[2], node, full_path)
+                partitions[path] = (partition, {})
+            else:
+                partitions[os.path.dirname(path)][1][parts[3]] = entries[path]
+
+        for partition, segments in partitions.values():
+            partition.add_files(list(segments.keys()))
+            if not sizes:
+                continue
+            for segment, size in segments.items():
+                partition.set_segment_size(segment, size)
+
+        if cache is not None:
+            store.set_cache_stats(NodeCacheStorage(*cache))
@@ -162,7 +162,7 @@ class CloudStorageScrubberTest(RedpandaTest):
 
     def _delete_segment_and_await_anomaly(self):
         segment_metas = [
-            meta for meta in self.cloud_storage_client.list_objects(
+            meta for meta in self.cloud_storage_client.list_objects_parallel(
                 self.bucket_name) if "log" in meta.key
         ]
 
@@ -184,14 +184,14 @@ class PartitionStatusValidator:
 
 
 def cloud_storage_status_endpoint_check(test):
-    bucket_view = BucketView(test.redpanda)
+    # Polled repeatedly: only download what changed between two checks
+    bucket_view = BucketView(test.redpanda, incremental=True)
     reported_status_sliding_window = deque(maxlen=5)
     validator = PartitionStatusValidator(test)
 
     def check():
         try:
-            bucket_view.reset()
-            bucket_view._do_listing()
+            bucket_view.refresh()
 
             status = test.admin.get_partition_cloud_storage_status(
                 test.topic, 0)
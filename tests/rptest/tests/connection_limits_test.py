@@ -14,7 +14,7 @@ from rptest.services.cluster import cluster
 from rptest.services.rpk_producer import RpkProducer
 from rptest.services.rpk_consumer import RpkConsumer
 from rptest.clients.types import TopicSpec
-from rptest.services.metrics_check import MetricCheck
+from rptest.services.metrics_check import MultiNodeMetricCheck
 from rptest.util import expect_exception
 
 REJECTED_METRIC = "vectorized_kafka_rpc_connections_rejected_total"
@@ -30,10 +30,9 @@ class ConnectionLimitsTest(RedpandaTest):
     def test_exceed_broker_limit(self):
         self.redpanda.set_cluster_config({"kafka_connections_max": 6})
 
-        metrics = [
-            MetricCheck(self.logger, self.redpanda, n, REJECTED_METRIC, {},
-                        sum) for n in self.redpanda.nodes
-        ]
+        metrics = MultiNodeMetricCheck(self.logger, self.redpanda,
+                                       self.redpanda.nodes, REJECTED_METRIC,
+                                       {}, sum)
 
         # I happen to know that an `rpk topic consume` occupies three
         # connections.  So after opening two consumers, I should find
@@ -66,10 +65,8 @@ class ConnectionLimitsTest(RedpandaTest):
             c.stop()
             c.wait()
 
-        assert any([
-            m.evaluate([(REJECTED_METRIC, lambda a, b: b > a)])
-            for m in metrics
-        ])
+        assert metrics.evaluate([(REJECTED_METRIC, lambda a, b: b > a)],
+                                all_nodes=False)
 
     @cluster(num_nodes=2)
     def test_null(self):
@@ -79,10 +76,9 @@ class ConnectionLimitsTest(RedpandaTest):
         """
         self.redpanda.set_cluster_config({"kafka_connections_max": 6})
 
-        metrics = [
-            MetricCheck(self.logger, self.redpanda, n, REJECTED_METRIC, {},
-                        sum) for n in self.redpanda.nodes
-        ]
+        metrics = MultiNodeMetricCheck(self.logger, self.redpanda,
+                                       self.redpanda.nodes, REJECTED_METRIC,
+                                       {}, sum)
 
         producer = RpkProducer(self.test_context,
                                self.redpanda,
@@ -95,10 +91,7 @@ class ConnectionLimitsTest(RedpandaTest):
             producer.start()
             producer.wait()
 
-        assert all([
-            m.evaluate([(REJECTED_METRIC, lambda a, b: b == a)])
-            for m in metrics
-        ])
+        assert metrics.evaluate([(REJECTED_METRIC, lambda a, b: b == a)])
 
     @cluster(num_nodes=3)
     def test_overrides(self):
@@ -26,7 +26,7 @@ from rptest.services.admin import Admin
 from rptest.services.cluster import cluster
 from rptest.services.kgo_verifier_services import KgoVerifierConsumerGroupConsumer, KgoVerifierProducer, \
     KgoVerifierRandomConsumer, KgoVerifierSeqConsumer
-from rptest.services.metrics_check import MetricCheck
+from rptest.services.metrics_check import MultiNodeMetricCheck
 from rptest.services.redpanda import SISettings, get_cloud_storage_type, make_redpanda_service, CHAOS_LOG_ALLOW_LIST, \
     MetricsEndpoint
 from rptest.tests.end_to_end import EndToEndTest
@@ -502,15 +502,14 @@ class EndToEndShadowIndexingTest(EndToEndShadowIndexingBase):
         segments, wait for segments removal, consume data and run validation,
         that everything that is acked is consumed."""
         brokers = self.redpanda.started_nodes()
-        index_metrics = [
-            MetricCheck(self.logger,
-                        self.redpanda,
-                        node, [
-                            'vectorized_cloud_storage_index_uploads_total',
-                            'vectorized_cloud_storage_index_downloads_total',
-                        ],
-                        reduce=sum) for node in brokers
-        ]
+        index_metrics = MultiNodeMetricCheck(
+            self.logger,
+            self.redpanda,
+            brokers, [
+                'vectorized_cloud_storage_index_uploads_total',
+                'vectorized_cloud_storage_index_downloads_total',
+            ],
+            reduce=sum)
 
         self.start_producer()
         produce_until_segments(
@@ -556,9 +555,10 @@ class EndToEndShadowIndexingTest(EndToEndShadowIndexingBase):
         self.start_consumer()
         self.run_validation()
 
-        assert any(
-            im.evaluate([('vectorized_cloud_storage_index_downloads_total',
-                          lambda _, cnt: cnt)]) for im in index_metrics)
+        assert index_metrics.evaluate(
+            [('vectorized_cloud_storage_index_downloads_total',
+              lambda _, cnt: cnt)],
+            all_nodes=False)
 
         # Matches the segment or the index
         cache_expr = re.compile(
@@ -28,9 +28,9 @@ from rptest.services.redpanda import LoggingConfig, RedpandaService, SISettings
 from rptest.tests.end_to_end import EndToEndTest
 from rptest.tests.redpanda_test import RedpandaTest
 from rptest.util import produce_total_bytes, search_logs_with_timeout
-from rptest.utils.expect_rate import ExpectRate, RateTarget
+from rptest.utils.expect_rate import RateTarget
 from rptest.utils.full_disk import FullDiskHelper
-from rptest.utils.partition_metrics import PartitionMetrics
+from rptest.utils.metrics_recorder import MetricsRecorder
 from rptest.utils.si_utils import quiesce_uploads
 
 # reduce this?
@@ -38,6 +38,7 @@ MAX_MSG: int = 600
 MAX_MSG_PER_SEC = 10
 FDT_LOG_ALLOW_LIST = [".*cluster - storage space alert: free space.*"]
 LOOP_ITERATIONS = 3
+BYTES_PRODUCED = "vectorized_cluster_partition_bytes_produced_total"
 
 
 # XXX This test really needs a raw protocol client (i.e. not librdkafka # based)
@@ -209,10 +210,7 @@ class FullDiskTest(EndToEndTest):
         super().__init__(test_context=test_ctx, extra_rp_conf=extra_rp_conf)
         self.start_redpanda(num_nodes=3)
         assert self.redpanda
-        self.pm = PartitionMetrics(self.redpanda)
         self.full_disk = FullDiskHelper(self.logger, self.redpanda)
-        self.bytes_prod = ExpectRate(lambda: self.pm.bytes_produced(),
-                                     self.logger)
 
     @cluster(num_nodes=5, log_allow_list=FDT_LOG_ALLOW_LIST)
     def test_full_disk_no_produce(self):
@@ -226,6 +224,10 @@ class FullDiskTest(EndToEndTest):
         self.start_producer(1)
         self.start_consumer(1)
         self.await_startup()
+        with MetricsRecorder(self.redpanda, [BYTES_PRODUCED]) as recorder:
+            self._full_disk_loop(recorder)
+
+    def _full_disk_loop(self, recorder: MetricsRecorder):
         for i in range(LOOP_ITERATIONS):
             self.logger.info(f"Iteration {i} of {LOOP_ITERATIONS}..")
 
@@ -234,7 +236,7 @@ class FullDiskTest(EndToEndTest):
                                    target_sec=5,
                                    target_min_rate=100,
                                    target_max_rate=2**40)
-            self.bytes_prod.expect_rate(producing)
+            recorder.expect_rate(BYTES_PRODUCED, producing)
 
             self.full_disk.trigger_low_space()
 
@@ -244,7 +246,7 @@ class FullDiskTest(EndToEndTest):
                 target_sec=5,
                 target_min_rate=0,
                 target_max_rate=1)
-            self.bytes_prod.expect_rate(not_producing)
+            recorder.expect_rate(BYTES_PRODUCED, not_producing)
 
             self.full_disk.clear_low_space()
 
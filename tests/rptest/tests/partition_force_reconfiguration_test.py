@@ -118,14 +118,14 @@ class PartitionForceReconfigurationTest(EndToEndTest, PartitionMovementMixin):
     def _start_consumer(self):
         self.start_consumer()
         # Wait for all consumer offsets partitions to have a stable leadership.
-        # With lost nodes on debug builds, this seems to take time to converge.
-        for part in range(0, 16):
-            self.redpanda._admin.await_stable_leader(
-                topic="__consumer_offsets",
-                partition=part,
-                timeout_s=self.WAIT_TIMEOUT_S,
-                backoff_s=2,
-                hosts=self._alive_nodes())
+        # With lost nodes on debug builds, this seems to take time to converge:
+        # allow as long as waiting for each partition in turn did.
+        partitions = range(0, 16)
+        self.redpanda._admin.await_stable_leaders(
+            [("kafka", "__consumer_offsets", part) for part in partitions],
+            timeout_s=self.WAIT_TIMEOUT_S * len(partitions),
+            backoff_s=2,
+            hosts=self._alive_nodes())
 
     @cluster(num_nodes=9)
     @matrix(acks=[-1, 1],
@@ -204,7 +204,7 @@ class BucketScrubSelfTest(RedpandaTest):
         # that is linked into a manifest to constitute a corruption.
         view = BucketView(self.redpanda)
         segment_key = None
-        for o in self.redpanda.cloud_storage_client.list_objects(
+        for o in self.redpanda.cloud_storage_client.list_objects_parallel(
                 self.si_settings.cloud_storage_bucket):
             if ".log" in o.key and view.is_segment_part_of_a_manifest(o):
                 segment_key = o.key
@@ -24,7 +24,7 @@ from rptest.clients.offline_log_viewer import OfflineLogViewer
 from rptest.tests.redpanda_test import RedpandaTest
 from rptest.clients.kafka_cli_tools import KafkaCliTools
 from rptest.services.rpk_producer import RpkProducer
-from rptest.services.metrics_check import MetricCheck
+from rptest.services.metrics_check import MultiNodeMetricCheck
 from rptest.services.redpanda import CloudStorageType, SISettings, get_cloud_storage_type
 from rptest.services.kgo_verifier_services import KgoVerifierProducer
 from rptest.util import wait_for_local_storage_truncate, firewall_blocked
@@ -912,18 +912,14 @@ class TopicDeleteStressTest(RedpandaTest):
                                    topic_name, 1024, 100000)
             producer.start()
 
-            metrics = [
-                MetricCheck(self.logger, self.redpanda, n,
-                            'vectorized_storage_log_compacted_segment_total',
-                            {}, sum) for n in self.redpanda.nodes
-            ]
+            metrics = MultiNodeMetricCheck(
+                self.logger, self.redpanda, self.redpanda.nodes,
+                'vectorized_storage_log_compacted_segment_total', {}, sum)
 
             def check_compaction():
-                return all([
-                    m.evaluate([
-                        ('vectorized_storage_log_compacted_segment_total',
-                         lambda a, b: b > 3)
-                    ]) for m in metrics
+                return metrics.evaluate([
+                    ('vectorized_storage_log_compacted_segment_total',
+                     lambda a, b: b > 3)
                 ])
 
             wait_until(check_compaction,
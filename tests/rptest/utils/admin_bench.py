@@ -0,0 +1,133 @@
+# Copyright 2023 Redpanda Data, Inc.
+#
+# Use of this software is governed by the Business Source License
+# included in the file licenses/BSL.md
+#
+# As of the Change Date specified in that file, in accordance with
+# the Business Source License, use of this software will be governed
+# by the Apache License, Version 2.0
+"""
+Benchmark of admin-heavy loops: repeated get_partitions() calls returning
+a large JSON body, served by an admin API stand-in running in another process.
+
+Compares the original response logging of Admin._request (decode the body to
+log it, whatever the log level) with the current one, with debug logging
+enabled and disabled.
+
+Usage: python -m rptest.utils.admin_bench [--partitions N] [--calls N]
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+from rptest.services.admin import Admin
+
+# Admin always talks to port 9644 of the node's hostname
+HOST = "127.0.0.1"
+PORT = 9644
+
+
+def partition(p: int) -> dict:
+    replicas = [{"node_id": n, "core": p % 4} for n in range(3)]
+    return dict(ns="kafka",
+                topic=f"topic-{p // 100}",
+                partition_id=p % 100,
+                status="done",
+                leader_id=p % 5,
+                raft_group_id=p + 1,
+                disabled=False,
+                replicas=replicas)
+
+
+def partitions_body(partitions: int) -> bytes:
+    return json.dumps([partition(p) for p in range(partitions)]).encode()
+
+
+def serve(body: bytes, ready):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer((HOST, PORT), Handler)
+    ready.set()
+    server.serve_forever()
+
+
+class LegacyAdmin(Admin):
+    """Admin with the response logging of Admin._request before this change"""
+    def _log_response(self, r):
+        if r.status_code != 200:
+            self.redpanda.logger.warn(f"Response {r.status_code}: {r.text}")
+        else:
+            if 'application/json' in r.headers.get('Content-Type') and len(
+                    r.text):
+                try:
+                    self.redpanda.logger.debug(
+                        f"Response OK, JSON: {r.json()}")
+                except json.decoder.JSONDecodeError as e:
+                    self.redpanda.logger.debug(
+                        f"Response OK, Malformed JSON: '{r.text}' ({e})")
+            else:
+                self.redpanda.logger.debug("Response OK")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--partitions', type=int, default=20000)
+    parser.add_argument('--calls', type=int, default=20)
+    options = parser.parse_args()
+
+    body = partitions_body(options.partitions)
+    ready = multiprocessing.Event()
+    server = multiprocessing.Process(target=serve,
+                                     args=(body, ready),
+                                     daemon=True)
+    server.start()
+    ready.wait()
+    print(f"{options.partitions} partitions, "
+          f"{len(body) / 2**20:.1f} MiB per response, {options.calls} calls")
+
+    logger = logging.getLogger("admin_bench")
+    logger.propagate = False
+    logger.addHandler(logging.StreamHandler(open(os.devnull, "w")))
+    node = SimpleNamespace(account=SimpleNamespace(hostname=HOST))
+    redpanda = SimpleNamespace(logger=logger, nodes=[node])
+
+    try:
+        baseline = None
+        for level in (logging.DEBUG, logging.INFO):
+            logger.setLevel(level)
+            for admin_type in (LegacyAdmin, Admin):
+                admin = admin_type(redpanda)
+                # Warm up the connection
+                admin.get_partitions(node=node)
+                t = time.perf_counter()
+                for _ in range(options.calls):
+                    partitions = admin.get_partitions(node=node)
+                    assert len(partitions) == options.partitions
+                elapsed = (time.perf_counter() - t) / options.calls
+                baseline = baseline or elapsed
+                name = f"{admin_type.__name__}, {logging.getLevelName(level)}"
+                print(f"{name:>18}: {elapsed * 1000:8.1f}ms per call "
+                      f"{baseline / elapsed:5.1f}x")
+    finally:
+        server.terminate()
+
+
+if __name__ == '__main__':
+    main()
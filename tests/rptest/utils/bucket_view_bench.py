@@ -0,0 +1,330 @@
+# Copyright 2023 Redpanda Data, Inc.
+#
+# Use of this software is governed by the Business Source License
+# included in the file licenses/BSL.md
+#
+# As of the Change Date specified in that file, in accordance with
+# the Business Source License, use of this software will be governed
+# by the Apache License, Version 2.0
+"""
+Benchmark of BucketView listing a bucket of binary partition manifests,
+served by an in-process S3 stand-in with a configurable per-request latency.
+
+Compares the original path (serial downloads, one rp-storage-tool process per
+manifest) with the in-process decoder, serially and with concurrent fetches,
+then a full and an incremental refresh after some manifests changed.
+
+Usage: python -m rptest.utils.bucket_view_bench [--partitions N] [--segments N]
+           [--latency-ms N] [--concurrency N] [--churn PERCENT]
+"""
+
+import argparse
+import bisect
+import functools
+import hashlib
+import logging
+import shutil
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from urllib.parse import parse_qs, unquote, urlparse
+from xml.sax.saxutils import escape
+
+from rptest.archival.s3_client import S3Client
+from rptest.clients.rp_storage_tool import RpStorageTool
+from rptest.utils.manifest_serde import ROW_WIDTH, decode_partition_manifest
+from rptest.utils.si_utils import NTPR, BucketView, parse_s3_manifest_path
+
+BUCKET = "bench-bucket"
+
+_ALIGNED_FORMATS = {8: "B", 16: "H", 32: "I", 64: "Q"}
+
+
+def _envelope(body: bytes, version: int = 0, compat_version: int = 0):
+    return struct.pack("<BBI", version, compat_version, len(body)) + body
+
+
+def _iobuf(b: bytes):
+    return struct.pack("<I", len(b)) + b
+
+
+def _pack_row(row: list[int], nbits: int) -> bytes:
+    """Inverse of manifest_serde._unpack_row"""
+    out = b''
+    shift = 0
+    chunks = [64] if nbits == 64 else [w for w in (32, 16, 8) if nbits & w]
+    if nbits != 64 and nbits & 7:
+        chunks.append(nbits & 7)
+    for width in chunks:
+        mask = (1 << width) - 1
+        values = [(v >> shift) & mask for v in row]
+        if width >= 8:
+            out += struct.pack(f"<{ROW_WIDTH}{_ALIGNED_FORMATS[width]}",
+                               *values)
+        else:
+            bits = sum(v << (width * i) for i, v in enumerate(values))
+            out += bits.to_bytes(2 * width, 'little')
+        shift += width
+    return out
+
+
+def _encode_column(values: list[int], is_counter: bool) -> bytes:
+    """A column as a single frame, full rows in the encoder, the rest in the head"""
+    n_rows = len(values) // ROW_WIDTH
+    initial = values[0] if values else 0
+    data = b''
+    p = initial
+    for r in range(n_rows):
+        row = values[r * ROW_WIDTH:(r + 1) * ROW_WIDTH]
+        if is_counter:
+            deltas = [v - q for v, q in zip(row, [p] + row[:-1])]
+        else:
+            deltas = [(v ^ q) & 0xFFFFFFFFFFFFFFFF
+                      for v, q in zip(row, [p] + row[:-1])]
+        nbits = max(deltas).bit_length()
+        data += bytes([nbits]) + _pack_row(deltas, nbits)
+        p = row[-1]
+    head = values[n_rows * ROW_WIDTH:]
+    head += [0] * (ROW_WIDTH - len(head))
+
+    frame = struct.pack("<I", ROW_WIDTH) + struct.pack(f"<{ROW_WIDTH}q", *head)
+    if n_rows:
+        frame += b'\x01' + _envelope(
+            struct.pack("<qq", initial, p) + _iobuf(data) +
+            struct.pack("<I", n_rows))
+    else:
+        frame += b'\x00'
+    frame += struct.pack("<Q", len(values)) + b'\x00'
+    return _envelope(struct.pack("<I", 1) + _envelope(frame))
+
+
+def encode_partition_manifest(ntpr: NTPR,
+                              segments: int,
+                              segment_size: int = 1 << 20) -> bytes:
+    """Synthetic serde partition manifest with contiguous segments"""
+    records = 1000
+    base = [i * records for i in range(segments)]
+    columns = [
+        ([0] * segments, False),  # is_compacted
+        ([segment_size] * segments, False),  # size_bytes
+        (base, True),  # base_offset
+        ([b + records - 1 for b in base], False),  # committed_offset
+        ([1700000000000 + b for b in base], False),  # base_timestamp
+        ([1700000000000 + b + records - 1 for b in base], False),
+        ([b // 100 for b in base], False),  # delta_offset
+        ([ntpr.revision] * segments, False),  # ntp_revision
+        ([1] * segments, False),  # archiver_term
+        ([1] * segments, False),  # segment_term
+        ([(b + records) // 100 for b in base], False),  # delta_offset_end
+        ([3] * segments, False),  # sname_format
+        ([0] * segments, False),  # metadata_size_hint
+    ]
+    cstore = _envelope(
+        _envelope(b''.join(_encode_column(v, c)
+                           for v, c in columns) + struct.pack("<I", 0)))
+
+    last_offset = segments * records - 1
+    body = (_iobuf(ntpr.ns.encode()) + _iobuf(ntpr.topic.encode()) +
+            struct.pack("<Iq", ntpr.partition, ntpr.revision) +
+            _iobuf(cstore) + struct.pack("<I", 0) + struct.pack(
+                "<qqqqQqqqqQ", last_offset, 0, -2**63, last_offset,
+                segments * segment_size, -2**63, -2**63, -2**63, -2**63, 0))
+    return _envelope(body, version=2)
+
+
+@functools.lru_cache(maxsize=None)
+def _etag(data: bytes) -> str:
+    return hashlib.md5(data).hexdigest()
+
+
+class FakeS3Handler(BaseHTTPRequestHandler):
+    """S3 ListObjectsV2 and GetObject, with prefixes, start-after and ranges"""
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately: avoid delayed ACK stalls
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self,
+               body: bytes,
+               content_type: str,
+               etag: str = "0",
+               status: int = 200):
+        time.sleep(self.server.latency)
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", f'"{etag}"')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        bucket, _, key = url.path.lstrip("/").partition("/")
+        if key:
+            data = self.server.objects[unquote(key)]
+            etag = _etag(data)
+            byte_range = self.headers.get("Range")
+            if byte_range:
+                first, _, last = byte_range.removeprefix("bytes=").partition(
+                    "-")
+                self._reply(data[int(first):int(last) + 1],
+                            "application/octet-stream", etag, 206)
+            else:
+                self._reply(data, "application/octet-stream", etag)
+            return
+
+        query = parse_qs(url.query)
+        max_keys = int(query.get("max-keys", ["1000"])[0])
+        prefix = query.get("prefix", [""])[0]
+        all_keys = self.server.keys
+        if "continuation-token" in query:
+            start = int(query["continuation-token"][0])
+        else:
+            start = max(
+                bisect.bisect_right(all_keys,
+                                    query.get("start-after", [""])[0]),
+                bisect.bisect_left(all_keys, prefix))
+        end = bisect.bisect_left(all_keys, prefix + "\U0010ffff") \
+            if prefix else len(all_keys)
+        keys = all_keys[start:min(end, start + max_keys)]
+        truncated = start + max_keys < end
+        contents = "".join(
+            f"<Contents><Key>{escape(k)}</Key>"
+            f"<LastModified>2023-01-01T00:00:00.000Z</LastModified>"
+            f"<ETag>&quot;{_etag(self.server.objects[k])}&quot;</ETag>"
+            f"<Size>{len(self.server.objects[k])}</Size>"
+            f"<StorageClass>STANDARD</StorageClass></Contents>" for k in keys)
+        token = (f"<NextContinuationToken>{start + max_keys}"
+                 f"</NextContinuationToken>" if truncated else "")
+        body = (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<ListBucketResult xmlns="http://s3.amazonaws.com/doc/2006-03-01/">'
+            f"<Name>{bucket}</Name><Prefix></Prefix><KeyCount>{len(keys)}"
+            f"</KeyCount><MaxKeys>{max_keys}</MaxKeys>"
+            f"<IsTruncated>{str(truncated).lower()}</IsTruncated>{token}"
+            f"{contents}</ListBucketResult>").encode()
+        self._reply(body, "application/xml")
+
+
+def serve_bucket(objects: dict[str, bytes], latency: float):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeS3Handler)
+    server.daemon_threads = True
+    server.objects = objects
+    server.keys = sorted(objects.keys())
+    server.latency = latency
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def list_with_tool(client: S3Client, logger) -> dict:
+    """The original listing: serial downloads, one decoder process each"""
+    manifests = {}
+    tool = RpStorageTool(logger)
+    for o in client.list_objects(BUCKET):
+        data = client.get_object_data(BUCKET, o.key)
+        manifests[parse_s3_manifest_path(o.key).to_ntp()] = tool._decode(
+            data, "decode-partition-manifest")
+    return manifests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--partitions', type=int, default=2000)
+    parser.add_argument('--segments', type=int, default=200)
+    parser.add_argument('--latency-ms', type=float, default=5)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--churn',
+                        type=float,
+                        default=1,
+                        help="%% of manifests changed between two refreshes")
+    options = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    logger = logging.getLogger("bucket_view_bench")
+
+    objects = {}
+    for p in range(options.partitions):
+        ntpr = NTPR("kafka", "bench", p, 7)
+        objects[BucketView.gen_manifest_path(ntpr)] = \
+            encode_partition_manifest(ntpr, options.segments)
+    sample = next(iter(objects.values()))
+    assert len(decode_partition_manifest(sample)["segments"]) == \
+        options.segments
+
+    server = serve_bucket(objects, options.latency_ms / 1000)
+    client = S3Client(region="us-east-1",
+                      access_key="bench",
+                      secret_key="bench",
+                      logger=logger,
+                      endpoint=f"http://127.0.0.1:{server.server_port}")
+    print(f"{options.partitions} manifests of {options.segments} segments, "
+          f"{sum(len(o) for o in objects.values()) / 2**20:.1f} MiB, "
+          f"{options.latency_ms}ms per request")
+
+    redpanda = SimpleNamespace(
+        logger=logger,
+        si_settings=SimpleNamespace(cloud_storage_bucket=BUCKET),
+        cloud_storage_client=client)
+
+    def bucket_view(concurrency):
+        view = BucketView(redpanda, fetch_concurrency=concurrency)
+        return lambda: view.partition_manifests
+
+    candidates = []
+    if shutil.which("rp-storage-tool"):
+        candidates.append(("serial, rp-storage-tool",
+                           lambda: list_with_tool(client, logger)))
+    else:
+        print("rp-storage-tool not found, skipping the original path")
+    candidates += [
+        ("serial, in-process", bucket_view(1)),
+        (f"{options.concurrency} fetchers, in-process",
+         bucket_view(options.concurrency)),
+    ]
+
+    reference = None
+    for name, fn in candidates:
+        t = time.perf_counter()
+        manifests = fn()
+        elapsed = time.perf_counter() - t
+        assert len(manifests) == options.partitions
+        if reference is None:
+            reference = manifests
+        else:
+            assert manifests == reference, f"{name} decoded differently"
+        print(f"{name:>32}: {elapsed:7.2f}s "
+              f"{options.partitions / elapsed:8.0f} manifests/s")
+
+    # A polling loop: list again after some of the manifests changed
+    incremental = BucketView(redpanda,
+                             fetch_concurrency=options.concurrency,
+                             incremental=True)
+    incremental.refresh()
+    changed = list(
+        objects)[:max(1, int(options.partitions * options.churn / 100))]
+    for key in changed:
+        objects[key] = encode_partition_manifest(parse_s3_manifest_path(key),
+                                                 options.segments + 1)
+    print(f"Refresh after {len(changed)} manifests changed")
+    for name, view in [("full",
+                        BucketView(redpanda,
+                                   fetch_concurrency=options.concurrency)),
+                       ("incremental", incremental)]:
+        t = time.perf_counter()
+        view.refresh()
+        elapsed = time.perf_counter() - t
+        for key in changed:
+            ntp = parse_s3_manifest_path(key).to_ntp()
+            assert len(view.partition_manifests[ntp]["segments"]) == \
+                options.segments + 1
+        print(f"{name:>32}: {elapsed:7.2f}s")
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -81,12 +81,13 @@ class ExpectRate:
             samples.append(m)
             elapsed_msec = ts(m) - t_0
 
-            # find latest index that is at least target_sec old
-            for i, sample in enumerate(samples):
-                delta_t = ts(m) - ts(sample)
+            # find latest index that is at least target_sec old: samples
+            # only get older, so it only moves forward from the last one.
+            while interval_start + 1 < len(samples):
+                delta_t = ts(m) - ts(samples[interval_start + 1])
                 if delta_t < target.target_sec * 1000:
                     break
-                interval_start = i
+                interval_start += 1
 
             if interval_start >= 0:
                 elapsed_count = m.count - samples[interval_start].count
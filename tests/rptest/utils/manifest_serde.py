@@ -0,0 +1,355 @@
+# Copyright 2023 Redpanda Data, Inc.
+#
+# Use of this software is governed by the Business Source License
+# included in the file licenses/BSL.md
+#
+# As of the Change Date specified in that file, in accordance with
+# the Business Source License, use of this software will be governed
+# by the Apache License, Version 2.0
+"""
+In-process decoder of the serde (binary, manifest.bin) encoding of partition
+manifests, producing the same dict as `rp-storage-tool decode-partition-manifest`.
+
+This follows tools/rp_storage_tool/src/remote_types.rs (PartitionManifest,
+decode_colstore) and deltafor/src for the DeltaFOR column encoding.
+"""
+
+import struct
+
+INT64_MIN = -2**63
+
+# Rows of a DeltaFOR column always hold this many values
+ROW_WIDTH = 16
+
+_U8 = struct.Struct("<B")
+_U32 = struct.Struct("<I")
+_I64 = struct.Struct("<q")
+_U64 = struct.Struct("<Q")
+_ENVELOPE = struct.Struct("<BBI")
+_HEAD_ROW = struct.Struct(f"<{ROW_WIDTH}q")
+
+# Bit packed chunks of 8, 16, 32 and 64 bits are stored byte aligned, one
+# value after the other.
+_ALIGNED_CHUNKS = {
+    8: struct.Struct(f"<{ROW_WIDTH}B"),
+    16: struct.Struct(f"<{ROW_WIDTH}H"),
+    32: struct.Struct(f"<{ROW_WIDTH}I"),
+    64: struct.Struct(f"<{ROW_WIDTH}Q"),
+}
+
+# Order of the columns of segment_meta_cstore, and whether each is a counter
+# (delta-delta encoded) column rather than a gauge (xor encoded) one.
+_COLUMNS = (
+    ("is_compacted", False),
+    ("size_bytes", False),
+    ("base_offset", True),
+    ("committed_offset", False),
+    ("base_timestamp", False),
+    ("max_timestamp", False),
+    ("delta_offset", False),
+    ("ntp_revision", False),
+    ("archiver_term", False),
+    ("segment_term", False),
+    ("delta_offset_end", False),
+    ("sname_format", False),
+    ("metadata_size_hint", False),
+)
+
+# Optional segment fields, unset when negative
+_OPTIONAL_SEGMENT_FIELDS = ("delta_offset", "base_timestamp", "max_timestamp",
+                            "ntp_revision", "sname_format", "segment_term",
+                            "delta_offset_end")
+
+# Manifest offsets that are left out of the output when set to INT64_MIN
+_DEFAULTABLE_OFFSETS = ("insync_offset", "last_uploaded_compacted_offset",
+                        "start_offset")
+_DEFAULTABLE_ARCHIVE_OFFSETS = ("archive_start_offset",
+                                "archive_start_offset_delta",
+                                "archive_clean_offset", "start_kafka_offset")
+
+
+class ManifestDecodeError(Exception):
+    pass
+
+
+def _chunks(nbits: int) -> list[int]:
+    """
+    Widths of the chunks a row of nbits wide values is packed as: the 32,
+    16 and 8 bit aligned parts, largest first, then the remaining bits.
+    """
+    if nbits == 64:
+        return [64]
+    chunks = [w for w in (32, 16, 8) if nbits & w]
+    if nbits & 7:
+        chunks.append(nbits & 7)
+    return chunks
+
+
+class _Cursor:
+    def __init__(self, buf, pos: int = 0):
+        self.buf = buf
+        self.pos = pos
+
+    def unpack(self, s: struct.Struct):
+        try:
+            values = s.unpack_from(self.buf, self.pos)
+        except struct.error as e:
+            raise ManifestDecodeError(
+                f"Short read at position {self.pos}: {e}")
+        self.pos += s.size
+        return values
+
+    def u8(self) -> int:
+        return self.unpack(_U8)[0]
+
+    def u32(self) -> int:
+        return self.unpack(_U32)[0]
+
+    def i64(self) -> int:
+        return self.unpack(_I64)[0]
+
+    def u64(self) -> int:
+        return self.unpack(_U64)[0]
+
+    def bool(self) -> bool:
+        v = self.u8()
+        if v > 1:
+            raise ManifestDecodeError(f"Invalid bool byte {v} at {self.pos}")
+        return v == 1
+
+    def bytes(self, n: int):
+        if self.pos + n > len(self.buf):
+            raise ManifestDecodeError(
+                f"Short read of {n} bytes at position {self.pos}")
+        b = self.buf[self.pos:self.pos + n]
+        self.pos += n
+        return b
+
+    def iobuf(self):
+        return self.bytes(self.u32())
+
+    def string(self) -> str:
+        return bytes(self.iobuf()).decode('utf-8')
+
+    def envelope(self) -> tuple[int, int, int]:
+        """Read an envelope header, returns (version, compat_version, end)"""
+        version, compat_version, size = self.unpack(_ENVELOPE)
+        return version, compat_version, self.pos + size
+
+    def end_envelope(self, end: int):
+        if self.pos > end:
+            raise ManifestDecodeError(
+                f"Read past the end of envelope ({self.pos} > {end})")
+        # Skip fields added by newer versions
+        self.pos = end
+
+
+def _unpack_row(c: _Cursor, nbits: int) -> list[int]:
+    row = [0] * ROW_WIDTH
+    shift = 0
+    for width in _chunks(nbits):
+        if width in _ALIGNED_CHUNKS:
+            values = c.unpack(_ALIGNED_CHUNKS[width])
+        else:
+            # 16 values of width < 8 bits in 2 * width bytes, lowest first
+            bits = int.from_bytes(c.bytes(2 * width), 'little')
+            mask = (1 << width) - 1
+            values = [(bits >> (width * i)) & mask for i in range(ROW_WIDTH)]
+        if shift == 0:
+            row = list(values)
+        else:
+            row = [r | (v << shift) for r, v in zip(row, values)]
+        shift += width
+    return row
+
+
+def _to_i64(v: int) -> int:
+    v &= 0xFFFFFFFFFFFFFFFF
+    return v - (1 << 64) if v & (1 << 63) else v
+
+
+def _decode_deltafor(data, count: int, initial: int,
+                     is_counter: bool) -> list[int]:
+    c = _Cursor(data)
+    values = []
+    p = initial
+    for _ in range(count):
+        row = _unpack_row(c, c.u8())
+        if is_counter:
+            for v in row:
+                p = _to_i64(v + p)
+                values.append(p)
+        else:
+            for v in row:
+                p ^= _to_i64(v)
+                values.append(p)
+    return values
+
+
+def _skip_stream_pos(c: _Cursor):
+    _, _, end = c.envelope()
+    c.end_envelope(end)
+
+
+def _decode_column(c: _Cursor, is_counter: bool) -> list[int]:
+    values = []
+    _, _, column_end = c.envelope()
+    for _ in range(c.u32()):
+        _, _, frame_end = c.envelope()
+        head_width = c.u32()
+        if head_width != ROW_WIDTH:
+            raise ManifestDecodeError(f"Unexpected head width {head_width}")
+        head_row = c.unpack(_HEAD_ROW)
+
+        frame_values = []
+        if c.bool():
+            _, _, encoder_end = c.envelope()
+            initial = c.i64()
+            c.i64()  # last
+            data = c.iobuf()
+            count = c.u32()
+            c.end_envelope(encoder_end)
+            frame_values = _decode_deltafor(data, count, initial, is_counter)
+
+        frame_size = c.u64()
+        # The head row only holds values not yet flushed to the encoder
+        if len(frame_values) < frame_size:
+            frame_values.extend(head_row)
+        if frame_size > len(frame_values):
+            raise ManifestDecodeError(
+                f"Decode values list too short {len(frame_values)} (vs frame size {frame_size})"
+            )
+        del frame_values[frame_size:]
+
+        if c.bool():
+            _skip_stream_pos(c)  # last_row
+        c.end_envelope(frame_end)
+        values += frame_values
+    c.end_envelope(column_end)
+    return values
+
+
+def segment_shortname(base_offset: int, segment_term: int) -> str:
+    return f"{base_offset}-{segment_term}-v1.log"
+
+
+def decode_colstore(buf) -> list[dict]:
+    """Decode a segment_meta_cstore into a list of segment dicts"""
+    c = _Cursor(buf)
+    _, _, cstore_end = c.envelope()
+    _, _, columns_end = c.envelope()
+
+    columns = {
+        name: _decode_column(c, is_counter)
+        for name, is_counter in _COLUMNS
+    }
+
+    # Hints, one optional deltafor_stream_pos_t per column for some offsets
+    for _ in range(c.u32()):
+        c.i64()
+        if c.bool():
+            for _ in range(c.u32()):
+                _skip_stream_pos(c)
+
+    c.end_envelope(columns_end)
+    c.end_envelope(cstore_end)
+
+    segments = []
+    for i in range(len(columns["is_compacted"])):
+        segment = {
+            "base_offset": columns["base_offset"][i],
+            "committed_offset": columns["committed_offset"][i],
+            "is_compacted": columns["is_compacted"][i] == 1,
+            "size_bytes": columns["size_bytes"][i],
+            "archiver_term": columns["archiver_term"][i],
+        }
+        for name in _OPTIONAL_SEGMENT_FIELDS:
+            v = columns[name][i]
+            segment[name] = v if v >= 0 else None
+        segments.append(segment)
+    return segments
+
+
+def _decode_lw_segment(c: _Cursor) -> dict:
+    _, _, end = c.envelope()
+    segment = {
+        "ntp_revision": c.u64(),
+        "base_offset": c.i64(),
+        "committed_offset": c.u64(),
+        "archiver_term": c.u64(),
+        "segment_term": c.i64(),
+        "size_bytes": c.u64(),
+        "sname_format": c.u32(),
+    }
+    c.end_envelope(end)
+    return segment
+
+
+def _spillover_meta(segment: dict) -> dict:
+    if segment["sname_format"] != 3:
+        raise ManifestDecodeError(
+            f"expected segment_name_format::v3 in {segment}")
+    for name in ("base_timestamp", "max_timestamp", "delta_offset",
+                 "delta_offset_end", "ntp_revision", "segment_term"):
+        if segment[name] is None:
+            raise ManifestDecodeError(f"{name} not present in {segment}")
+    # Spillover metadata is always encoded as not compacted
+    return dict(segment, is_compacted=False)
+
+
+def decode_partition_manifest(data) -> dict:
+    """
+    Decode a serde encoded partition manifest. The result has the layout of
+    the JSON printed by `rp-storage-tool decode-partition-manifest`.
+    """
+    c = _Cursor(memoryview(data))
+    version, _, end = c.envelope()
+
+    manifest = {
+        "version": version,
+        "namespace": c.string(),
+        "topic": c.string(),
+        "partition": c.u32(),
+        "revision": c.i64(),
+    }
+    segments = decode_colstore(c.iobuf())
+    replaced = [_decode_lw_segment(c) for _ in range(c.u32())]
+
+    manifest["last_offset"] = c.i64()
+    manifest["segments"] = {
+        segment_shortname(s["base_offset"], s["segment_term"]): s
+        for s in segments
+    }
+
+    offsets = {}
+    offsets["start_offset"] = c.i64()
+    offsets["last_uploaded_compacted_offset"] = c.i64()
+    offsets["insync_offset"] = c.i64()
+    cloud_log_size_bytes = c.u64()
+    for name in _DEFAULTABLE_ARCHIVE_OFFSETS:
+        offsets[name] = c.i64()
+
+    archive_size_bytes = c.u64() if c.pos < end else None
+    spillover = []
+    if c.pos < end:
+        spillover = sorted(
+            (_spillover_meta(s) for s in decode_colstore(c.iobuf())),
+            key=lambda s: s["base_offset"])
+    c.end_envelope(end)
+
+    for name in _DEFAULTABLE_OFFSETS:
+        if offsets[name] != INT64_MIN:
+            manifest[name] = offsets[name]
+    manifest["replaced"] = {
+        segment_shortname(s["base_offset"], s["segment_term"]): s
+        for s in replaced
+    }
+    manifest["cloud_log_size_bytes"] = cloud_log_size_bytes
+    for name in _DEFAULTABLE_ARCHIVE_OFFSETS:
+        if offsets[name] != INT64_MIN:
+            manifest[name] = offsets[name]
+    if archive_size_bytes is not None:
+        manifest["archive_size_bytes"] = archive_size_bytes
+    if spillover:
+        manifest["spillover"] = spillover
+    return manifest
@@ -0,0 +1,151 @@
+# Copyright 2023 Redpanda Data, Inc.
+#
+# Use of this software is governed by the Business Source License
+# included in the file licenses/BSL.md
+#
+# As of the Change Date specified in that file, in accordance with
+# the Business Source License, use of this software will be governed
+# by the Apache License, Version 2.0
+"""
+Benchmark of rptest.services.metrics_parser against prometheus_client.
+
+Parses a /metrics page captured from a node (e.g. with
+`curl -o metrics.txt http://<node>:9644/metrics`), or a generated one
+shaped like it, fully and filtered on a prefix, and checks that both
+parsers read the same samples.
+
+Usage: python -m rptest.utils.metrics_parser_bench [--payload FILE]
+           [--partitions N] [--prefix PREFIX] [--rounds N]
+"""
+
+import argparse
+import time
+
+from prometheus_client.parser import text_string_to_metric_families
+
+from rptest.services.metrics_parser import iter_lines, parse_columns, parse_samples
+
+SHARDS = 8
+
+PARTITION_COUNTERS = [
+    "vectorized_cluster_partition_records_produced",
+    "vectorized_cluster_partition_records_fetched",
+    "vectorized_cluster_partition_bytes_produced_total",
+    "vectorized_cluster_partition_bytes_fetched_total",
+]
+PARTITION_GAUGES = [
+    "vectorized_cluster_partition_leader",
+    "vectorized_cluster_partition_high_watermark",
+    "vectorized_cluster_partition_under_replicated_replicas",
+    "vectorized_storage_log_partition_size",
+]
+LATENCY_BUCKETS = [2**i for i in range(8, 26)]
+
+
+def generate(partitions: int) -> str:
+    """A page of metrics like a node with this many partitions serves"""
+    lines = []
+
+    def partition_labels(p):
+        return (f'namespace="kafka",partition="{p % 100}",'
+                f'shard="{p % SHARDS}",topic="topic-{p // 100}"')
+
+    for i, name in enumerate(PARTITION_COUNTERS + PARTITION_GAUGES):
+        typ = "counter" if name in PARTITION_COUNTERS else "gauge"
+        lines.append(f"# HELP {name} Metric {i} of each partition")
+        lines.append(f"# TYPE {name} {typ}")
+        for p in range(partitions):
+            lines.append(f"{name}{{{partition_labels(p)}}} {p * 1000 + i}")
+
+    name = "vectorized_kafka_latency_produce_latency_us"
+    lines.append(f"# HELP {name} Produce latency")
+    lines.append(f"# TYPE {name} histogram")
+    for shard in range(SHARDS):
+        labels = f'latency_metric="microseconds",shard="{shard}"'
+        for i, le in enumerate(LATENCY_BUCKETS):
+            lines.append(f'{name}_bucket{{{labels},le="{le}"}} {i * 10}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} 1000')
+        lines.append(f'{name}_sum{{{labels}}} 123456')
+        lines.append(f'{name}_count{{{labels}}} 1000')
+
+    name = "vectorized_reactor_utilization"
+    lines.append(f"# HELP {name} CPU utilization")
+    lines.append(f"# TYPE {name} gauge")
+    for shard in range(SHARDS):
+        lines.append(f'{name}{{shard="{shard}"}} {shard * 1.5}')
+    return "\n".join(lines) + "\n"
+
+
+def chunks(payload: bytes, size: int = 64 * 1024):
+    """payload as received by a streamed response"""
+    for i in range(0, len(payload), size):
+        yield payload[i:i + size]
+
+
+def reference(text: str, prefix: str = "") -> list:
+    return [(f.name, s.name, s.labels, s.value)
+            for f in text_string_to_metric_families(text) for s in f.samples
+            if s.name.startswith(prefix)]
+
+
+def timed(fn, rounds: int) -> tuple:
+    best = None
+    for _ in range(rounds):
+        t = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - t
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--payload', help='captured metrics page')
+    parser.add_argument('--partitions', type=int, default=10000)
+    parser.add_argument('--prefix',
+                        default='vectorized_cluster_partition_bytes_produced')
+    parser.add_argument('--rounds', type=int, default=3)
+    options = parser.parse_args()
+
+    if options.payload:
+        with open(options.payload, 'rb') as f:
+            payload = f.read()
+    else:
+        payload = generate(options.partitions).encode()
+    text = payload.decode()
+    print(f"{len(payload) / 2**20:.1f} MiB, "
+          f"{text.count(chr(10))} lines, best of {options.rounds}")
+
+    prefixes = (options.prefix, )
+    runs = [
+        ("prometheus_client, all", lambda: reference(text), None),
+        ("parse_samples, all",
+         lambda: list(parse_samples(iter_lines(chunks(payload)))), None),
+        ("parse_columns, all",
+         lambda: parse_columns(iter_lines(chunks(payload))), None),
+        ("prometheus_client, prefix", lambda: reference(text, options.prefix),
+         options.prefix),
+        ("parse_samples, prefix",
+         lambda: list(parse_samples(iter_lines(chunks(payload)), prefixes)),
+         options.prefix),
+    ]
+
+    baseline = {}
+    for name, fn, prefix in runs:
+        elapsed, result = timed(fn, options.rounds)
+        if isinstance(result, tuple):
+            # Columns
+            result = [(family, n, result.label_sets[label_id], value)
+                      for family, n, label_id, value in zip(*result[:4])]
+        if prefix not in baseline:
+            baseline[prefix] = (elapsed, result)
+        else:
+            assert result == baseline[prefix][1], \
+                f"{name} read different samples than prometheus_client"
+        speedup = baseline[prefix][0] / elapsed
+        print(f"{name:>26}: {elapsed * 1000:8.1f}ms {len(result):8} samples "
+              f"{speedup:5.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,334 @@
+# Copyright 2023 Redpanda Data, Inc.
+#
+# Use of this software is governed by the Business Source License
+# included in the file licenses/BSL.md
+#
+# As of the Change Date specified in that file, in accordance with
+# the Business Source License, use of this software will be governed
+# by the Apache License, Version 2.0
+
+import concurrent.futures
+import threading
+import time
+from array import array
+from typing import Mapping, NamedTuple, Optional
+
+import numpy as np
+
+from rptest.services.redpanda import MetricsEndpoint, MetricsSnapshot
+from rptest.utils.expect_rate import RateTarget
+
+
+class SeriesKey(NamedTuple):
+    sample: str
+    node: str
+    labels: frozenset
+
+
+class MetricsRecorder:
+    """
+    Scrapes the given samples of all nodes every interval_s seconds from a
+    background thread and keeps one time series per (sample, node, labels).
+
+    Each scrape appends one timestamp, and one value to every series, NaN
+    for series missing from the scrape (e.g. the node was down), so that
+    the series of a sample line up and queries are computed over whole
+    arrays at once. Rates, percentiles and windowed averages can then be
+    asked for during or after a test without scraping the nodes again.
+
+        with MetricsRecorder(redpanda, [BYTES_PRODUCED]) as recorder:
+            ... run the workload ...
+            recorder.expect_rate(BYTES_PRODUCED, RateTarget(...))
+    """
+    def __init__(self,
+                 redpanda,
+                 samples: list[str],
+                 interval_s: float = 1,
+                 nodes=None,
+                 metrics_endpoint: MetricsEndpoint = MetricsEndpoint.METRICS):
+        self.redpanda = redpanda
+        self.logger = redpanda.logger
+        self.samples = list(samples)
+        self._sample_filter = set(self.samples).__contains__
+        self.interval_s = interval_s
+        self.nodes = nodes
+        self.metrics_endpoint = metrics_endpoint
+
+        self._lock = threading.Lock()
+        self._timestamps = array('d')
+        self._series: dict[SeriesKey, array] = {}
+        self._stopping = threading.Event()
+        self._thread = None
+        self._executor = None
+        self.error = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def start(self):
+        assert self._thread is None, "Recorder already started"
+        nodes = self.nodes if self.nodes is not None else self.redpanda.nodes
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max(1, len(nodes)))
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._thread_loop,
+                                        name="metrics-recorder",
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop recording, raising the error that stopped it if any"""
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._thread.join()
+        self._thread = None
+        self._executor.shutdown()
+        self._executor = None
+        if self.error is not None:
+            raise self.error
+
+    def _thread_loop(self):
+        next_scrape = time.monotonic()
+        while not self._stopping.is_set():
+            try:
+                self.scrape()
+            except Exception as e:
+                self.logger.error("Metrics recorder failed", exc_info=True)
+                self.error = e
+                return
+            next_scrape += self.interval_s
+            self._stopping.wait(max(0, next_scrape - time.monotonic()))
+
+    def _scrape_node(self, node) -> Optional[MetricsSnapshot]:
+        try:
+            return self.redpanda.metrics_snapshot([node],
+                                                  self.metrics_endpoint,
+                                                  self._sample_filter)
+        except Exception as e:
+            self.logger.debug(f"Recorder scrape of {node.name} failed: {e}")
+            return None
+
+    def scrape(self):
+        """Scrape all nodes once and append the result to the series"""
+        nodes = self.nodes if self.nodes is not None else self.redpanda.nodes
+        if self._executor is not None:
+            snapshots = list(self._executor.map(self._scrape_node, nodes))
+        else:
+            snapshots = [self._scrape_node(node) for node in nodes]
+        timestamp = time.time()
+
+        values = {}
+        for snapshot in snapshots:
+            if snapshot is None:
+                continue
+            for name in self.samples:
+                for s in snapshot.samples(name):
+                    key = SeriesKey(s.sample, s.node.name,
+                                    frozenset(s.labels.items()))
+                    values[key] = s.value
+
+        with self._lock:
+            scrapes = len(self._timestamps)
+            self._timestamps.append(timestamp)
+            for key, series in self._series.items():
+                series.append(values.pop(key, np.nan))
+            # Series seen for the first time
+            for key, value in values.items():
+                series = array('d', [np.nan]) * scrapes
+                series.append(value)
+                self._series[key] = series
+
+    def series(self,
+               sample: str,
+               labels: Optional[Mapping[str, str]] = None,
+               nodes=None) -> list[SeriesKey]:
+        """Keys of the recorded series of sample matching labels and nodes"""
+        node_names = None if nodes is None else {n.name for n in nodes}
+        labels = (labels or {}).items()
+        with self._lock:
+            keys = list(self._series.keys())
+        return [
+            k for k in keys if k.sample == sample and
+            (node_names is None or k.node in node_names) and labels <= k.labels
+        ]
+
+    def _arrays(self, sample: str, labels, nodes) -> tuple:
+        """Copies of the timestamps, and of the matching series as rows"""
+        keys = self.series(sample, labels, nodes)
+        with self._lock:
+            timestamps = np.array(self._timestamps)
+            rows = [np.array(self._series[k]) for k in keys]
+        if not rows:
+            return timestamps, np.empty((0, len(timestamps)))
+        return timestamps, np.vstack(rows)
+
+    def gauge(self,
+              sample: str,
+              labels: Optional[Mapping[str, str]] = None,
+              nodes=None) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Timestamps of the scrapes and the sum of the matching series at each
+        of them. NaN where none of the series was scraped.
+        """
+        timestamps, rows = self._arrays(sample, labels, nodes)
+        present = ~np.isnan(rows)
+        total = np.where(present, rows, 0).sum(axis=0)
+        total[~present.any(axis=0)] = np.nan
+        return timestamps, total
+
+    def counter(self,
+                sample: str,
+                labels: Optional[Mapping[str, str]] = None,
+                nodes=None) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Timestamps of the scrapes and the increase of the sum of the
+        matching counters since the first scrape.
+
+        A counter going down (its node restarted) counts as an increase by
+        its new value, and the increase over missed scrapes is accounted to
+        the scrape the counter is seen again, like Prometheus does.
+        """
+        timestamps, rows = self._arrays(sample, labels, nodes)
+        increase = np.zeros(len(timestamps))
+        for row in rows:
+            present = np.flatnonzero(~np.isnan(row))
+            if len(present) < 2:
+                continue
+            values = row[present]
+            deltas = np.diff(values)
+            deltas = np.where(deltas < 0, values[1:], deltas)
+            np.add.at(increase, present[1:], deltas)
+        return timestamps, np.cumsum(increase)
+
+    def rates(self,
+              sample: str,
+              labels: Optional[Mapping[str, str]] = None,
+              nodes=None) -> tuple[np.ndarray, np.ndarray]:
+        """Per second rate of a counter between each scrape and the previous one"""
+        timestamps, increase = self.counter(sample, labels, nodes)
+        return timestamps[1:], np.diff(increase) / np.diff(timestamps)
+
+    @staticmethod
+    def _window(timestamps: np.ndarray, window_s: Optional[float],
+                end: Optional[float]) -> slice:
+        """Indices of the scrapes within window_s seconds before end"""
+        stop = len(timestamps) if end is None else np.searchsorted(
+            timestamps, end, side='right')
+        if window_s is None or stop == 0:
+            return slice(0, stop)
+        start = np.searchsorted(timestamps,
+                                timestamps[stop - 1] - window_s,
+                                side='left')
+        return slice(start, stop)
+
+    def rate(self,
+             sample: str,
+             window_s: Optional[float] = None,
+             labels: Optional[Mapping[str, str]] = None,
+             nodes=None,
+             end: Optional[float] = None) -> Optional[float]:
+        """
+        Average per second rate of a counter over the last window_s seconds
+        before end (the last scrape by default), or over the whole
+        recording. None without two scrapes in the window.
+        """
+        timestamps, increase = self.counter(sample, labels, nodes)
+        w = self._window(timestamps, window_s, end)
+        if w.stop - w.start < 2:
+            return None
+        return (increase[w.stop - 1] - increase[w.start]) / (
+            timestamps[w.stop - 1] - timestamps[w.start])
+
+    def window_average(self,
+                       sample: str,
+                       window_s: Optional[float] = None,
+                       labels: Optional[Mapping[str, str]] = None,
+                       nodes=None,
+                       end: Optional[float] = None) -> Optional[float]:
+        """Mean of a gauge over the scrapes of the window, see rate()"""
+        timestamps, total = self.gauge(sample, labels, nodes)
+        values = total[self._window(timestamps, window_s, end)]
+        values = values[~np.isnan(values)]
+        return float(values.mean()) if len(values) else None
+
+    def percentile(self,
+                   sample: str,
+                   q: float,
+                   window_s: Optional[float] = None,
+                   labels: Optional[Mapping[str, str]] = None,
+                   nodes=None,
+                   end: Optional[float] = None,
+                   rate: bool = False) -> Optional[float]:
+        """
+        q-th percentile (0-100) of a gauge over the scrapes of the window,
+        or of the per scrape rates of a counter if rate is set.
+        """
+        if rate:
+            timestamps, values = self.rates(sample, labels, nodes)
+        else:
+            timestamps, values = self.gauge(sample, labels, nodes)
+        values = values[self._window(timestamps, window_s, end)]
+        values = values[~np.isnan(values)]
+        return float(np.percentile(values, q)) if len(values) else None
+
+    def sustained_rate(self,
+                       sample: str,
+                       target: RateTarget,
+                       labels: Optional[Mapping[str, str]] = None,
+                       nodes=None,
+                       since: Optional[float] = None) -> Optional[tuple]:
+        """
+        First scrape at which the average rate of a counter over at least
+        the last target.target_sec seconds, all after since, was within the
+        target range. Returns (timestamp, rate, seconds) or None.
+        """
+        timestamps, increase = self.counter(sample, labels, nodes)
+        if since is not None:
+            first = np.searchsorted(timestamps, since, side='left')
+            timestamps, increase = timestamps[first:], increase[first:]
+        # For each scrape, the latest one at least target_sec older
+        starts = np.searchsorted(
+            timestamps, timestamps - target.target_sec, side='right') - 1
+        ends = np.flatnonzero(starts >= 0)
+        if len(ends) == 0:
+            return None
+        starts = starts[ends]
+        seconds = timestamps[ends] - timestamps[starts]
+        rates = (increase[ends] - increase[starts]) / seconds
+        met = np.flatnonzero((rates >= target.target_min_rate)
+                             & (rates <= target.target_max_rate))
+        if len(met) == 0:
+            return None
+        i = met[0]
+        return timestamps[ends[i]], float(rates[i]), float(seconds[i])
+
+    def expect_rate(self,
+                    sample: str,
+                    target: RateTarget,
+                    labels: Optional[Mapping[str, str]] = None,
+                    nodes=None,
+                    units: str = "bytes"):
+        """
+        Like ExpectRate.expect_rate, but from the recorded series: wait for
+        the rate of a counter to stay within the target range for
+        target.target_sec seconds, counting from now.
+        """
+        since = time.time()
+        deadline = since + target.max_total_sec
+        while True:
+            if self.error is not None:
+                raise self.error
+            met = self.sustained_rate(sample, target, labels, nodes, since)
+            if met is not None:
+                _, rate, seconds = met
+                self.logger.info(f"Rate target met: {rate:.1f} {units}/sec " +
+                                 f"over the last {seconds:.3f} sec.")
+                return
+            if time.time() > deadline:
+                raise RuntimeError("Unable to attain target rate in time.")
+            time.sleep(self.interval_s)
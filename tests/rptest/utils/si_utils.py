@@ -12,10 +12,11 @@ import io
 import pprint
 import struct
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
 from collections import defaultdict, namedtuple
 from enum import Enum
-from typing import Sequence, Optional, NewType, NamedTuple, Iterator
+from typing import Any, Sequence, Optional, NewType, NamedTuple, Iterator
 
 import xxhash
 
@@ -34,6 +35,13 @@ default_log_segment_size = 1048576  # 1MB
 
 DEFAULT_OFFSET = -9223372036854775808
 
+# Number of manifests that BucketView downloads and decodes concurrently
+MANIFEST_FETCH_CONCURRENCY = 16
+
+# Bounds of the ranged reads of a RemoteObjectStream
+REMOTE_READ_MIN_BLOCK = 64 * 1024
+REMOTE_READ_MAX_BLOCK = 16 * 1024 * 1024
+
 
 class NT(NamedTuple):
     ns: str
@@ -185,6 +193,13 @@ class SegmentReader:
     def __init__(self, stream):
         self.stream = stream
 
+        # Batch bodies are skipped with a seek when the stream allows it
+        self.size = None
+        if stream.seekable():
+            pos = stream.tell()
+            self.size = stream.seek(0, io.SEEK_END)
+            stream.seek(pos)
+
     def read_batch(self):
         data = self.stream.read(self.HEADER_SIZE)
         if len(data) == self.HEADER_SIZE:
@@ -192,6 +207,11 @@ class SegmentReader:
             if all(map(lambda v: v == 0, header)):
                 return None
             records_size = header.batch_size - self.HEADER_SIZE
+            if self.size is not None:
+                if self.stream.tell() + records_size > self.size:
+                    return None
+                self.stream.seek(records_size, io.SEEK_CUR)
+                return header
             data = self.stream.read(records_size)
             if len(data) < records_size:
                 return None
@@ -209,6 +229,72 @@ class SegmentReader:
             yield it
 
 
+class RemoteObjectStream:
+    """
+    Read only, seekable stream of an object in the bucket, read with ranged
+    GETs. Reads that follow on from the previous one fetch twice as much
+    each time, up to `max_block`, so that reading a whole object takes few
+    requests, while one skipping large ranges only fetches a `min_block`
+    around each read.
+    """
+    def __init__(self,
+                 client,
+                 bucket: str,
+                 key: str,
+                 size: int,
+                 min_block: int = REMOTE_READ_MIN_BLOCK,
+                 max_block: int = REMOTE_READ_MAX_BLOCK):
+        self.client = client
+        self.bucket = bucket
+        self.key = key
+        self.size = size
+        self.min_block = min_block
+        self.max_block = max_block
+        self.requests = 0
+        self._block = min_block
+        self._buf = b''
+        self._buf_start = 0
+        self._pos = 0
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += self.size
+        self._pos = offset
+        return self._pos
+
+    def read(self, n: int = -1) -> bytes:
+        end = self.size if n < 0 else min(self._pos + n, self.size)
+        if self._pos >= end:
+            return b''
+
+        buf_end = self._buf_start + len(self._buf)
+        if self._pos < self._buf_start or end > buf_end:
+            follows_on = self._buf_start <= self._pos < buf_end + self._block
+            if self.requests and follows_on:
+                self._block = min(2 * self._block, self.max_block)
+            else:
+                self._block = self.min_block
+            length = min(max(end - self._pos, self._block),
+                         self.size - self._pos)
+            self._buf = self.client.get_object_range(self.bucket, self.key,
+                                                     self._pos, length)
+            self._buf_start = self._pos
+            self.requests += 1
+
+        start = self._pos - self._buf_start
+        data = self._buf[start:start + end - self._pos]
+        self._pos += len(data)
+        return data
+
+
 def make_segment_summary(ntpr: NTPR, reader: SegmentReader) -> SegmentSummary:
     """Read/parse segment and produce the summary"""
     epoch: int = 0
@@ -260,6 +346,16 @@ def make_segment_summary(ntpr: NTPR, reader: SegmentReader) -> SegmentSummary:
                           size_bytes=size_bytes)
 
 
+def make_remote_segment_summary(client, bucket: str, o: ObjectMetadata,
+                                ntpr: NTPR) -> SegmentSummary:
+    """
+    Summary of a segment in the bucket, reading its batch headers with
+    ranged GETs rather than downloading it.
+    """
+    stream = RemoteObjectStream(client, bucket, o.key, o.content_length)
+    return make_segment_summary(ntpr, SegmentReader(stream))
+
+
 def parse_s3_manifest_path(path: str) -> NTPR:
     """Parse S3 manifest path. Return ntp and revision.
     Sample name: 50000000/meta/kafka/panda-topic/0_19/manifest.json
@@ -790,7 +886,9 @@ class BucketView:
     def __init__(self,
                  redpanda,
                  topics: Optional[Sequence[TopicSpec]] = None,
-                 scan_segments: bool = False):
+                 scan_segments: bool = False,
+                 fetch_concurrency: int = MANIFEST_FETCH_CONCURRENCY,
+                 incremental: bool = False):
         """
         Always construct this with a `redpanda` -- the explicit logger/bucket/client
         arguments are only here to enable the structure of topic_recovery_test.py to work,
@@ -799,6 +897,10 @@ class BucketView:
         :param redpanda: a RedpandaService, whose SISettings we will use
         :param topics: optional list of topics to filter result to
         :param scan_segments: optional flag that indicates that segments has to be parsed
+        :param fetch_concurrency: how many manifests to download at once while listing
+        :param incremental: keep what listings decoded from objects across reset(),
+                            keyed on the objects' ETag and size, so that the next
+                            listing only downloads the objects that are new or changed
         """
         self.redpanda = redpanda
         self.logger = redpanda.logger
@@ -812,13 +914,33 @@ class BucketView:
 
         self._state = BucketViewState()
         self._scan_segments = scan_segments
+        self._fetch_concurrency = fetch_concurrency
+
+        # In incremental mode, key -> ((etag, size), decoded object) for the
+        # objects of the last listing, and of the listing in progress.
+        self._object_cache: Optional[dict[str, tuple[tuple[str, int],
+                                                     Any]]] = None
+        self._listing_cache: Optional[dict] = None
+        if incremental:
+            self._object_cache = {}
 
     def reset(self):
         """
-        Drop all cached state, so that subsequent calls will use fresh data
+        Drop all cached state, so that subsequent calls will use fresh data.
+        In incremental mode, what was decoded from objects is kept, to be
+        reused by the next listing for the objects that did not change.
         """
         self._state = BucketViewState()
 
+    def refresh(self):
+        """
+        Drop all cached state and list the bucket again. In incremental mode
+        only the objects that are new or changed since the last listing are
+        downloaded.
+        """
+        self.reset()
+        self._ensure_listing()
+
     def ntp_to_ntpr(self, ntp: NTP) -> NTPR:
         """
         Raises KeyError if the NTP is not found
@@ -917,36 +1039,105 @@ class BucketView:
             self._do_listing()
             self._state.listed = True
 
+    def _cached_object(self, o: ObjectMetadata) -> Optional[Any]:
+        """
+        In incremental mode, what the last listing decoded from `o`, if it
+        did not change since. The result is kept for the next listing.
+        """
+        if self._listing_cache is None:
+            return None
+        entry = self._object_cache.get(o.key)
+        if entry is None or entry[0] != (o.etag, o.content_length):
+            return None
+        self._listing_cache[o.key] = entry
+        return entry[1]
+
+    def _cache_object(self, o: ObjectMetadata, value: Any):
+        if self._listing_cache is not None:
+            self._listing_cache[o.key] = ((o.etag, o.content_length), value)
+
+    def _fetch(self, executor: ThreadPoolExecutor, o: ObjectMetadata, fn,
+               *args) -> Future:
+        """Future of fn(*args), what is decoded from `o`, unless cached"""
+        value = self._cached_object(o)
+        if value is None:
+            return executor.submit(fn, *args)
+        future = Future()
+        future.set_result(value)
+        return future
+
     def _do_listing(self):
-        for o in self.client.list_objects(self.bucket):
-            self.logger.debug(f"Loading object {o.key}")
-            if self.path_matcher.is_partition_manifest(o):
-                ntpr = parse_s3_manifest_path(o.key)
-                self._load_manifest(ntpr, o.key)
-            elif self.path_matcher.is_spillover_manifest(o):
-                ntpr = parse_s3_manifest_path(o.key)
-                self._load_spillover_manifest(ntpr, o.key)
-            elif self.path_matcher.is_segment(o):
-                self.logger.debug(f"Object {o.key} is a segment")
-                self._state.segment_objects += 1
-                if self._scan_segments:
-                    spc = parse_s3_segment_path(o.key)
-                    self._add_segment_metadata(o.key, spc)
-            elif self.path_matcher.is_topic_manifest(o):
-                pass
-            elif self.path_matcher.is_tx_manifest(o):
-                self._state.tx_manifests += 1
-            elif self.path_matcher.is_segment_index(o):
-                self._state.segment_indexes += 1
-            elif self.path_matcher.is_cluster_metadata_manifest(o):
-                self._load_cluster_metadata_manifest(o.key)
-            elif self.path_matcher.is_controller_snapshot(o):
-                self._load_controller_snapshot_size(o.key)
-            else:
-                self._state.ignored_objects += 1
+        # Manifests, and segment summaries if scanning segments, are fetched
+        # and decoded in the background while the listing continues. Results
+        # are stored in listing order, and at most `max_pending` are held at
+        # once.
+        pending = collections.deque()
+        max_pending = 4 * self._fetch_concurrency
+
+        def store_pending(limit):
+            while len(pending) > limit:
+                store, args, o, future = pending.popleft()
+                value = future.result()
+                self._cache_object(o, value)
+                store(*args, value)
+
+        if self._object_cache is not None:
+            self._listing_cache = {}
+        with ThreadPoolExecutor(
+                max_workers=self._fetch_concurrency) as executor:
+            for o in self.client.list_objects_parallel(self.bucket):
+                self.logger.debug(f"Loading object {o.key}")
+                if self.path_matcher.is_partition_manifest(o):
+                    ntpr = parse_s3_manifest_path(o.key)
+                    pending.append(
+                        (self._store_manifest, (ntpr, ), o,
+                         self._fetch(executor, o, self._get_manifest, ntpr,
+                                     o.key)))
+                    store_pending(max_pending)
+                elif self.path_matcher.is_spillover_manifest(o):
+                    ntpr = parse_s3_manifest_path(o.key)
+                    pending.append(
+                        (self._store_spillover_manifest, (ntpr, o.key), o,
+                         self._fetch(executor, o, self._get_manifest, ntpr,
+                                     o.key)))
+                    store_pending(max_pending)
+                else:
+                    self._count_object(o)
+                    if self._scan_segments and self.path_matcher.is_segment(o):
+                        spc = parse_s3_segment_path(o.key)
+                        pending.append(
+                            (self._store_segment_summary, (spc, ), o,
+                             self._fetch(executor, o,
+                                         make_remote_segment_summary,
+                                         self.client, self.bucket, o,
+                                         spc.ntpr)))
+                        store_pending(max_pending)
+            store_pending(0)
+        if self._listing_cache is not None:
+            # Objects gone from the bucket are dropped from the cache
+            self._object_cache = self._listing_cache
+            self._listing_cache = None
         if self._scan_segments:
             self._sort_segment_summaries()
 
+    def _count_object(self, o: ObjectMetadata):
+        """Account for a listed object that is not a partition manifest"""
+        if self.path_matcher.is_segment(o):
+            self.logger.debug(f"Object {o.key} is a segment")
+            self._state.segment_objects += 1
+        elif self.path_matcher.is_topic_manifest(o):
+            pass
+        elif self.path_matcher.is_tx_manifest(o):
+            self._state.tx_manifests += 1
+        elif self.path_matcher.is_segment_index(o):
+            self._state.segment_indexes += 1
+        elif self.path_matcher.is_cluster_metadata_manifest(o):
+            self._load_cluster_metadata_manifest(o)
+        elif self.path_matcher.is_controller_snapshot(o):
+            self._load_controller_snapshot_size(o)
+        else:
+            self._state.ignored_objects += 1
+
     def _sort_segment_summaries(self):
         """Sort segment summary lists by base offset"""
         res = {}
@@ -1002,21 +1193,25 @@ class BucketView:
         else:
             manifest = json.loads(data)
 
+        self.logger.debug(
+            f"Loaded manifest {path} for {ntpr}: {json.dumps(manifest)}")
+
         return manifest
 
     def _load_manifest(self, ntpr: NTPR, path: Optional[str] = None) -> dict:
-        manifest = self._get_manifest(ntpr, path)
-        self._state.partition_manifests[ntpr.to_ntp()] = manifest
-
-        self.logger.debug(
-            f"Loaded manifest for {ntpr}: {pprint.pformat(manifest, indent=2)}"
-        )
+        return self._store_manifest(ntpr, self._get_manifest(ntpr, path))
 
+    def _store_manifest(self, ntpr: NTPR, manifest: dict) -> dict:
+        self._state.partition_manifests[ntpr.to_ntp()] = manifest
         return manifest
 
     def _load_spillover_manifest(self, ntpr: NTPR,
                                  path: str) -> tuple[SpillMeta, dict]:
-        manifest = self._get_manifest(ntpr, path)
+        return self._store_spillover_manifest(ntpr, path,
+                                              self._get_manifest(ntpr, path))
+
+    def _store_spillover_manifest(self, ntpr: NTPR, path: str,
+                                  manifest: dict) -> tuple[SpillMeta, dict]:
         ntp = ntpr.to_ntp()
 
         if ntp not in self._state.spillover_manifests:
@@ -1024,25 +1219,14 @@ class BucketView:
 
         meta = SpillMeta.make(ntpr, path)
         self._state.spillover_manifests[ntp][meta] = manifest
-
-        self.logger.debug(
-            f"Loaded spillover manifest for {ntpr}: {pprint.pformat(manifest, indent=2)}"
-        )
-
         return meta, manifest
 
-    def _add_segment_metadata(self, path, spc: SegmentPathComponents):
-        if path.endswith(".index"):
-            return
-        if path.endswith(".tx"):
-            return
-        self.logger.debug(f"Parsing segment {spc} at {path}")
+    def _store_segment_summary(self, spc: SegmentPathComponents,
+                               summary: SegmentSummary):
+        self.logger.debug(f"Parsed segment {spc}: {summary}")
         ntp = spc.ntpr.to_ntp()
         if ntp not in self._state.segment_summaries:
             self._state.segment_summaries[ntp] = []
-        payload = self.client.get_object_data(self.bucket, path)
-        reader = SegmentReader(io.BytesIO(payload))
-        summary = make_segment_summary(spc.ntpr, reader)
         self._state.segment_summaries[ntp].append(summary)
 
     def _discover_spillover_manifests(self, ntpr: NTPR) -> list[SpillMeta]:
@@ -1059,15 +1243,20 @@ class BucketView:
 
         return sorted(spill_metas)
 
-    def _load_cluster_metadata_manifest(self, path: str) -> dict:
-        try:
-            data = self.client.get_object_data(self.bucket, path)
-        except Exception as e:
-            self.logger.debug(f"Exception loading {path}: {e}")
-            raise KeyError(f"Cluster manifest at {path} failed to load")
-        manifest = json.loads(data)
-        self.logger.debug(
-            f"Loaded cluster manifest at {path}: {pprint.pformat(manifest)}")
+    def _load_cluster_metadata_manifest(self, o: ObjectMetadata) -> dict:
+        path = o.key
+        manifest = self._cached_object(o)
+        if manifest is None:
+            try:
+                data = self.client.get_object_data(self.bucket, path)
+            except Exception as e:
+                self.logger.debug(f"Exception loading {path}: {e}")
+                raise KeyError(f"Cluster manifest at {path} failed to load")
+            manifest = json.loads(data)
+            self.logger.debug(
+                f"Loaded cluster manifest at {path}: {pprint.pformat(manifest)}"
+            )
+            self._cache_object(o, manifest)
         cluster_uuid, meta_id = parse_cluster_metadata_manifest_path(path)
         if cluster_uuid not in self._state.cluster_metadata:
             self._state.cluster_metadata[cluster_uuid] = ClusterMetadata(
@@ -1076,13 +1265,17 @@ class BucketView:
             meta_id] = manifest
         return manifest
 
-    def _load_controller_snapshot_size(self, path: str) -> int:
-        try:
-            meta = self.client.get_object_meta(self.bucket, path)
-        except Exception as e:
-            self.logger.debug(f"Exception loading {path}: {e}")
-            raise KeyError(f"Cluster manifest at {path} failed to load")
-        self.logger.debug(f"Loaded controller snapshot at {path}: {meta}")
+    def _load_controller_snapshot_size(self, o: ObjectMetadata) -> int:
+        path = o.key
+        meta = self._cached_object(o)
+        if meta is None:
+            try:
+                meta = self.client.get_object_meta(self.bucket, path)
+            except Exception as e:
+                self.logger.debug(f"Exception loading {path}: {e}")
+                raise KeyError(f"Cluster manifest at {path} failed to load")
+            self.logger.debug(f"Loaded controller snapshot at {path}: {meta}")
+            self._cache_object(o, meta)
         cluster_uuid, offset = parse_controller_snapshot_path(path)
         if cluster_uuid not in self._state.cluster_metadata:
             self._state.cluster_metadata[cluster_uuid] = ClusterMetadata(
@@ -1150,8 +1343,15 @@ class BucketView:
             ntpr = self.ntp_to_ntpr(ntp)
 
         spills = self._discover_spillover_manifests(ntpr)
-        for spill in spills:
-            self._load_spillover_manifest(spill.ntpr, spill.path)
+        if spills:
+            with ThreadPoolExecutor(max_workers=min(len(
+                    spills), self._fetch_concurrency)) as executor:
+                manifests = executor.map(
+                    lambda spill: self._get_manifest(spill.ntpr, spill.path),
+                    spills)
+                for spill, manifest in zip(spills, manifests):
+                    self._store_spillover_manifest(spill.ntpr, spill.path,
+                                                   manifest)
 
         if ntp in self._state.spillover_manifests:
             return self._state.spillover_manifests[ntp]
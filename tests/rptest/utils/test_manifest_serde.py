@@ -0,0 +1,77 @@
+# Copyright 2023 Redpanda Data, Inc.
+#
+# Use of this software is governed by the Business Source License
+# included in the file licenses/BSL.md
+#
+# As of the Change Date specified in that file, in accordance with
+# the Business Source License, use of this software will be governed
+# by the Apache License, Version 2.0
+"""
+Checks of the serde manifest decoder against the binary manifests the
+rp-storage-tool tests decode (tools/rp_storage_tool/src/remote_types.rs).
+
+Usage: python -m pytest rptest/utils/test_manifest_serde.py
+"""
+
+import os
+
+from rptest.utils.manifest_serde import decode_partition_manifest
+
+RESOURCES = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                         "../../../tools/rp_storage_tool/resources/test")
+
+
+def decode(name: str) -> dict:
+    with open(os.path.join(RESOURCES, name), "rb") as f:
+        return decode_partition_manifest(f.read())
+
+
+def test_binary_manifest_decode():
+    manifest = decode("manifest_23_2_binary.bin")
+    assert manifest["namespace"] == "kafka"
+    assert manifest["topic"] == "test"
+    assert manifest["partition"] == 0
+    assert manifest["revision"] == 8
+    assert len(manifest["segments"]) == 3654
+    assert "start_kafka_offset" not in manifest
+
+
+def test_binary_manifest_decode_2():
+    # Values large enough to trigger a previously fixed DeltaFOR bug
+    manifest = decode("manifest_23_2_binary_2.bin")
+    assert manifest["namespace"] == "kafka"
+    assert manifest["topic"] == "topic-lppzmjltwl"
+    assert manifest["partition"] == 5
+    assert manifest["revision"] == 51
+    assert len(manifest["segments"]) == 97
+    assert manifest["segments"]["1225-1-v1.log"]["size_bytes"] == 1573496
+    assert "start_kafka_offset" not in manifest
+
+
+def test_binary_manifest_decode_start_kafka_offset():
+    manifest = decode("manifest_23_2_start_kafka_offset.bin")
+    assert manifest["namespace"] == "test-ns"
+    assert manifest["topic"] == "test-topic"
+    assert manifest["partition"] == 42
+    assert manifest["revision"] == 0
+    assert len(manifest["segments"]) == 4
+    assert manifest["start_kafka_offset"] == 80
+
+
+def test_manifest_with_replaced_segments():
+    manifest = decode("manifest_with_replaced_segments.bin")
+    assert manifest["version"] == 2
+    assert manifest["namespace"] == "kafka"
+    assert manifest["topic"] == "test-topic"
+
+    replaced = manifest["replaced"]
+    assert replaced["6756-1-v1.log"]["base_offset"] == 6756
+    assert replaced["6756-1-v1.log"]["sname_format"] == 3
+    assert replaced["6889-1-v1.log"]["base_offset"] == 6889
+    assert replaced["6889-1-v1.log"]["sname_format"] == 3
+
+    assert manifest["cloud_log_size_bytes"] == 225998141
+    assert manifest["start_offset"] == 0
+    assert manifest["last_offset"] == 7017
+    # Left out when unset (INT64_MIN), like rp-storage-tool does
+    assert "last_uploaded_compacted_offset" not in manifest
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark of record decoding on a synthetic segment: the original
+stream based Reader loop against the offset based decode_records engine.
+
+Usage: python bench_reader.py [--batches N] [--records N] [--value-size N]
+"""
+import argparse
+import struct
+import timeit
+from io import BytesIO, BufferedReader
+
+from reader import Reader, decode_records
+
+
+def encode_varint(v):
+    v = (v << 1) ^ (v >> 63)
+    out = bytearray()
+    while v >= 0x80:
+        out.append((v & 0x7f) | 0x80)
+        v >>= 7
+    out.append(v)
+    return bytes(out)
+
+
+def encode_record(i, key, value, headers):
+    body = bytes([0]) + encode_varint(i * 3) + encode_varint(i)
+    body += encode_varint(len(key)) + key
+    body += encode_varint(len(value)) + value
+    body += encode_varint(len(headers))
+    for k, v in headers:
+        body += encode_varint(len(k)) + k + encode_varint(len(v)) + v
+    return encode_varint(len(body)) + body
+
+
+def synthetic_segment(batches, records, value_size):
+    """List of (record_count, payload) for batches of synthetic records"""
+    ret = []
+    for b in range(batches):
+        payload = b''.join(
+            encode_record(i, b'key-%d-%d' % (b, i), b'v' *
+                          value_size, [(b'h', b'%d' % i)])
+            for i in range(records))
+        ret.append((records, payload))
+    return ret
+
+
+class LegacyReader:
+    """The Reader decoding primitives as they were before STRUCTS"""
+    def __init__(self, stream):
+        self.stream = BufferedReader(stream)
+
+    def read_varint(self):
+        shift = 0
+        result = 0
+        while True:
+            i = ord(self.stream.read(1))
+            if i & 128:
+                result |= ((i & 0x7f) << shift)
+            else:
+                result |= i << shift
+                break
+            shift += 7
+        return Reader._decode_zig_zag(result)
+
+    def with_endianness(self, str):
+        return f"<{str}"
+
+    def read_int8(self):
+        return struct.unpack(self.with_endianness('b'), self.stream.read(1))[0]
+
+    def read_bytes(self, length):
+        return self.stream.read(length)
+
+
+def decode_with(reader_type, segment):
+    n = 0
+    for record_count, payload in segment:
+        rdr = reader_type(BytesIO(payload))
+        for _ in range(record_count):
+            rdr.read_varint()
+            rdr.read_int8()
+            rdr.read_varint()
+            rdr.read_varint()
+            key_length = rdr.read_varint()
+            key = rdr.read_bytes(key_length) if key_length > 0 else None
+            value_length = rdr.read_varint()
+            value = rdr.read_bytes(value_length) if value_length > 0 else None
+            for _ in range(rdr.read_varint()):
+                rdr.read_bytes(rdr.read_varint())
+                rdr.read_bytes(rdr.read_varint())
+            n += 1
+    return n
+
+
+def decode_with_engine(segment, as_view):
+    n = 0
+    for record_count, payload in segment:
+        if as_view:
+            payload = memoryview(payload)
+        n += len(decode_records(payload, record_count))
+    return n
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--batches', type=int, default=2000)
+    parser.add_argument('--records', type=int, default=50)
+    parser.add_argument('--value-size', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=3)
+    options = parser.parse_args()
+
+    segment = synthetic_segment(options.batches, options.records,
+                                options.value_size)
+    total = options.batches * options.records
+    size = sum(len(p) for _, p in segment)
+    print(f"{total} records, {size / 2**20:.1f} MiB of payload")
+
+    candidates = [
+        ("legacy Reader", lambda: decode_with(LegacyReader, segment)),
+        ("Reader", lambda: decode_with(Reader, segment)),
+        ("decode_records(bytes)",
+         lambda: decode_with_engine(segment, as_view=False)),
+        ("decode_records(memoryview)",
+         lambda: decode_with_engine(segment, as_view=True)),
+    ]
+    baseline = None
+    for name, fn in candidates:
+        assert fn() == total
+        elapsed = min(timeit.repeat(fn, number=1, repeat=options.repeat))
+        baseline = baseline or elapsed
+        print(f"{name:>28}: {elapsed:7.3f}s {total / elapsed:12.0f} rec/s "
+              f"{baseline / elapsed:5.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,191 @@
+import collections
+import logging
+import struct
+import zlib
+
+from storage import Batch, RecordIter
+
+logger = logging.getLogger('compression')
+
+CompressionType = Batch.CompressionType
+
+# size of the chunks decompressed in one go by the streaming decompressors
+CHUNK_SIZE = 64 * 1024
+
+# upper bound of decompressed payload bytes kept around by a stage
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+
+# see compression/internal/snappy_java_compressor.cc
+SNAPPY_JAVA_MAGIC = b'\x82SNAPPY\x00'
+SNAPPY_JAVA_HEADER_SIZE = len(SNAPPY_JAVA_MAGIC) + 8
+SNAPPY_JAVA_BLOCK_LEN = struct.Struct(">i")
+
+
+class UnsupportedCompressionError(Exception):
+    def __init__(self, compression):
+        super().__init__(f"unsupported compression: {compression.name}")
+        self.compression = compression
+
+
+class Decompressor:
+    """
+    Decompressor of one codec. Instances are reused across batches so any
+    expensive context should be created once, in the constructor.
+    """
+    def decompress_into(self, data, out):
+        """Append the decompressed form of data to the bytearray out"""
+        raise NotImplementedError()
+
+
+class GzipDecompressor(Decompressor):
+    def decompress_into(self, data, out):
+        # + 32 detects either of the gzip or zlib headers
+        d = zlib.decompressobj(wbits=zlib.MAX_WBITS + 32)
+        out += d.decompress(data, CHUNK_SIZE)
+        while d.unconsumed_tail:
+            out += d.decompress(d.unconsumed_tail, CHUNK_SIZE)
+        out += d.flush()
+
+
+class ZstdDecompressor(Decompressor):
+    def __init__(self):
+        import zstandard
+        self.dctx = zstandard.ZstdDecompressor()
+        self.chunk = memoryview(bytearray(CHUNK_SIZE))
+
+    def decompress_into(self, data, out):
+        with self.dctx.stream_reader(data) as reader:
+            while True:
+                n = reader.readinto(self.chunk)
+                if n == 0:
+                    break
+                out += self.chunk[:n]
+
+
+class Lz4Decompressor(Decompressor):
+    def __init__(self):
+        import lz4.frame
+        self.decompressor_type = lz4.frame.LZ4FrameDecompressor
+
+    def decompress_into(self, data, out):
+        d = self.decompressor_type()
+        out += d.decompress(data, max_length=CHUNK_SIZE)
+        while not d.eof and not d.needs_input:
+            out += d.decompress(b'', max_length=CHUNK_SIZE)
+
+
+class SnappyDecompressor(Decompressor):
+    """
+    Handles both raw snappy and the xerial framing used by the java client
+    """
+    def __init__(self):
+        import snappy
+        self.uncompress = snappy.uncompress
+
+    def decompress_into(self, data, out):
+        data = memoryview(data)
+        if bytes(data[:len(SNAPPY_JAVA_MAGIC)]) != SNAPPY_JAVA_MAGIC:
+            out += self.uncompress(data)
+            return
+        pos = SNAPPY_JAVA_HEADER_SIZE
+        while pos < len(data):
+            block_len = SNAPPY_JAVA_BLOCK_LEN.unpack_from(data, pos)[0]
+            pos += SNAPPY_JAVA_BLOCK_LEN.size
+            out += self.uncompress(data[pos:pos + block_len])
+            pos += block_len
+
+
+DECOMPRESSORS = {
+    CompressionType.gzip: GzipDecompressor,
+    CompressionType.snappy: SnappyDecompressor,
+    CompressionType.lz4: Lz4Decompressor,
+    CompressionType.zstd: ZstdDecompressor,
+}
+
+
+def register_decompressor(compression, factory):
+    """Install or replace the Decompressor factory used for a codec"""
+    DECOMPRESSORS[compression] = factory
+
+
+class DecompressionStage:
+    """
+    Turns batch payloads into decompressed record payloads. Decompression
+    streams into one reusable buffer and the results are kept in a size
+    bounded LRU cache, so a batch visited again is not decompressed twice.
+    """
+    def __init__(self, max_cache_bytes=DEFAULT_CACHE_BYTES):
+        self.max_cache_bytes = max_cache_bytes
+        self.decompressors = {}
+        self.buffer = bytearray()
+        self.cache = collections.OrderedDict()
+        self.cache_bytes = 0
+
+    def _decompressor(self, compression):
+        d = self.decompressors.get(compression)
+        if d is None:
+            factory = DECOMPRESSORS.get(compression)
+            if factory is None:
+                raise UnsupportedCompressionError(compression)
+            try:
+                d = factory()
+            except ImportError as e:
+                logger.error(
+                    f"missing module for {compression.name} decompression: {e}"
+                )
+                raise UnsupportedCompressionError(compression)
+            self.decompressors[compression] = d
+        return d
+
+    def _cache_get(self, key):
+        payload = self.cache.get(key)
+        if payload is not None:
+            self.cache.move_to_end(key)
+        return payload
+
+    def _cache_put(self, key, payload):
+        if len(payload) > self.max_cache_bytes:
+            return
+        self.cache[key] = payload
+        self.cache_bytes += len(payload)
+        while self.cache_bytes > self.max_cache_bytes:
+            _, evicted = self.cache.popitem(last=False)
+            self.cache_bytes -= len(evicted)
+
+    def payload(self, batch):
+        """Records payload of the batch, decompressed if needed"""
+        compression = Batch.CompressionType(batch.header.attrs
+                                            & Batch.compression_mask)
+        if compression == CompressionType.none:
+            return batch.records
+
+        # the crc covers the whole batch, together with the offset it
+        # identifies a batch across segment scans
+        key = (batch.header.base_offset, batch.header.crc,
+               batch.header.batch_size)
+        payload = self._cache_get(key)
+        if payload is None:
+            del self.buffer[:]
+            self._decompressor(compression).decompress_into(
+                batch.records, self.buffer)
+            payload = bytes(self.buffer)
+            self._cache_put(key, payload)
+        return payload
+
+    def records(self, batch):
+        """Iterate the records of a possibly compressed batch"""
+        payload = self.payload(batch)
+        if isinstance(batch.records, memoryview):
+            payload = memoryview(payload)
+        return RecordIter(batch.header.record_count, payload)
+
+
+_default_stage = None
+
+
+def default_stage():
+    """Per process stage shared by the log decoders"""
+    global _default_stage
+    if _default_stage is None:
+        _default_stage = DecompressionStage()
+    return _default_stage
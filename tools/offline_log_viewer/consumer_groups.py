@@ -106,6 +106,9 @@ class GroupsLog:
         self.records = []
 
     def decode(self):
+        self.records.extend(self)
+
+    def __iter__(self):
         paths = []
         for path in self.ntp.segments:
             paths.append(path)
@@ -116,4 +119,4 @@ class GroupsLog:
                 if b.header.type != 1:
                     continue
                 for r in b:
-                    self.records.append(decode_record(b.header, r))
+                    yield decode_record(b.header, r)
@@ -110,6 +110,9 @@ class OffsetsLog:
         self.records = []
 
     def decode(self):
+        self.records.extend(self)
+
+    def __iter__(self):
         paths = []
         for path in self.ntp.segments:
             paths.append(path)
@@ -120,4 +123,4 @@ class OffsetsLog:
                 if b.header.type != 1:
                     continue
                 for r in b:
-                    self.records.append(decode_record(b.header, r))
+                    yield decode_record(b.header, r)
@@ -900,7 +900,9 @@ class ControllerLog:
 
     def __iter__(self):
         for path in self.ntp.segments:
-            s = Segment(path)
-            for b in s:
-                for r in b:
-                    yield decode_record(b, r, self.bin_dump)
+            yield from self.decode_segment(path)
+
+    def decode_segment(self, path):
+        for b in Segment(path):
+            for r in b:
+                yield decode_record(b, r, self.bin_dump)
@@ -1,4 +1,6 @@
-from storage import Segment, BatchType
+from storage import Segment, BatchType, CrcMode, segment_base_offset
+from offset_index import IndexCache, segment_index
+from compression import default_stage
 from enum import Enum, IntEnum
 from io import BytesIO
 from reader import Reader
@@ -98,9 +100,32 @@ def decode_record(batch, header, record):
 
 
 class KafkaLog:
-    def __init__(self, ntp, headers_only):
+    """
+    Decoder of a kafka partition log. offsets and timestamps optionally
+    restrict decoding to batches overlapping an inclusive (start, end)
+    range, either bound may be None. Segments are entered at the position
+    given by their index instead of being decoded from the start.
+
+    Compressed batches are expanded by the decompression stage, the per
+    process default one unless given.
+    """
+    def __init__(self,
+                 ntp,
+                 headers_only,
+                 use_mmap=False,
+                 offsets=None,
+                 timestamps=None,
+                 index_cache=None,
+                 crc_mode=CrcMode.full,
+                 decompression=None):
         self.ntp = ntp
         self.headers_only = headers_only
+        self.use_mmap = use_mmap
+        self.crc_mode = crc_mode
+        self.decompression = decompression or default_stage()
+        self.offsets = offsets
+        self.timestamps = timestamps
+        self.index_cache = index_cache or IndexCache()
 
     def get_control_record_type(self, key):
         rdr = Reader(BytesIO(key))
@@ -110,16 +135,80 @@ class KafkaLog:
         return KafkaControlRecordType(type_rdr.read_int16()).name
 
     def decode(self):
-        self.results = []
-        for batch in self.batches():
+        for path in self.ntp.segments:
+            yield from self.decode_segment(path)
+
+    def decode_segment(self, path):
+        position = self._start_position(path)
+        if position is None:
+            return
+        segment = Segment(path, use_mmap=self.use_mmap, crc_mode=self.crc_mode)
+        for batch in segment.iter_from(position):
+            if self.offsets and self.offsets[1] is not None \
+                    and batch.header.base_offset > self.offsets[1]:
+                break
+            if not self._selected(batch):
+                continue
             header = batch.header_dict()
             yield header
             if not self.headers_only:
-                for record in batch:
+                for record in self.decompression.records(batch):
                     yield decode_record(batch, header, record)
 
+    def _selected(self, batch):
+        if self.offsets:
+            start, end = self.offsets
+            if start is not None and batch.last_offset() < start:
+                return False
+        if self.timestamps:
+            start, end = self.timestamps
+            if start is not None and batch.header.max_ts < start:
+                return False
+            if end is not None and batch.header.first_ts > end:
+                return False
+        return True
+
+    def _start_position(self, path):
+        """
+        File position to start decoding the segment at, None if the segment
+        can be skipped entirely.
+        """
+        if not self.offsets and not self.timestamps:
+            return 0
+
+        segments = self.ntp.segments
+        i = segments.index(path)
+        is_last = i == len(segments) - 1
+        if self.offsets:
+            start, end = self.offsets
+            if end is not None and segment_base_offset(path) > end:
+                return None
+            if start is not None and not is_last and segment_base_offset(
+                    segments[i + 1]) <= start:
+                return None
+
+        index = segment_index(path, self.index_cache)
+        position = 0
+        if self.offsets and self.offsets[0] is not None:
+            position = index.lookup_offset(self.offsets[0])
+        if self.timestamps:
+            start, end = self.timestamps
+            # the tail of the active segment may not be indexed yet
+            if end is not None and not is_last and len(index) \
+                    and index.min_timestamp() > end:
+                return None
+            if start is not None:
+                ts_position = index.lookup_timestamp(start)
+                if ts_position is None:
+                    if not is_last:
+                        return None
+                    ts_position = index.entries[-1].file_pos if len(
+                        index) else 0
+                position = max(position, ts_position)
+        return position
+
     def batches(self):
         for path in self.ntp.segments:
-            s = Segment(path)
+            s = Segment(path, use_mmap=self.use_mmap, crc_mode=self.crc_mode)
             for batch in s:
                 yield batch
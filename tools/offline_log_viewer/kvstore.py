@@ -1,7 +1,9 @@
 import collections
 import datetime
+import hashlib
 import logging
 import os
+import pickle
 import re
 import struct
 from io import BytesIO
@@ -349,11 +351,37 @@ def decode_raft_value(type, v):
     return None
 
 
+# bump when the layout of the kvstore checkpoint changes
+KVSTORE_CHECKPOINT_VERSION = 1
+
+
+def _file_identity(path):
+    st = os.stat(path)
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+
 class KvStore:
-    def __init__(self, ntp):
+    """
+    Materialized kvstore of a partition. With a cache_dir, save_checkpoint()
+    stores the state together with the identity of the snapshot and segments
+    it was built from, and the next decode() of the same partition only
+    applies the batches appended since. Call it once done reading items, so
+    that their decoded forms are checkpointed too.
+    """
+    def __init__(self, ntp, cache_dir=None):
         logger.info(f"building kvstore on path: {ntp.path}")
         self.ntp = ntp
         self.kv = {}
+        self.cache_dir = cache_dir
+        # (key_space, key_buf) -> (raw value, decoded item)
+        self.decoded = {}
+        self.snapshot_offset = None
+        self.snapshot_identity = None
+        # identities of the fully applied segments, the last segment applied
+        # and the file position following its last applied batch
+        self.applied_segments = {}
+        self.last_segment = None
+        self.last_position = 0
 
     def _apply(self, entry):
         key = (entry['key_space'], entry['key_buf'])
@@ -368,38 +396,147 @@ class KvStore:
                 # Missing key, that's okay for a deletion
                 pass
 
+    def _checkpoint_path(self):
+        digest = hashlib.sha1(os.path.abspath(
+            self.ntp.path).encode()).hexdigest()
+        return os.path.join(self.cache_dir, f"kvstore-{digest}.pickle")
+
+    def _read_checkpoint(self, snapshot_identity):
+        """
+        The checkpoint of this partition if it is still valid for the
+        snapshot and segments on disk, None otherwise.
+        """
+        try:
+            with open(self._checkpoint_path(), "rb") as f:
+                checkpoint = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        if checkpoint.get('version') != KVSTORE_CHECKPOINT_VERSION \
+                or checkpoint['snapshot_identity'] != snapshot_identity:
+            return None
+
+        # segments applied in full must be unchanged, the last one applied
+        # may only have grown
+        for path, identity in checkpoint['applied_segments'].items():
+            if not os.path.exists(path) or _file_identity(path) != identity:
+                return None
+        last = checkpoint['last_segment']
+        if last is not None:
+            path, inode = last
+            if not os.path.exists(path):
+                return None
+            st = os.stat(path)
+            if st.st_ino != inode or st.st_size < checkpoint['last_position']:
+                return None
+        return checkpoint
+
+    def _load_checkpoint(self, snapshot_identity):
+        try:
+            checkpoint = self._read_checkpoint(snapshot_identity)
+            if checkpoint is None:
+                return False
+            state = (checkpoint['kv'], checkpoint['decoded'],
+                     checkpoint['snapshot_offset'],
+                     checkpoint['applied_segments'],
+                     checkpoint['last_segment'], checkpoint['last_position'])
+        except Exception as e:
+            # truncated, written by another version of the tool, ...
+            logger.warn(
+                f"ignoring kvstore checkpoint of {self.ntp}, replaying: {e}")
+            return False
+
+        (self.kv, self.decoded, self.snapshot_offset, self.applied_segments,
+         self.last_segment, self.last_position) = state
+        logger.info(
+            f"resuming from checkpoint at {self.last_segment} position {self.last_position}"
+        )
+        return True
+
+    def save_checkpoint(self):
+        if self.cache_dir is None:
+            return
+        checkpoint = {
+            'version': KVSTORE_CHECKPOINT_VERSION,
+            'snapshot_identity': self.snapshot_identity,
+            'snapshot_offset': self.snapshot_offset,
+            'applied_segments': self.applied_segments,
+            'last_segment': self.last_segment,
+            'last_position': self.last_position,
+            'kv': self.kv,
+            # drop the decoded forms of keys deleted since
+            'decoded': {k: v
+                        for k, v in self.decoded.items() if k in self.kv},
+        }
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._checkpoint_path()
+            tmp_path = f"{path}.tmp.{os.getpid()}"
+            with open(tmp_path, "wb") as f:
+                pickle.dump(checkpoint, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warn(f"unable to checkpoint kvstore of {self.ntp}: {e}")
+
+    def _replay_snapshot(self, snapshot_path):
+        snap = KvSnapshot(snapshot_path)
+        snap.decode()
+        logger.info(f"snapshot last offset: {snap.last_offset}")
+        self.snapshot_offset = snap.last_offset
+        for r in snap.data_batch:
+            d = KvStoreRecordDecoder(r,
+                                     snap.data_batch,
+                                     value_is_optional_type=False)
+            self._apply(d.decode())
+
     def decode(self):
-        snapshot_offset = None
-        if os.path.exists(f"{self.ntp.path}/snapshot"):
-            snap = KvSnapshot(f"{self.ntp.path}/snapshot")
-            snap.decode()
-            logger.info(f"snapshot last offset: {snap.last_offset}")
-            snapshot_offset = snap.last_offset
-            for r in snap.data_batch:
-                d = KvStoreRecordDecoder(r,
-                                         snap.data_batch,
-                                         value_is_optional_type=False)
-                self._apply(d.decode())
-        else:
-            logger.info(f"{self.ntp.path}/snapshot does not exist")
+        snapshot_path = f"{self.ntp.path}/snapshot"
+        if os.path.exists(snapshot_path):
+            self.snapshot_identity = _file_identity(snapshot_path)
+
+        resumed = self.cache_dir is not None and self._load_checkpoint(
+            self.snapshot_identity)
+        if not resumed:
+            if self.snapshot_identity is not None:
+                self._replay_snapshot(snapshot_path)
+            else:
+                logger.info(f"{self.ntp.path}/snapshot does not exist")
 
         for path in self.ntp.segments:
-            s = Segment(path)
-            for batch in s:
+            if path in self.applied_segments:
+                continue
+            position = 0
+            if self.last_segment is not None and self.last_segment[0] == path:
+                position = self.last_position
+            for batch in Segment(path).iter_from(position):
                 for r in batch:
                     offset = batch.header.base_offset + r.offset_delta
-                    if snapshot_offset is not None and offset <= snapshot_offset:
+                    if self.snapshot_offset is not None and offset <= self.snapshot_offset:
                         continue
 
                     d = KvStoreRecordDecoder(r,
                                              batch,
                                              value_is_optional_type=True)
                     self._apply(d.decode())
+                position += batch.header.batch_size
+
+            if self.last_segment is not None:
+                previous = self.last_segment[0]
+                if previous != path and os.path.exists(previous):
+                    self.applied_segments[previous] = _file_identity(previous)
+            self.last_segment = (path, os.stat(path).st_ino)
+            self.last_position = position
 
     def items(self):
-        ret = []
+        return list(self.iter_items())
+
+    def iter_items(self):
         for k, v in self.kv.items():
+            memo = self.decoded.get(k)
+            if memo is not None and memo[0] == v:
+                yield memo[1]
+                continue
             dk = decode_key(k[0], k[1])
             dv = decode_value(dk, v)
-            ret.append({'key': dk, 'value': dv})
-        return ret
+            item = {'key': dk, 'value': dv}
+            self.decoded[k] = (v, item)
+            yield item
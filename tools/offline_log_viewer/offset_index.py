@@ -0,0 +1,255 @@
+import bisect
+import collections
+import hashlib
+import json
+import logging
+import os
+from io import BytesIO
+
+import crc32c
+
+from reader import Reader
+from storage import Segment
+
+logger = logging.getLogger('offset_index')
+
+# spacing, in bytes of segment data, between two entries of the sparse index
+DEFAULT_INDEX_STEP = 32 * 1024
+
+# bump when the layout of the cached index files changes
+INDEX_CACHE_VERSION = 1
+
+DEFAULT_INDEX_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache",
+                                       "rp_offline_log_viewer")
+
+# an entry covers all batches from file_pos up to the next entry. first_ts and
+# max_ts are the min first and max timestamps across those batches.
+IndexEntry = collections.namedtuple(
+    'IndexEntry', ('base_offset', 'first_ts', 'max_ts', 'file_pos'))
+
+# index_state relative time entries are shifted by 2^31 when with_offset is set
+OFFSET_TIME_INDEX_OFFSET = 2**31
+
+# see storage::serde_compat::index_state_serde
+INDEX_STATE_COMPAT_VERSION = 3
+
+
+class SegmentIndex:
+    def __init__(self, path, entries):
+        self.path = path
+        self.entries = entries
+        self._offsets = [e.base_offset for e in entries]
+
+    def __len__(self):
+        return len(self.entries)
+
+    def max_timestamp(self):
+        return max((e.max_ts for e in self.entries), default=None)
+
+    def min_timestamp(self):
+        return min((e.first_ts for e in self.entries), default=None)
+
+    def lookup_offset(self, offset):
+        """File position of the batch boundary at or before offset"""
+        i = bisect.bisect_right(self._offsets, offset) - 1
+        if i < 0:
+            return 0
+        return self.entries[i].file_pos
+
+    def lookup_timestamp(self, timestamp):
+        """
+        File position of the first indexed range that may contain a batch
+        with a max timestamp at or after timestamp, None if there is none.
+        """
+        for e in self.entries:
+            if e.max_ts >= timestamp:
+                return e.file_pos
+        return None
+
+    @staticmethod
+    def build(path, step=DEFAULT_INDEX_STEP):
+        """Build an index by walking the batch headers of a segment"""
+        entries = []
+        current = None
+        accumulator = 0
+        for position, header in Segment(path).headers():
+            if current is None or accumulator >= step:
+                if current is not None:
+                    entries.append(IndexEntry(*current))
+                current = [
+                    header.base_offset, header.first_ts, header.max_ts,
+                    position
+                ]
+                accumulator = 0
+            else:
+                current[1] = min(current[1], header.first_ts)
+                current[2] = max(current[2], header.max_ts)
+            accumulator += header.batch_size
+        if current is not None:
+            entries.append(IndexEntry(*current))
+        return SegmentIndex(path, entries)
+
+    @staticmethod
+    def from_base_index(path):
+        """
+        Read the broker's own index (storage::index_state) of the segment at
+        path. Returns None when there is no index or it can't be decoded.
+        """
+        index_path = os.path.splitext(path)[0] + ".base_index"
+        if not os.path.exists(index_path):
+            return None
+        with open(index_path, "rb") as f:
+            data = f.read()
+        try:
+            state = decode_index_state(data)
+        except Exception as e:
+            logger.warn(f"unable to decode {index_path}: {e}")
+            return None
+        if state is None:
+            return None
+
+        # (base offset, max timestamp, file position) of the indexed batches,
+        # see index_state::maybe_index
+        points = []
+        for rel_offset, rel_time, position in zip(
+                state['relative_offset_index'], state['relative_time_index'],
+                state['position_index']):
+            if state['with_offset']:
+                rel_time -= OFFSET_TIME_INDEX_OFFSET
+            points.append((state['base_offset'] + rel_offset,
+                           state['base_timestamp'] + rel_time, position))
+        if not points:
+            return SegmentIndex(path, [])
+        # the broker indexes the first batch, but be safe if it did not
+        if points[0][2] != 0:
+            points.insert(0,
+                          (state['base_offset'], state['base_timestamp'], 0))
+
+        # An indexed timestamp is the max of one batch of the range it
+        # starts: an upper bound of that batch, and a lower bound of the
+        # batches of the next range. The batches up to the next indexed one
+        # may be as late as it, like index_state::find_entry assumes by
+        # stepping back one entry. The segment wide min and max timestamps
+        # bound the first and last ranges.
+        entries = []
+        for i, (offset, ts, position) in enumerate(points):
+            if i == 0:
+                first_ts = state['base_timestamp']
+            else:
+                first_ts = min(points[i - 1][1], ts)
+            if i + 1 < len(points):
+                max_ts = max(ts, points[i + 1][1])
+            else:
+                max_ts = max(ts, state['max_timestamp'])
+            entries.append(IndexEntry(offset, first_ts, max_ts, position))
+        return SegmentIndex(path, entries)
+
+
+def decode_index_state(data):
+    rdr = Reader(BytesIO(data))
+    version = rdr.peek_int8()
+    if version == INDEX_STATE_COMPAT_VERSION:
+        rdr.skip(1)
+        rdr.read_uint32()  # size
+        rdr.read_uint64()  # xxhash64 checksum
+        p = rdr
+    elif version > INDEX_STATE_COMPAT_VERSION:
+        envelope = rdr.read_envelope()
+        blob = rdr.read_iobuf()
+        if rdr.read_uint32() != crc32c.crc32c(blob):
+            raise ValueError("index_state checksum mismatch")
+        p = Reader(BytesIO(blob))
+    else:
+        logger.warn(f"unsupported index_state version {version}")
+        return None
+
+    state = {}
+    state['bitflags'] = p.read_uint32()
+    state['base_offset'] = p.read_int64()
+    state['max_offset'] = p.read_int64()
+    state['base_timestamp'] = p.read_int64()
+    state['max_timestamp'] = p.read_int64()
+    if version == INDEX_STATE_COMPAT_VERSION:
+        size = p.read_uint32()
+        read_vec = lambda read: [read() for _ in range(size)]
+        state['relative_offset_index'] = read_vec(p.read_uint32)
+        state['relative_time_index'] = read_vec(p.read_uint32)
+        state['position_index'] = read_vec(p.read_uint64)
+        state['with_offset'] = False
+    else:
+        state['relative_offset_index'] = p.read_serde_vector(
+            Reader.read_uint32)
+        state['relative_time_index'] = p.read_serde_vector(Reader.read_uint32)
+        state['position_index'] = p.read_serde_vector(Reader.read_uint64)
+        state['with_offset'] = False
+        if envelope.version >= 5:
+            p.read_bool()  # batch_timestamps_are_monotonic
+            state['with_offset'] = p.read_bool()
+    return state
+
+
+class IndexCache:
+    """
+    Sidecar store of segment indices. Entries are keyed by the segment path,
+    size and mtime so that an index is rebuilt whenever its segment changes.
+    """
+    def __init__(self,
+                 cache_dir=DEFAULT_INDEX_CACHE_DIR,
+                 step=DEFAULT_INDEX_STEP):
+        self.cache_dir = cache_dir
+        self.step = step
+
+    def _cache_path(self, path):
+        digest = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.json")
+
+    def _key(self, path):
+        st = os.stat(path)
+        return {
+            'version': INDEX_CACHE_VERSION,
+            'path': os.path.abspath(path),
+            'size': st.st_size,
+            'mtime_ns': st.st_mtime_ns,
+            'step': self.step
+        }
+
+    def _load(self, path, key):
+        try:
+            with open(self._cache_path(path)) as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if cached.get('key') != key:
+            return None
+        return SegmentIndex(path, [IndexEntry(*e) for e in cached['entries']])
+
+    def _store(self, path, key, index):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            cache_path = self._cache_path(path)
+            tmp_path = f"{cache_path}.tmp.{os.getpid()}"
+            with open(tmp_path, "w") as f:
+                json.dump({'key': key, 'entries': index.entries}, f)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            logger.warn(f"unable to cache index of {path}: {e}")
+
+    def get(self, path):
+        key = self._key(path)
+        index = self._load(path, key)
+        if index is None:
+            logger.debug(f"building index of {path}")
+            index = SegmentIndex.build(path, self.step)
+            self._store(path, key, index)
+        return index
+
+
+def segment_index(path, cache):
+    """
+    Index of a segment, the broker's .base_index is preferred when present
+    and readable, otherwise the sidecar cache is used.
+    """
+    index = SegmentIndex.from_base_index(path)
+    if index is None or len(index) == 0:
+        index = cache.get(path)
+    return index
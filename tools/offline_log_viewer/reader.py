@@ -18,57 +18,169 @@ class Endianness(Enum):
     LITTLE_ENDIAN = 1
 
 
+def _compile_structs(ch):
+    return {f: struct.Struct(ch + f) for f in 'bBhHiIqQ'}
+
+
+STRUCTS = {
+    Endianness.LITTLE_ENDIAN: _compile_structs('<'),
+    Endianness.BIG_ENDIAN: _compile_structs('>'),
+}
+
+
+def decode_varint(buf, pos):
+    """
+    Decode the zig-zag varint at pos of a bytes-like buffer. Returns the
+    value and the position following it.
+    """
+    i = buf[pos]
+    if i < 128:
+        return (i >> 1) ^ -(i & 1), pos + 1
+    result = i & 0x7f
+    shift = 7
+    while True:
+        pos += 1
+        i = buf[pos]
+        result |= (i & 0x7f) << shift
+        if i < 128:
+            return (result >> 1) ^ -(result & 1), pos + 1
+        shift += 7
+
+
+def decode_record(buf, pos):
+    """
+    Decode the kafka record at pos of a bytes-like buffer into a tuple of
+    (length, attrs, timestamp_delta, offset_delta, key, value, headers),
+    headers being a tuple of (key, value) pairs. key, value and headers are
+    slices of buf: copies for bytes and views for a memoryview. Returns the
+    tuple and the position of the next record.
+    """
+    # single byte varints are the common case, they are decoded inline to
+    # save a call per field
+    i = buf[pos]
+    if i < 128:
+        length, pos = (i >> 1) ^ -(i & 1), pos + 1
+    else:
+        length, pos = decode_varint(buf, pos)
+    attrs = buf[pos]
+    if attrs > 127:
+        attrs -= 256
+    pos += 1
+    i = buf[pos]
+    if i < 128:
+        timestamp_delta, pos = (i >> 1) ^ -(i & 1), pos + 1
+    else:
+        timestamp_delta, pos = decode_varint(buf, pos)
+    i = buf[pos]
+    if i < 128:
+        offset_delta, pos = (i >> 1) ^ -(i & 1), pos + 1
+    else:
+        offset_delta, pos = decode_varint(buf, pos)
+    i = buf[pos]
+    if i < 128:
+        key_length, pos = (i >> 1) ^ -(i & 1), pos + 1
+    else:
+        key_length, pos = decode_varint(buf, pos)
+    if key_length > 0:
+        key = buf[pos:pos + key_length]
+        pos += key_length
+    else:
+        key = None
+    i = buf[pos]
+    if i < 128:
+        value_length, pos = (i >> 1) ^ -(i & 1), pos + 1
+    else:
+        value_length, pos = decode_varint(buf, pos)
+    if value_length > 0:
+        value = buf[pos:pos + value_length]
+        pos += value_length
+    else:
+        value = None
+    hdr_count, pos = decode_varint(buf, pos)
+    headers = ()
+    if hdr_count > 0:
+        headers = []
+        for _ in range(hdr_count):
+            k_sz, pos = decode_varint(buf, pos)
+            h_key = buf[pos:pos + k_sz]
+            pos += k_sz
+            v_sz, pos = decode_varint(buf, pos)
+            headers.append((h_key, buf[pos:pos + v_sz]))
+            pos += v_sz
+        headers = tuple(headers)
+    return (length, attrs, timestamp_delta, offset_delta, key, value,
+            headers), pos
+
+
+def decode_records(buf, record_count, pos=0):
+    """Decode record_count records of a batch payload into a list of tuples"""
+    records = []
+    for _ in range(record_count):
+        record, pos = decode_record(buf, pos)
+        records.append(record)
+    return records
+
+
 class Reader:
     def __init__(self, stream, endianness=Endianness.LITTLE_ENDIAN):
         # BytesIO provides .getBuffer(), BufferedReader peek()
         self.stream = BufferedReader(stream)
         self.endianness = endianness
+        structs = STRUCTS[endianness]
+        self._int8 = structs['b']
+        self._uint8 = structs['B']
+        self._int16 = structs['h']
+        self._uint16 = structs['H']
+        self._int32 = structs['i']
+        self._uint32 = structs['I']
+        self._int64 = structs['q']
+        self._uint64 = structs['Q']
 
     @staticmethod
     def _decode_zig_zag(v):
         return (v >> 1) ^ (~(v & 1) + 1)
 
     def read_varint(self):
-        shift = 0
-        result = 0
+        read = self.stream.read
+        i = read(1)[0]
+        if i < 128:
+            return (i >> 1) ^ -(i & 1)
+        result = i & 0x7f
+        shift = 7
         while True:
-            i = ord(self.stream.read(1))
-            if i & 128:
-                result |= ((i & 0x7f) << shift)
-            else:
-                result |= i << shift
-                break
+            i = read(1)[0]
+            result |= (i & 0x7f) << shift
+            if i < 128:
+                return (result >> 1) ^ -(result & 1)
             shift += 7
 
-        return Reader._decode_zig_zag(result)
-
     def with_endianness(self, str):
         ch = '<' if self.endianness == Endianness.LITTLE_ENDIAN else '>'
         return f"{ch}{str}"
 
     def read_int8(self):
-        return struct.unpack(self.with_endianness('b'), self.stream.read(1))[0]
+        return self._int8.unpack(self.stream.read(1))[0]
 
     def read_uint8(self):
-        return struct.unpack(self.with_endianness('B'), self.stream.read(1))[0]
+        return self._uint8.unpack(self.stream.read(1))[0]
 
     def read_int16(self):
-        return struct.unpack(self.with_endianness('h'), self.stream.read(2))[0]
+        return self._int16.unpack(self.stream.read(2))[0]
 
     def read_uint16(self):
-        return struct.unpack(self.with_endianness('H'), self.stream.read(2))[0]
+        return self._uint16.unpack(self.stream.read(2))[0]
 
     def read_int32(self):
-        return struct.unpack(self.with_endianness('i'), self.stream.read(4))[0]
+        return self._int32.unpack(self.stream.read(4))[0]
 
     def read_uint32(self):
-        return struct.unpack(self.with_endianness('I'), self.stream.read(4))[0]
+        return self._uint32.unpack(self.stream.read(4))[0]
 
     def read_int64(self):
-        return struct.unpack(self.with_endianness('q'), self.stream.read(8))[0]
+        return self._int64.unpack(self.stream.read(8))[0]
 
     def read_uint64(self):
-        return struct.unpack(self.with_endianness('Q'), self.stream.read(8))[0]
+        return self._uint64.unpack(self.stream.read(8))[0]
 
     def read_serde_enum(self):
         return self.read_int32()
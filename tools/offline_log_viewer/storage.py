@@ -1,5 +1,6 @@
 import collections
 from enum import Enum
+import mmap
 import os
 import re
 from os.path import join
@@ -9,8 +10,7 @@ import crc32c
 import glob
 import re
 import logging
-from io import BytesIO
-from reader import Reader
+from reader import decode_record, decode_records
 
 logger = logging.getLogger('rp')
 
@@ -34,6 +34,16 @@ HDR_FMT_CRC = "hiqqqhii"
 HDR_FMT_RP = HDR_FMT_RP_PREFIX + HDR_FMT_CRC
 HEADER_SIZE = struct.calcsize(HDR_FMT_RP)
 
+# offset of the fields covered by the kafka crc (attributes ... record_count)
+HDR_CRC_FIELDS_OFFSET = struct.calcsize(HDR_FMT_RP_PREFIX)
+
+_HDR_STRUCT = struct.Struct(HDR_FMT_RP)
+_HDR_NO_CRC_STRUCT = struct.Struct("<" + HDR_FMT_RP_PREFIX_NO_CRC +
+                                   HDR_FMT_CRC)
+_CRC_FIELDS_LE_STRUCT = struct.Struct("<" + HDR_FMT_CRC)
+_CRC_FIELDS_BE_STRUCT = struct.Struct(">" + HDR_FMT_CRC)
+_HDR_CRC_STRUCT = struct.Struct("<I")
+
 Header = collections.namedtuple(
     'Header', ('header_crc', 'batch_size', 'base_offset', 'type', 'crc',
                'attrs', 'delta', 'first_ts', 'max_ts', 'producer_id',
@@ -48,6 +58,13 @@ class CorruptBatchError(Exception):
         self.batch = batch
 
 
+class CrcMode(Enum):
+    """Which checksums are verified when a batch is decoded"""
+    off = 0
+    header = 1
+    full = 2
+
+
 class Record:
     def __init__(self, length, attrs, timestamp_delta, offset_delta, key,
                  value, headers):
@@ -72,42 +89,27 @@ class RecordHeader:
 
 
 class RecordIter:
+    """
+    Iterator over the records of a batch payload. Records are decoded in
+    place, keys, values and headers are slices of records_data: views when
+    it is a memoryview, so a mapped segment is never copied.
+    """
     def __init__(self, record_count, records_data):
-        self.data_stream = BytesIO(records_data)
-        self.rdr = Reader(self.data_stream)
+        self.data = records_data
+        self.pos = 0
         self.record_count = record_count
 
-    def _parse_header(self):
-        k_sz = self.rdr.read_varint()
-        key = self.rdr.read_bytes(k_sz)
-        v_sz = self.rdr.read_varint()
-        value = self.rdr.read_bytes(v_sz)
-        return RecordHeader(key, value)
+    def __iter__(self):
+        return self
 
     def __next__(self):
         if self.record_count == 0:
             raise StopIteration()
 
         self.record_count -= 1
-        len = self.rdr.read_varint()
-        attrs = self.rdr.read_int8()
-        timestamp_delta = self.rdr.read_varint()
-        offset_delta = self.rdr.read_varint()
-        key_length = self.rdr.read_varint()
-        if key_length > 0:
-            key = self.rdr.read_bytes(key_length)
-        else:
-            key = None
-        value_length = self.rdr.read_varint()
-        if value_length > 0:
-            value = self.rdr.read_bytes(value_length)
-        else:
-            value = None
-        hdr_size = self.rdr.read_varint()
-        headers = []
-        for i in range(0, hdr_size):
-            headers.append(self._parse_header())
-
+        (len, attrs, timestamp_delta, offset_delta, key, value,
+         headers), self.pos = decode_record(self.data, self.pos)
+        headers = [RecordHeader(k, v) for k, v in headers]
         return Record(len, attrs, timestamp_delta, offset_delta, key, value,
                       headers)
 
@@ -164,18 +166,21 @@ class Batch:
     transactional_mask = 0x10
     control_mask = 0x20
 
-    def __init__(self, index, header, records):
+    def __init__(self, index, header, records, crc_mode=CrcMode.full):
         self.index = index
         self.header = header
         self.term = None
         self.records = records
         self.type = BatchType(header[3])
 
-        header_crc_bytes = struct.pack(
-            "<" + HDR_FMT_RP_PREFIX_NO_CRC + HDR_FMT_CRC, *self.header[1:])
+        if crc_mode == CrcMode.off:
+            return
+        header_crc_bytes = _HDR_NO_CRC_STRUCT.pack(*self.header[1:])
         header_crc = crc32c.crc32c(header_crc_bytes)
         if self.header.header_crc != header_crc:
             raise CorruptBatchError(self)
+        if crc_mode == CrcMode.header:
+            return
         crc = crc32c.crc32c(self._crc_header_be_bytes())
         crc = crc32c.crc32c(records, crc)
         if self.header.crc != crc:
@@ -200,10 +205,10 @@ class Batch:
 
     def _crc_header_be_bytes(self):
         # encode header back to big-endian for crc calculation
-        return struct.pack(">" + HDR_FMT_CRC, *self.header[5:])
+        return _CRC_FIELDS_BE_STRUCT.pack(*self.header[5:])
 
     @staticmethod
-    def from_stream(f, index):
+    def from_stream(f, index, crc_mode=CrcMode.full):
         data = f.read(HEADER_SIZE)
         if len(data) == HEADER_SIZE:
             header = Header(*struct.unpack(HDR_FMT_RP, data))
@@ -220,27 +225,63 @@ class Batch:
                 )
                 return None
             assert len(data) == records_size
-            return Batch(index, header, data)
+            return Batch(index, header, data, crc_mode)
 
         if len(data) < HEADER_SIZE:
             # Short read, probably log being actively written or unclean shutdown
             return None
 
+    @staticmethod
+    def from_buffer(view, pos, index, crc_mode=CrcMode.full):
+        """
+        Decode the batch starting at pos of a memoryview. The records of the
+        returned batch are a slice of the view, not a copy.
+        """
+        if len(view) - pos < HEADER_SIZE:
+            # Short read, probably log being actively written or unclean shutdown
+            return None
+        header = Header(*struct.unpack_from(HDR_FMT_RP, view, pos))
+        # it appears that we may have hit a truncation point if all of the
+        # fields in the header are zeros
+        if all(map(lambda v: v == 0, header)):
+            return None
+        if header.batch_size < HEADER_SIZE:
+            logger.warn(
+                f"Stopping batch parse on invalid batch size {header.batch_size} at {pos}"
+            )
+            return None
+        end = pos + header.batch_size
+        if end > len(view):
+            logger.info(
+                "Stopping batch parse on short read (this is normal if the log was not from a clean shutdown)"
+            )
+            return None
+        return Batch(index, header, view[pos + HEADER_SIZE:end], crc_mode)
+
     def __len__(self):
         return self.header.record_count
 
     def __iter__(self):
         return RecordIter(self.header.record_count, self.records)
 
+    def record_tuples(self):
+        """Decode all records at once into compact tuples, see decode_record"""
+        return decode_records(self.records, self.header.record_count)
+
 
 class BatchIterator:
-    def __init__(self, path):
+    def __init__(self, path, position=0, crc_mode=CrcMode.full):
         self.path = path
+        self.crc_mode = crc_mode
         self.file = open(path, "rb")
+        self.file.seek(position)
         self.idx = 0
 
+    def __iter__(self):
+        return self
+
     def __next__(self):
-        b = Batch.from_stream(self.file, self.idx)
+        b = Batch.from_stream(self.file, self.idx, self.crc_mode)
         if not b:
             fsize = os.stat(self.path).st_size
             if fsize != self.file.tell():
@@ -255,12 +296,173 @@ class BatchIterator:
         self.file.close()
 
 
+class MappedBatchIterator:
+    """
+    Batch iterator walking a memory mapped segment. Batches (and their
+    records) reference the mapping, which is closed once the iteration is
+    over, or on close(), unless batches are still around: it is then
+    unmapped when the last of them is gone.
+    """
+    def __init__(self, path, position=0, crc_mode=CrcMode.full):
+        self.path = path
+        self.crc_mode = crc_mode
+        self.idx = 0
+        self.pos = position
+        self.mmap = None
+        self.view = None
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                # empty files can not be mapped
+                self.view = memoryview(b"")
+            else:
+                self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self.view = memoryview(self.mmap)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __del__(self):
+        self.close()
+
+    def close(self):
+        if self.view is None:
+            return
+        self.view.release()
+        self.view = None
+        if self.mmap is not None:
+            try:
+                self.mmap.close()
+            except BufferError:
+                # batches still reference the mapping
+                pass
+            self.mmap = None
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.view is None:
+            raise StopIteration()
+        b = Batch.from_buffer(self.view, self.pos, self.idx, self.crc_mode)
+        if not b:
+            if self.pos != len(self.view):
+                logger.warn(
+                    f"Incomplete read of {self.path}: {self.pos}/{len(self.view)}"
+                )
+            self.close()
+            raise StopIteration()
+        self.idx += 1
+        self.pos += b.header.batch_size
+        return b
+
+
 class Segment:
-    def __init__(self, path):
+    def __init__(self, path, use_mmap=False, crc_mode=CrcMode.full):
         self.path = path
+        self.use_mmap = use_mmap
+        self.crc_mode = crc_mode
 
     def __iter__(self):
-        return BatchIterator(self.path)
+        return self.iter_from(0)
+
+    def iter_from(self, position):
+        """Iterate batches starting at a batch boundary file position"""
+        if self.use_mmap:
+            return MappedBatchIterator(self.path, position, self.crc_mode)
+        return BatchIterator(self.path, position, self.crc_mode)
+
+    def headers(self):
+        """
+        Yield (file_position, Header) for every batch of the segment. Only
+        the headers are read, batch payloads are skipped and not verified.
+        """
+        with open(self.path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            position = 0
+            while size - position >= HEADER_SIZE:
+                data = f.read(HEADER_SIZE)
+                if len(data) < HEADER_SIZE:
+                    return
+                header = Header(*struct.unpack(HDR_FMT_RP, data))
+                if all(map(lambda v: v == 0, header)):
+                    return
+                if header.batch_size < HEADER_SIZE or position + header.batch_size > size:
+                    return
+                yield position, header
+                position += header.batch_size
+                f.seek(position)
+
+    def verify(self):
+        """
+        Check the header and payload crc of every batch in a single pass
+        over a memory mapping of the segment, without decoding batches.
+        Adjacent corrupt batches are reported as one corrupt byte range.
+        A header that fails its crc can't be trusted for the batch size so
+        the remainder of the segment is reported as unreadable.
+        """
+        result = {
+            'path': self.path,
+            'batches': 0,
+            'bytes': 0,
+            'corrupt': [],
+            'truncated_bytes': 0
+        }
+
+        def add_corrupt(start, end, base_offset, reason):
+            corrupt = result['corrupt']
+            if corrupt and corrupt[-1]['end'] == start \
+                    and corrupt[-1]['reason'] == reason:
+                corrupt[-1]['end'] = end
+                corrupt[-1]['batches'] += 1
+            else:
+                corrupt.append({
+                    'start': start,
+                    'end': end,
+                    'base_offset': base_offset,
+                    'batches': 1,
+                    'reason': reason
+                })
+
+        batches = MappedBatchIterator(self.path)
+        view = batches.view
+        size = len(view)
+        pos = 0
+        while size - pos >= HEADER_SIZE:
+            header_crc = _HDR_CRC_STRUCT.unpack_from(view, pos)[0]
+            hdr_view = view[pos + _HDR_CRC_STRUCT.size:pos + HEADER_SIZE]
+            if header_crc != crc32c.crc32c(hdr_view):
+                if not any(view[pos:pos + HEADER_SIZE]):
+                    # truncation point, see Batch.from_stream
+                    break
+                add_corrupt(pos, size, None, 'header_crc')
+                pos = size
+                break
+            header = Header(*_HDR_STRUCT.unpack_from(view, pos))
+            end = pos + header.batch_size
+            if header.batch_size < HEADER_SIZE or end > size:
+                break
+            crc = crc32c.crc32c(
+                _CRC_FIELDS_BE_STRUCT.pack(*_CRC_FIELDS_LE_STRUCT.unpack_from(
+                    view, pos + HDR_CRC_FIELDS_OFFSET)))
+            crc = crc32c.crc32c(view[pos + HEADER_SIZE:end], crc)
+            if header.crc != crc:
+                add_corrupt(pos, end, header.base_offset, 'crc')
+            result['batches'] += 1
+            pos = end
+        batches.close()
+
+        result['bytes'] = pos
+        result['truncated_bytes'] = size - pos
+        return result
+
+
+def segment_base_offset(segment_path):
+    m = SEGMENT_NAME_PATTERN.match(os.path.basename(segment_path))
+    return int(m['base_offset'])
 
 
 class Ntp:
@@ -274,12 +476,7 @@ class Ntp:
                                  f"{self.partition}_{self.ntp_id}")
         pattern = os.path.join(self.path, "*.log")
         self.segments = glob.iglob(pattern)
-
-        def _base_offset(segment_path):
-            m = SEGMENT_NAME_PATTERN.match(os.path.basename(segment_path))
-            return int(m['base_offset'])
-
-        self.segments = sorted(self.segments, key=_base_offset)
+        self.segments = sorted(self.segments, key=segment_base_offset)
 
     def __str__(self):
         return "{0.nspace}/{0.topic}/{0.partition}_{0.ntp_id}".format(self)
@@ -0,0 +1,68 @@
+"""
+Checks of timestamp lookups in broker written segment indices.
+
+Usage: python -m pytest test_offset_index.py
+"""
+import struct
+
+from offset_index import INDEX_STATE_COMPAT_VERSION, SegmentIndex
+
+BASE_OFFSET = 2000
+BASE_TIMESTAMP = 1020000
+
+
+def write_base_index(tmp_path, points, max_timestamp):
+    """
+    Write a v3 .base_index of (base offset, timestamp, file position)
+    points, and return the path of its segment.
+    """
+    body = struct.pack('<Iqqqq', 0, BASE_OFFSET, points[-1][0], BASE_TIMESTAMP,
+                       max_timestamp)
+    body += struct.pack('<I', len(points))
+    body += b''.join(struct.pack('<I', o - BASE_OFFSET) for o, _, _ in points)
+    body += b''.join(
+        struct.pack('<I', ts - BASE_TIMESTAMP) for _, ts, _ in points)
+    body += b''.join(struct.pack('<Q', pos) for _, _, pos in points)
+    header = struct.pack('<bIQ', INDEX_STATE_COMPAT_VERSION, len(body), 0)
+    (tmp_path / "2000-1-v1.base_index").write_bytes(header + body)
+    return str(tmp_path / "2000-1-v1.log")
+
+
+def test_timestamp_between_index_entries(tmp_path):
+    # Batches 2000..2060, 10ms apart, with every 30th one indexed
+    path = write_base_index(tmp_path, [(2000, 1020000, 0),
+                                       (2030, 1020300, 4096),
+                                       (2060, 1020600, 8192)], 1020600)
+    index = SegmentIndex.from_base_index(path)
+
+    # Batches 2050..2059 are before the entry of batch 2060
+    assert index.lookup_timestamp(1020500) == 4096
+    assert index.lookup_timestamp(1020300) == 0
+    assert index.lookup_timestamp(1020301) == 4096
+    assert index.lookup_timestamp(1020600) == 4096
+    assert index.lookup_timestamp(1020601) is None
+    assert index.min_timestamp() == 1020000
+    assert index.max_timestamp() == 1020600
+
+
+def test_batches_before_first_index_entry(tmp_path):
+    path = write_base_index(tmp_path, [(2010, 1020100, 4096),
+                                       (2040, 1020400, 8192)], 1020600)
+    index = SegmentIndex.from_base_index(path)
+
+    assert index.lookup_offset(2005) == 0
+    assert index.lookup_timestamp(1020050) == 0
+    assert index.lookup_timestamp(1020500) == 8192
+
+
+def test_first_batch_max_timestamp_indexed(tmp_path):
+    # The broker indexes the max timestamp of batch 2000, whose records go
+    # from 1020000 to 1020012
+    path = write_base_index(tmp_path, [(2000, 1020012, 0),
+                                       (2030, 1020312, 4096)], 1020600)
+    index = SegmentIndex.from_base_index(path)
+
+    assert index.min_timestamp() == 1020000
+    assert index.lookup_timestamp(1020005) == 0
+    assert index.lookup_timestamp(1020312) == 0
+    assert index.lookup_timestamp(1020313) == 4096
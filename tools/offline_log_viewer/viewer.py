@@ -8,15 +8,28 @@ from consumer_groups import GroupsLog
 from consumer_offsets import OffsetsLog
 from tx_coordinator import TxLog
 
+import collections
+import concurrent.futures
+import datetime
+import functools
 import itertools
-from storage import Store
+import multiprocessing
+import queue
+from storage import Store, Segment, CrcMode
 from kvstore import KvStore
 from kafka import KafkaLog
+from offset_index import IndexCache, DEFAULT_INDEX_CACHE_DIR
 import logging
 import json
 
 logger = logging.getLogger('viewer')
 
+# results of a generator run by a worker of ordered_chain are sent back this
+# many at a time, with at most STREAM_CHUNKS_BUFFERED chunks per worker not
+# yet consumed
+STREAM_CHUNK = 256
+STREAM_CHUNKS_BUFFERED = 4
+
 
 class SerializableGenerator(list):
     """Generator that is serializable by JSON"""
@@ -32,78 +45,318 @@ class SerializableGenerator(list):
         return itertools.chain(self._head, *self[:1])
 
 
-def print_kv_store(store):
-    # Map of partition ID to list of kvstore items
-    result = {}
+# compact encoding for one JSON object per line output
+ndjson_encoder = json.JSONEncoder(separators=(',', ':'))
+
+
+def write_json(items):
+    """Stream items to stdout as a JSON array without materializing them"""
+    for j in json.JSONEncoder(indent=2).iterencode(
+            SerializableGenerator(items)):
+        print(j, end='')
+
+
+def write_ndjson(items):
+    """Stream items to stdout as one compact JSON object per line"""
+    for item in items:
+        sys.stdout.write(ndjson_encoder.encode(item))
+        sys.stdout.write('\n')
 
-    for ntp in store.ntps:
-        if ntp.nspace == "redpanda" and ntp.topic == "kvstore":
-            logger.info(f"inspecting {ntp}")
-            kv = KvStore(ntp)
-            kv.decode()
-            items = kv.items()
 
-            result[ntp.partition] = items
+def ordered_map(fn, items, jobs):
+    """
+    Lazily map fn over items using a pool of jobs processes. Results are
+    yielded in the order of items, at most 2 * jobs results are buffered.
+    """
+    if jobs <= 1:
+        yield from map(fn, items)
+        return
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as pool:
+        pending = collections.deque()
+        for item in items:
+            pending.append(pool.submit(fn, item))
+            if len(pending) >= 2 * jobs:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _stream(fn, chunks, item):
+    """Send the output of fn(item) to chunks, then None"""
+    try:
+        chunk = []
+        for result in fn(item):
+            chunk.append(result)
+            if len(chunk) >= STREAM_CHUNK:
+                chunks.put(chunk)
+                chunk = []
+        if chunk:
+            chunks.put(chunk)
+    finally:
+        chunks.put(None)
+
+
+def _read_stream(future, chunks):
+    while True:
+        try:
+            chunk = chunks.get(timeout=1)
+        except queue.Empty:
+            # the future finished without the worker sending the None
+            # sentinel: it died
+            if future.done() and chunks.empty():
+                future.result()
+                raise RuntimeError("worker exited without its results")
+            continue
+        if chunk is None:
+            # raises the error of the worker, if any
+            future.result()
+            return
+        yield from chunk
+
+
+def ordered_chain(fn, items, jobs):
+    """
+    Like ordered_map for a generator function fn, yields the concatenation
+    of its outputs. Workers stream their output back in chunks, so at most
+    STREAM_CHUNK * STREAM_CHUNKS_BUFFERED results per worker are buffered.
+    """
+    if jobs <= 1:
+        for item in items:
+            yield from fn(item)
+        return
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as pool:
+        try:
+            # leaving the manager closes the queues, which unblocks the
+            # workers if the output is not read to the end
+            with multiprocessing.Manager() as manager:
+                pending = collections.deque()
+                for item in items:
+                    chunks = manager.Queue(maxsize=STREAM_CHUNKS_BUFFERED)
+                    pending.append((pool.submit(_stream, fn, chunks,
+                                                item), chunks))
+                    if len(pending) >= jobs:
+                        yield from _read_stream(*pending.popleft())
+                while pending:
+                    yield from _read_stream(*pending.popleft())
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _decode_kv_store(ntp, cache_dir=None):
+    logger.info(f"inspecting {ntp}")
+    kv = KvStore(ntp, cache_dir)
+    kv.decode()
+    items = kv.items()
+    kv.save_checkpoint()
+    return ntp.partition, items
+
+
+def _kv_store_records(ntp, cache_dir=None):
+    logger.info(f"inspecting {ntp}")
+    kv = KvStore(ntp, cache_dir)
+    kv.decode()
+    for item in kv.iter_items():
+        yield {'partition': ntp.partition} | item
+    kv.save_checkpoint()
+
+
+def print_kv_store(store, jobs=1, fmt='json', cache_dir=None):
+    ntps = [
+        ntp for ntp in store.ntps
+        if ntp.nspace == "redpanda" and ntp.topic == "kvstore"
+    ]
+    if fmt == 'ndjson':
+        write_ndjson(
+            ordered_chain(
+                functools.partial(_kv_store_records, cache_dir=cache_dir),
+                ntps, jobs))
+        return
+
+    # Map of partition ID to list of kvstore items
+    result = {}
+    for partition, items in ordered_map(
+            functools.partial(_decode_kv_store, cache_dir=cache_dir), ntps,
+            jobs):
+        result[partition] = items
 
     # Send JSON output to stdout in case caller wants to parse it, other
     # CLI output goes to stderr via logger
     print(json.dumps(result, indent=2))
 
 
-def print_controller(store, bin_dump: bool):
+def _controller_records(task):
+    ntp, path, bin_dump = task
+    yield from ControllerLog(ntp, bin_dump).decode_segment(path)
+
+
+def print_controller(store, bin_dump: bool, jobs=1, fmt='json'):
     for ntp in store.ntps:
         if ntp.nspace == "redpanda" and ntp.topic == "controller":
-            ctrl = ControllerLog(ntp, bin_dump)
-            iter_json = json.JSONEncoder(indent=2).iterencode(
-                SerializableGenerator(ctrl))
-            for j in iter_json:
-                print(j, end='')
+            tasks = [(ntp, path, bin_dump) for path in ntp.segments]
+            ctrl = ordered_chain(_controller_records, tasks, jobs)
+            if fmt == 'ndjson':
+                write_ndjson(ctrl)
+            else:
+                write_json(ctrl)
+
+
+def _kafka_records(task):
+    ntp, path, log_options, fmt = task
+    log = KafkaLog(ntp, **log_options)
+    for result in log.decode_segment(path):
+        if fmt == 'ndjson':
+            yield ntp, ndjson_encoder.encode(result)
+        else:
+            yield ntp, json.dumps(result, indent=2)
+
+
+def print_kafka(store,
+                topic,
+                headers_only,
+                use_mmap=False,
+                jobs=1,
+                offsets=None,
+                timestamps=None,
+                index_cache=None,
+                crc_mode=CrcMode.full,
+                fmt='json'):
+    log_options = dict(headers_only=headers_only,
+                       use_mmap=use_mmap,
+                       offsets=offsets,
+                       timestamps=timestamps,
+                       index_cache=index_cache,
+                       crc_mode=crc_mode)
+
+    def tasks():
+        for ntp in store.ntps:
+            if ntp.nspace in ["kafka", "kafka_internal"]:
+                if topic and ntp.topic != topic:
+                    continue
+                for path in ntp.segments:
+                    yield ntp, path, log_options, fmt
+
+    current = None
+    for ntp, result in ordered_chain(_kafka_records, tasks(), jobs):
+        if str(ntp) != current:
+            current = str(ntp)
+            logger.info(f'topic: {ntp.topic}, partition: {ntp.partition}')
+        if fmt == 'ndjson':
+            sys.stdout.write(result)
+            sys.stdout.write('\n')
+        else:
+            logger.info(result)
+
+
+def _decode_groups(ntp):
+    l = GroupsLog(ntp)
+    l.decode()
+    return l.records
+
+
+def print_groups(store, jobs=1, fmt='json'):
+    ntps = [
+        ntp for ntp in store.ntps
+        if ntp.nspace == "kafka_internal" and ntp.topic == "group"
+    ]
+    if fmt == 'ndjson':
+        write_ndjson(ordered_chain(GroupsLog, ntps, jobs))
+        return
 
+    for records in ordered_map(_decode_groups, ntps, jobs):
+        logger.info(json.dumps(records, indent=2))
+    logger.info("")
 
-def print_kafka(store, topic, headers_only):
-    for ntp in store.ntps:
-        if ntp.nspace in ["kafka", "kafka_internal"]:
-            if topic and ntp.topic != topic:
-                continue
 
-            logger.info(f'topic: {ntp.topic}, partition: {ntp.partition}')
-            log = KafkaLog(ntp, headers_only=headers_only)
-            for result in log.decode():
-                logger.info(json.dumps(result, indent=2))
+def _decode_consumer_offsets(ntp):
+    l = OffsetsLog(ntp)
+    l.decode()
+    return {"partition_id": ntp.partition, "records": l.records}
 
 
-def print_groups(store):
-    for ntp in store.ntps:
-        if ntp.nspace == "kafka_internal" and ntp.topic == "group":
-            l = GroupsLog(ntp)
-            l.decode()
-            logger.info(json.dumps(l.records, indent=2))
-    logger.info("")
+def _consumer_offsets_records(ntp):
+    for record in OffsetsLog(ntp):
+        yield {"partition_id": ntp.partition} | record
 
 
-def print_consumer_offsets(store):
-    records = []
-    for ntp in store.ntps:
-        if ntp.nspace == "kafka" and ntp.topic == "__consumer_offsets":
-            l = OffsetsLog(ntp)
-            l.decode()
-            records.append({
-                "partition_id": ntp.partition,
-                "records": l.records
-            })
+def print_consumer_offsets(store, jobs=1, fmt='json'):
+    ntps = [
+        ntp for ntp in store.ntps
+        if ntp.nspace == "kafka" and ntp.topic == "__consumer_offsets"
+    ]
+    # Send JSON output to stdout in case caller wants to parse it, other
+    # CLI output goes to stderr via logger
+    if fmt == 'ndjson':
+        write_ndjson(ordered_chain(_consumer_offsets_records, ntps, jobs))
+    else:
+        write_json(ordered_map(_decode_consumer_offsets, ntps, jobs))
+        print()
+
+
+def _verify_segment(path):
+    return Segment(path).verify()
+
+
+def print_verify(store, jobs=1, fmt='json'):
+    paths = [path for ntp in store.ntps for path in ntp.segments]
+    corrupt = []
+    batches = 0
+
+    def corrupt_segments():
+        nonlocal batches
+        for result in ordered_map(_verify_segment, paths, jobs):
+            batches += result['batches']
+            if result['corrupt']:
+                logger.error(f"corrupt segment {result['path']}")
+                corrupt.append(result['path'])
+                yield result
+            elif result['truncated_bytes']:
+                logger.info(
+                    f"{result['path']} has {result['truncated_bytes']} trailing bytes"
+                )
 
     # Send JSON output to stdout in case caller wants to parse it, other
     # CLI output goes to stderr via logger
-    print(json.dumps(records, indent=2))
+    if fmt == 'ndjson':
+        write_ndjson(corrupt_segments())
+    else:
+        write_json(corrupt_segments())
+        print()
+    logger.info(
+        f"verified {batches} batches in {len(paths)} segments, {len(corrupt)} corrupt segments"
+    )
 
 
-def print_tx_coordinator(store):
+def print_tx_coordinator(store, fmt='json'):
     for ntp in store.ntps:
         if ntp.nspace == "kafka_internal" and ntp.topic == "tx":
             l = TxLog(ntp)
+            if fmt == 'ndjson':
+                write_ndjson(l.decode())
+                continue
             for result in l.decode():
                 logger.info(json.dumps(result, indent=2))
-    logger.info("")
+    if fmt != 'ndjson':
+        logger.info("")
+
+
+def parse_range(value, parse_bound):
+    """Parse START[,END] where either bound may be omitted"""
+    start, _, end = value.partition(',')
+    return (parse_bound(start) if start else None,
+            parse_bound(end) if end else None)
+
+
+def parse_timestamp(value):
+    """Milliseconds since epoch or an ISO 8601 date, UTC unless specified"""
+    try:
+        return int(value)
+    except ValueError:
+        ts = datetime.datetime.fromisoformat(value)
+        if ts.tzinfo is None:
+            ts = ts.replace(tzinfo=datetime.timezone.utc)
+        return int(ts.timestamp() * 1000)
 
 
 def validate_path(options):
@@ -150,7 +403,7 @@ def main():
                             choices=[
                                 'controller', 'kvstore', 'kafka',
                                 'consumer_offsets', 'legacy-group',
-                                'kafka_records', 'tx_coordinator'
+                                'kafka_records', 'tx_coordinator', 'verify'
                             ],
                             required=True,
                             help='operation to execute')
@@ -159,11 +412,57 @@ def main():
             type=str,
             required=False,
             help='for kafka type, if set, parse only this topic')
+        parser.add_argument(
+            '--format',
+            type=str,
+            choices=['json', 'ndjson'],
+            default='json',
+            help='ndjson streams one compact JSON object per line to stdout '
+            'as records are decoded, with bounded memory use')
         parser.add_argument('-v', "--verbose", action="store_true")
         parser.add_argument(
             '--dump',
             action='store_true',
             help='output binary dumps of keys and values being parsed')
+        parser.add_argument(
+            '--mmap',
+            action='store_true',
+            help=
+            'for kafka types, scan memory mapped segments without copying batches'
+        )
+        parser.add_argument(
+            '-j',
+            '--jobs',
+            type=int,
+            default=1,
+            help='number of processes used to decode partitions and segments')
+        parser.add_argument(
+            '--offset',
+            type=str,
+            help='for kafka types, START[,END] inclusive offset range to decode'
+        )
+        parser.add_argument(
+            '--timestamp',
+            type=str,
+            help='for kafka types, START[,END] inclusive timestamp range to '
+            'decode, in milliseconds since epoch or ISO 8601 (UTC by default)')
+        parser.add_argument(
+            '--crc',
+            type=str,
+            choices=[m.name for m in CrcMode],
+            default=CrcMode.full.name,
+            help='for kafka types, which batch checksums are verified')
+        parser.add_argument(
+            '--index-cache',
+            type=str,
+            default=DEFAULT_INDEX_CACHE_DIR,
+            help='directory of the segment index cache used for --offset and '
+            '--timestamp when no broker index is available')
+        parser.add_argument(
+            '--kvstore-cache',
+            type=str,
+            help='directory to checkpoint the materialized kvstore in, a '
+            'later run on the same data dir only applies newer batches')
         parser.add_argument('--force',
                             action='store_true',
                             help='Skip data directory validation')
@@ -180,23 +479,44 @@ def main():
     validate_path(options)
 
     store = Store(options.path)
+    kafka_range = dict(
+        offsets=parse_range(options.offset, int) if options.offset else None,
+        timestamps=parse_range(options.timestamp, parse_timestamp)
+        if options.timestamp else None,
+        index_cache=IndexCache(options.index_cache),
+        crc_mode=CrcMode[options.crc])
     if options.type == "kvstore":
-        print_kv_store(store)
+        print_kv_store(store, options.jobs, options.format,
+                       options.kvstore_cache)
     elif options.type == "controller":
-        print_controller(store, options.dump)
+        print_controller(store, options.dump, options.jobs, options.format)
     elif options.type == "kafka":
         validate_topic(options.path, options.topic)
-        print_kafka(store, options.topic, headers_only=True)
+        print_kafka(store,
+                    options.topic,
+                    headers_only=True,
+                    use_mmap=options.mmap,
+                    jobs=options.jobs,
+                    fmt=options.format,
+                    **kafka_range)
     elif options.type == "kafka_records":
         validate_topic(options.path, options.topic)
-        print_kafka(store, options.topic, headers_only=False)
+        print_kafka(store,
+                    options.topic,
+                    headers_only=False,
+                    use_mmap=options.mmap,
+                    jobs=options.jobs,
+                    fmt=options.format,
+                    **kafka_range)
     elif options.type == "legacy-group":
-        print_groups(store)
+        print_groups(store, options.jobs, options.format)
     elif options.type == "consumer_offsets":
-        print_consumer_offsets(store)
+        print_consumer_offsets(store, options.jobs, options.format)
+    elif options.type == "verify":
+        print_verify(store, options.jobs, options.format)
     elif options.type == "tx_coordinator":
         validate_tx_coordinator(options.path)
-        print_tx_coordinator(store)
+        print_tx_coordinator(store, options.format)
     else:
         logger.error(f"Unknown type: {options.type}")
         sys.exit(1)